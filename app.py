@@ -5,6 +5,9 @@ from dash import Dash, dcc, html, Input, Output, callback, dash
 import dash_bootstrap_components as dbc
 from components import navbar
 from pages import landing, objectives, analysis, findings
+from src.functions.api import register_api
+from src.functions.metrics import register_metrics
+from src.functions.warmup import WarmUp, database_steps, prepare_fork, register_readiness
 # from flask import Flask, request
 import os
 
@@ -36,6 +39,28 @@ import os
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
+# Read-only JSON data API under /api/v1, backed by the same database as the analysis page
+register_api(server, analysis.DB_PATH)
+# Prometheus metrics for queries, connections and callbacks at /metrics, with VALUE_VOYAGE_METRICS=1
+register_metrics(server)
+# Connections, default queries and figures are warmed up in the background on boot;
+# /readiness_check answers 503 with per-step progress until that has finished.
+warm_up = WarmUp(database_steps(analysis.DB_PATH) + [
+    ('default_queries', analysis.warm_up_queries),
+    ('figures', analysis.warm_up_figures),
+])
+register_readiness(server, warm_up)
+
+
+def preload():
+    """
+    Runs the warm-up in this process and readies it to fork. With VALUE_VOYAGE_PRELOAD=1,
+    gunicorn.conf.py calls it in the master, so every worker starts out warm and ready.
+    Returns the seconds each step took.
+    """
+    timings = warm_up.run()
+    prepare_fork()
+    return timings
 
 # Define the app layout
 app.layout = html.Div([
@@ -66,22 +91,7 @@ def display_page(pathname):
             html.P("The page you are looking for does not exist.")
         ])
 
-# Define a readiness check endpoint
-@app.server.route('/readiness_check')
-def readiness_check():
-    # Add logic to check if your app is ready to serve traffic
-    if app.is_ready():
-        return "App is ready", 200
-    else:
-        return "App is not ready", 503
-
-# Check if the Dash app is ready
-def app_is_ready():
-    # Placeholder function to check if the app is ready
-    # You should implement the actual logic here
-    # For now, we assume the app is always ready
-    return True
-
 if __name__ == "__main__":
+    warm_up.start()
     app.run_server(debug=True, port=8080 if os.environ.get('SERVER_SOFTWARE') else 8050)
     warnings.filterwarnings("ignore", category=UserWarning, module='pandas')
\ No newline at end of file
@@ -0,0 +1,52 @@
+# Gunicorn settings for app:server, used by the app.yaml entrypoint.
+#
+# Worker/thread layout
+#   WEB_CONCURRENCY worker processes (default 2), each running GUNICORN_THREADS
+#   threads (default 4) with the gthread worker class. Processes are what scale the pandas and
+#   Plotly work, which holds the GIL; threads only overlap SQLite reads, gzip and socket I/O,
+#   which release it. Each process keeps its own read connection pool, so one worker uses at
+#   most GUNICORN_THREADS of its DEFAULT_POOL_SIZE connections. Every worker also holds its own
+#   snapshot, so the worker count is bounded by the instance's memory rather than its CPUs: the
+#   default is a fixed 2, and app.yaml sets WEB_CONCURRENCY to match the instance class.
+#
+# Warm-up and readiness
+#   Workers are forked right away and post_fork starts the app's warm-up (the dataset snapshot,
+#   the CPI deflators, the analysis page's queries and figures) in each worker's background
+#   thread. The workers serve from the start; /readiness_check reports the warm-up's progress
+#   with 503 until it has finished and 200 afterwards, so boot time doesn't grow with the
+#   database.
+#
+# Preloading (VALUE_VOYAGE_PRELOAD=1, off by default)
+#   Opt-in: the app is imported once in the master and when_ready runs the whole warm-up there
+#   before any worker is forked. Workers then share those objects copy-on-write (less memory
+#   per worker) and are ready at once, but nothing is served, not even /readiness_check, until
+#   the master's warm-up has finished, so boot time grows with the database again.
+#   After an ingestion the database version changes and each worker reloads on its own.
+#
+# Per-process state to keep in mind with several workers: /metrics (if enabled) reports the
+# worker that answered the scrape, and FigureMemo entries built after the fork are not shared
+# (the on-disk figure cache is).
+import os
+
+bind = f":{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = os.environ.get('VALUE_VOYAGE_PRELOAD', '0') == '1'
+timeout = 60
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before workers are forked.
+    if not preload_app:
+        return
+    from app import preload
+    timings = preload()
+    server.log.info("Preloaded shared state: %s", ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
+
+def post_fork(server, worker):
+    # A no-op in workers forked from a preloaded master, whose warm-up has already run.
+    from app import warm_up
+    warm_up.start()
@@ -1,34 +1,52 @@
 # pages/analysis.py
+
 import dash
-from dash import dcc, html
-import pandas as pd
+from dash import dcc, html, Input, Output, State, callback, clientside_callback
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
-from src.functions.db.fetch import fetch_goods_prices
+import pandas as pd
+from src.functions.db.fetch import fetch_goods_price_series
 from src.functions.db.fetch import fetch_bea_incomes
+from src.functions.db.fetch import fetch_income_shares
+from src.functions.db.fetch import fetch_goods_names, fetch_income_regions
+from src.functions.downsample import DEFAULT_MAX_POINTS, downsample, points_for_width
+from src.functions.figure_cache import FigureMemo, cached_figure
 from scripts.python.data_visualization.visualize_final_goods import plot_incomes_inf_final_goods
 
+DB_PATH = 'data/db/sqlite/database.sqlite'
 
-# Define the Goods Prices Graph as a function
-def get_goods_prices_graph():
-    goods = fetch_goods_prices(
-        db_path='data/db/sqlite/database.sqlite',
-        year_range=(1890, 2025),
-        goods_list=None,
-        use_year_averages=True,
-        output_format='df'
-    )
 
-    goods = goods.sort_values("date", ascending=True).dropna(subset=['price', 'date'])
+# Price trends: every trace is downsampled to about one point per pixel of the plot, and
+# zooming re-queries only the visible dates at that resolution. The downsampled arrays are
+# kept in an LRU memo, so revisiting a view or resolution costs no query.
+PRICE_TRENDS_YEARS = (1890, 2025)
+PRICE_TRENDS_ALGORITHM = 'lttb'
 
-    goods_prices_graph = go.Figure()
+price_series_memo = FigureMemo(db_path=DB_PATH, maxsize=128)
+
+
+def price_trends_series(use_year_averages, date_range, points):
+    """
+    Returns [(good, dates, prices)] for the price trends chart, each trace downsampled to at
+    most `points` points. date_range is None for the full history.
+    """
+    def build():
+        year_range = PRICE_TRENDS_YEARS if date_range is None else (int(date_range[0][:4]), int(date_range[1][:4]))
+        goods = fetch_goods_price_series(DB_PATH, year_range, None, use_year_averages, date_range)
+        series = []
+        for good_name, group in goods.groupby("name"):
+            x, y = downsample(group["date"].to_numpy(), group["price"].to_numpy(dtype=float),
+                              points, PRICE_TRENDS_ALGORITHM)
+            series.append((good_name, x.tolist(), y.tolist()))
+        return series
+
+    return price_series_memo.get_or_build((use_year_averages, date_range, points, PRICE_TRENDS_ALGORITHM), build)
 
-    for good_name in goods["name"].unique():
-        filtered_data = goods[goods["name"] == good_name]
 
-        x_values = filtered_data["year"].astype(int).tolist()
-        y_values = filtered_data["price"].astype(float).tolist()
+def price_trends_figure(series):
+    goods_prices_graph = go.Figure()
 
+    for good_name, x_values, y_values in series:
         goods_prices_graph.add_trace(go.Scatter(
             x=x_values,
             y=y_values,
@@ -42,49 +60,128 @@ def get_goods_prices_graph():
         yaxis_title="Price",
         title_font_size=16,
         xaxis=dict(tickangle=45),
-        hovermode="x unified"
+        hovermode="x unified",
+        # Keeps the user's zoom when a re-queried figure replaces the current one.
+        uirevision="price-trends"
     )
     return goods_prices_graph
 
-# Define the Affordable Goods Graph as a function
-def get_affordable_goods_graph():
-    return plot_incomes_inf_final_goods(
-        db_path='data/db/sqlite/database.sqlite',
-        year_range=(1929, 2024),
-        goods_list=['bacon', 'bread', 'butter', 'coffee', 'eggs', 'flour', 'milk', 'pork chop', 'round steak', 'sugar', 'gas'],
-        regions=['united states'],
-        income_data_source='FRED',
-        salary_interval='monthly',
-        output_format='df'
+
+# Define the Goods Prices Graph as a function
+@cached_figure(db_path=DB_PATH)
+def get_goods_prices_graph(use_year_averages=True, points=DEFAULT_MAX_POINTS):
+    return price_trends_figure(price_trends_series(use_year_averages, None, points))
+
+
+def price_trends_date_range(axis_range):
+    """
+    Turns a Plotly x-axis range into the ('YYYY-MM-DD', 'YYYY-MM-DD') dates to query, padded
+    by a year on each side so the lines run to the edges of the plot. None means everything.
+    """
+    if not axis_range:
+        return None
+    try:
+        # Date axes report ISO strings, or milliseconds since the epoch for numbers.
+        start, end = sorted(pd.Timestamp(value, unit="ms") if isinstance(value, (int, float)) else pd.Timestamp(value)
+                            for value in axis_range)
+    except (TypeError, ValueError):
+        return None
+    return ((start - pd.DateOffset(years=1)).strftime("%Y-%m-%d"),
+            (end + pd.DateOffset(years=1)).strftime("%Y-%m-%d"))
+
+
+def price_trends_panel():
+    return html.Div([
+        dcc.RadioItems(id="price-trends-resolution", value="year",
+                       options=[{"label": " July 2nd averages", "value": "year"},
+                                {"label": " Monthly", "value": "monthly"}],
+                       inline=True, inputStyle={"margin-left": "10px"}),
+        dcc.Store(id="price-trends-view"),
+        graph_shell("price-trends-graph"),
+    ])
+
+# Affordability explorer: the controls feed one debounced selection, and one callback
+# turns it into a figure through an LRU memo keyed on the normalized selection.
+EXPLORER_DEFAULTS = {
+    "goods": ['bacon', 'bread', 'butter', 'coffee', 'eggs', 'flour', 'milk', 'pork chop', 'round steak', 'sugar', 'gas'],
+    "regions": ['united states'],
+    "source": 'FRED',
+    "interval": 'monthly',
+    "years": [1929, 2024],
+}
+INCOME_SOURCES = ['FRED', 'BEA', 'IRS']
+EXPLORER_DEBOUNCE_MS = 400
+
+affordability_memo = FigureMemo(db_path=DB_PATH, maxsize=64)
+
+
+def affordability_selection_key(goods, regions, source, interval, years):
+    """
+    Normalizes an explorer selection so equivalent ones (same goods or regions in another
+    order, duplicates) map to the same memo entry. No goods selected means all goods.
+    """
+    return (
+        tuple(sorted(set(goods or []))),
+        tuple(sorted(set(regions or EXPLORER_DEFAULTS["regions"]))),
+        source or EXPLORER_DEFAULTS["source"],
+        interval or EXPLORER_DEFAULTS["interval"],
+        tuple(int(year) for year in (years or EXPLORER_DEFAULTS["years"])),
     )
 
-# Affordable goods wihtout floud and sugar
-def get_affordable_goods_graph_no_flower_sugar():
+
+def get_affordable_goods_graph(key):
+    goods, regions, source, interval, years = key
     return plot_incomes_inf_final_goods(
-        db_path='data/db/sqlite/database.sqlite',
-        year_range=(1929, 2024),
-        goods_list=['bacon', 'bread', 'butter', 'coffee', 'eggs', 'milk', 'pork chop', 'round steak', 'gas'],
-        regions=['united states'],
-        income_data_source='FRED',
-        salary_interval='monthly',
+        db_path=DB_PATH,
+        year_range=years,
+        goods_list=list(goods) or None,
+        regions=list(regions),
+        income_data_source=source,
+        salary_interval=interval,
         output_format='df'
     )
 
+
+def affordability_explorer():
+    return html.Div([
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="affordability-goods", multi=True, value=EXPLORER_DEFAULTS["goods"],
+                                 options=EXPLORER_DEFAULTS["goods"], placeholder="All goods"), width=12),
+        ], className="mb-2"),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="affordability-regions", multi=True, value=EXPLORER_DEFAULTS["regions"],
+                                 options=EXPLORER_DEFAULTS["regions"]), width=6),
+            dbc.Col(dcc.Dropdown(id="affordability-source", value=EXPLORER_DEFAULTS["source"],
+                                 options=INCOME_SOURCES, clearable=False), width=3),
+            dbc.Col(dcc.RadioItems(id="affordability-interval", value=EXPLORER_DEFAULTS["interval"],
+                                   options=[{"label": " Monthly", "value": "monthly"},
+                                            {"label": " Annually", "value": "annually"}],
+                                   inline=True, inputStyle={"margin-left": "10px"}), width=3),
+        ], className="mb-2"),
+        dcc.RangeSlider(id="affordability-years", min=1890, max=2025, step=1, value=EXPLORER_DEFAULTS["years"],
+                        marks={year: str(year) for year in range(1890, 2026, 15)},
+                        tooltip={"placement": "bottom"}, updatemode="mouseup"),
+        dcc.Store(id="affordability-selection"),
+        graph_shell("affordable-goods-graph"),
+    ])
+
+
 # Define the Income Average Graph as a function
+@cached_figure(db_path=DB_PATH)
 def get_income_averages_graph():
-    income = pd.read_csv("https://raw.githubusercontent.com/ryanfernald/Value-Voyage-A-Journey-Through-Decades-of-Prices/refs/heads/main/data/ryans_data/income1913-1998.csv")
+    income = fetch_income_shares(db_path=DB_PATH, year_range=(1913, 1998))
 
     income_graph_fig = go.Figure()
 
-    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["tax-units"],
+    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["tax_units"],
                              mode='lines+markers',
                              name="Tax Units"))
 
-    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["Average Income Adjusted $ 1998"],
+    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["average_income_adjusted"],
                              mode='lines+markers',
                              name="Avg Income Adjusted (1998 $)"))
 
-    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["Income Unadjusted"],
+    income_graph_fig.add_trace(go.Scatter(x=income["year"], y=income["average_income_unadjusted"],
                              mode='lines+markers',
                              name="Income Unadjusted"))
 
@@ -99,19 +196,20 @@ def get_income_averages_graph():
 
 
 # Define the Income Shares By Percentage Graph as a function
+@cached_figure(db_path=DB_PATH)
 def get_income_shares_graph():
-    income = pd.read_csv("https://raw.githubusercontent.com/ryanfernald/Value-Voyage-A-Journey-Through-Decades-of-Prices/refs/heads/main/data/ryans_data/income1913-1998.csv")
-    columns_to_plot = [
-        "P90-100", "P90-95", "P95-99", "P99-100",
-        "P99.5-100", "P99.9-100", "P99.99-100"
-    ]
+    income = fetch_income_shares(db_path=DB_PATH, year_range=(1913, 1998))
+    columns_to_plot = {
+        "p90_100": "P90-100", "p90_95": "P90-95", "p95_99": "P95-99", "p99_100": "P99-100",
+        "p99_5_100": "P99.5-100", "p99_9_100": "P99.9-100", "p99_99_100": "P99.99-100"
+    }
 
     income_shares = go.Figure()
 
-    for col in columns_to_plot:
+    for col, label in columns_to_plot.items():
         income_shares.add_trace(go.Scatter(x=income["year"], y=income[col],
                              mode='lines+markers',
-                             name=col))
+                             name=label))
 
     income_shares.update_layout(
         title="Top Income Shares by Percentage",
@@ -124,9 +222,9 @@ def get_income_shares_graph():
 
 
 # Define the Income by Area Graph as a function
+@cached_figure(db_path=DB_PATH)
 def get_income_by_area_graph():
-    db_path = 'data/db/sqlite/database.sqlite'
-    area_df = fetch_bea_incomes(db_path)
+    area_df = fetch_bea_incomes(DB_PATH)
 
     regions = ["united states *", "mideast", "great lakes", "plains",
                "southeast", "southwest", "rocky mountain", "far west *"]
@@ -155,6 +253,148 @@ def get_income_by_area_graph():
     return income_area
 
 
+# Figures are built on first view through callbacks rather than at import time, so the
+# server boots without touching the database or the network.
+FIGURE_BUILDERS = {
+    "income-shares-graph": get_income_shares_graph,
+    "income-area-graph": get_income_by_area_graph,
+}
+
+
+# Keyed by database version, so every figure is rebuilt (via the on-disk cache) after an ingestion.
+figure_memo = FigureMemo(db_path=DB_PATH, maxsize=2 * len(FIGURE_BUILDERS))
+
+
+def build_figure(graph_id):
+    """
+    Builds the figure for graph_id once per process and database version; later visitors get
+    the memoized figure.
+    """
+    return figure_memo.get_or_build(graph_id, FIGURE_BUILDERS[graph_id])
+
+
+def graph_shell(graph_id):
+    return dcc.Loading(dcc.Graph(id=graph_id))
+
+
+def register_figure_callback(graph_id):
+    # The graph's own id never changes, so this fires exactly once when the page is rendered.
+    @callback(Output(graph_id, "figure"), Input(graph_id, "id"))
+    def load_figure(_):
+        return build_figure(graph_id)
+
+
+for graph_id in FIGURE_BUILDERS:
+    register_figure_callback(graph_id)
+
+
+def warm_up_queries():
+    """
+    Runs the queries the analysis page makes on load: the explorer's goods options and the
+    region options of every income source.
+    """
+    fetch_goods_names(DB_PATH)
+    for source in INCOME_SOURCES:
+        fetch_income_regions(DB_PATH, source)
+
+
+def warm_up_figures():
+    """
+    Builds every figure the analysis page shows before any interaction: the lazily loaded
+    graphs, the full-history price trends and the explorer's default selection.
+    """
+    for graph_id in FIGURE_BUILDERS:
+        build_figure(graph_id)
+    get_goods_prices_graph()
+    key = affordability_selection_key(**EXPLORER_DEFAULTS)
+    affordability_memo.get_or_build(key, lambda: get_affordable_goods_graph(key))
+
+
+@callback(Output("affordability-goods", "options"), Input("affordability-goods", "id"))
+def load_goods_options(_):
+    return fetch_goods_names(DB_PATH)
+
+
+@callback(Output("affordability-regions", "options"), Output("affordability-regions", "value"),
+          Input("affordability-source", "value"), State("affordability-regions", "value"))
+def load_region_options(source, regions):
+    options = fetch_income_regions(DB_PATH, source)
+    # Keep the regions the new source also has; fall back to the first one it offers.
+    kept = [region for region in regions or [] if region in options]
+    return options, kept or options[:1]
+
+
+# Reports the plot's visible date range and pixel width whenever the x axis is zoomed, panned
+# or reset; other relayouts (legend clicks, y-only zooms) don't trigger a re-query.
+clientside_callback(
+    """
+    function(relayout, view) {
+        const graph = document.getElementById('price-trends-graph');
+        const width = graph ? graph.clientWidth : null;
+        relayout = relayout || {};
+        let range;
+        if ('xaxis.range[0]' in relayout) {
+            range = [relayout['xaxis.range[0]'], relayout['xaxis.range[1]']];
+        } else if ('xaxis.range' in relayout) {
+            range = relayout['xaxis.range'];
+        } else if ('xaxis.autorange' in relayout || !view) {
+            range = null;
+        } else {
+            return window.dash_clientside.no_update;
+        }
+        return {range: range, width: width};
+    }
+    """,
+    Output("price-trends-view", "data"),
+    Input("price-trends-graph", "relayoutData"),
+    State("price-trends-view", "data"),
+)
+
+
+@callback(Output("price-trends-graph", "figure"),
+          Input("price-trends-view", "data"), Input("price-trends-resolution", "value"))
+def update_price_trends_graph(view, resolution):
+    view = view or {}
+    use_year_averages = resolution != "monthly"
+    points = points_for_width(view.get("width"))
+    date_range = price_trends_date_range(view.get("range"))
+    if date_range is None:
+        return get_goods_prices_graph(use_year_averages, points)
+    return price_trends_figure(price_trends_series(use_year_averages, date_range, points))
+
+
+# Debounced in the browser: every control change schedules the selection, and only the last
+# change in a burst (nothing newer within EXPLORER_DEBOUNCE_MS) is written to the store, so
+# a burst of clicks reaches the server as a single request.
+clientside_callback(
+    f"""
+    function(goods, regions, source, interval, years) {{
+        const state = window.affordabilityExplorer = window.affordabilityExplorer || {{calls: 0}};
+        const call = ++state.calls;
+        return new Promise(resolve => setTimeout(() => resolve(
+            call === state.calls
+                ? {{goods: goods, regions: regions, source: source, interval: interval, years: years}}
+                : window.dash_clientside.no_update
+        ), {EXPLORER_DEBOUNCE_MS}));
+    }}
+    """,
+    Output("affordability-selection", "data"),
+    Input("affordability-goods", "value"),
+    Input("affordability-regions", "value"),
+    Input("affordability-source", "value"),
+    Input("affordability-interval", "value"),
+    Input("affordability-years", "value"),
+)
+
+
+@callback(Output("affordable-goods-graph", "figure"), Input("affordability-selection", "data"))
+def update_affordable_goods_graph(selection):
+    if selection is None:
+        raise dash.exceptions.PreventUpdate
+    key = affordability_selection_key(**selection)
+    return affordability_memo.get_or_build(key, lambda: get_affordable_goods_graph(key))
+
+
 # Define the layout for the analysis page
 layout = dbc.Container(
     [
@@ -169,7 +409,7 @@ layout = dbc.Container(
                     width=5
                 ),
                 dbc.Col(
-                    dcc.Graph(id="price-trends-graph", figure=get_goods_prices_graph()),  # Call the function
+                    price_trends_panel(),
                     width=7
                 )
             ]
@@ -177,28 +417,16 @@ layout = dbc.Container(
         dbc.Row(
             [
                 dbc.Col(
-                    dcc.Graph(id="affordable-goods-graph", figure=get_affordable_goods_graph()),  # Call the function
+                    affordability_explorer(),
                     width=7
                 ),
                 dbc.Col(
                     html.Div([
                         html.H1("Affordable Quantity of Goods over a Century"),
                         html.H2("Data Source:"),
-                        html.P("Additional context or insights related to the second graph.")
-                    ]),
-                    width=5
-                )
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Graph(id="affordable-goods-graph", figure=get_affordable_goods_graph_no_flower_sugar()),  # Call the function
-                    width=7
-                ),
-                dbc.Col(
-                    html.Div([
-                        html.H1("Same Graph as Above without flower and sugar"),
+                        html.P("Additional context or insights related to the second graph."),
+                        html.P("Pick goods, regions, an income source, a salary interval and a year range to compare. "
+                               "Deselect flour and sugar to see the remaining goods on a closer scale.")
                     ]),
                     width=5
                 )
@@ -215,7 +443,7 @@ layout = dbc.Container(
                     width=5
                 ),
                 dbc.Col(
-                    dcc.Graph(id="income-shares-graph", figure=get_income_shares_graph()),  # Call the function
+                    graph_shell("income-shares-graph"),
                     width=7
                 ),
             ]
@@ -223,7 +451,7 @@ layout = dbc.Container(
         dbc.Row(
             [
                 dbc.Col(
-                    dcc.Graph(id="income-area-graph", figure=get_income_by_area_graph()),  # Call the function
+                    graph_shell("income-area-graph"),
                     width=7
                 ),
                 dbc.Col(
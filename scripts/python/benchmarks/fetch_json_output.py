@@ -0,0 +1,108 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.functions.db.fetch import fetch_final_goods_affordable, fetch_incomes
+from src.functions.db.insert import bulk_insert_good_price_entries, bulk_insert_incomes
+
+START_YEAR = 1890
+END_YEAR = 2025
+
+
+def build_database(db_path, region_count, good_count):
+    """
+    Writes synthetic BEA incomes for region_count regions and July 2nd prices for good_count
+    goods over every year, then lets ingestion build goods_affordability from them.
+    """
+    years = range(START_YEAR, END_YEAR + 1)
+    incomes = pd.DataFrame([
+        {
+            'year': year, 'inflation_cpi': None, 'tax_units': None,
+            'average_income_unadjusted': 1_000.0 + region * 37.5 + (year - START_YEAR) * 410.25,
+            'average_income_adjusted': None, 'source_link': 'https://example.com/synthetic',
+            'source_name': 'BEA', 'region': f"region {region:03d}",
+        }
+        for region in range(region_count) for year in years
+    ])
+    goods = pd.DataFrame([
+        {
+            'good name': f"good {good:03d}", 'price': round(0.05 + good * 0.013 + (year - START_YEAR) * 0.021, 4),
+            'date': f"{year}-07-02", 'good unit': 'unit', 'source': 'https://example.com/synthetic',
+        }
+        for good in range(good_count) for year in years
+    ])
+    bulk_insert_incomes(db_path, incomes)
+    bulk_insert_good_price_entries(db_path, goods)
+    return sorted(incomes['region'].unique())
+
+
+def measure(func, repeats):
+    """
+    Returns (best seconds, peak traced bytes, output size) over repeats calls.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    output = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, len(output) if output is not None else 0
+
+
+def run(region_count, good_count, repeats, db_path=None):
+    keep_database = db_path is not None
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(), 'fetch_json_benchmark.sqlite')
+    if os.path.exists(db_path):
+        regions = sorted(fetch_incomes(db_path, (START_YEAR, END_YEAR), 'BEA', [f"region {i:03d}" for i in range(region_count)])['region'].unique())
+    else:
+        start = time.perf_counter()
+        regions = build_database(db_path, region_count, good_count)
+        print(f"Built {region_count} regions x {good_count} goods x {END_YEAR - START_YEAR + 1} years "
+              f"in {time.perf_counter() - start:.1f}s at {db_path}")
+
+    year_range = (START_YEAR, END_YEAR)
+    cases = {
+        'fetch_incomes': lambda output_format, **kwargs: fetch_incomes(
+            db_path, year_range, 'BEA', regions, output_format=output_format, **kwargs),
+        'fetch_final_goods_affordable': lambda output_format, **kwargs: fetch_final_goods_affordable(
+            db_path, year_range, None, regions, 'BEA', 'monthly', output_format=output_format, **kwargs),
+    }
+
+    for name, fetch in cases.items():
+        def stream_columns():
+            stream = io.StringIO()
+            fetch('columns', stream=stream)
+            return stream.getvalue()
+
+        print(f"\n{name}")
+        results = {}
+        for label, func in [('json', lambda: fetch('json')), ('columns', lambda: fetch('columns')),
+                            ('columns -> stream', stream_columns)]:
+            seconds, peak, size = measure(func, repeats)
+            results[label] = seconds
+            print(f"  {label:18s} {seconds * 1000:9.1f} ms   peak {peak / 2**20:7.1f} MiB   {size / 2**20:6.1f} MiB of JSON")
+        print(f"  columns is {results['json'] / results['columns']:.1f}x faster than json")
+
+    if not keep_database:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the records ('json') and columnar ('columns') fetch outputs.")
+    parser.add_argument('--regions', type=int, default=60)
+    parser.add_argument('--goods', type=int, default=12)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--db-path', default=None, help="Reuse (or keep) a database at this path.")
+    args = parser.parse_args()
+
+    run(args.regions, args.goods, args.repeats, args.db_path)
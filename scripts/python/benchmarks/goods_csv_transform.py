@@ -0,0 +1,108 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.python.data_insertion.goods_csv_to_db import MONTH_MAP, read_goods_csv, transform_goods_frame
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+
+def legacy_transform_goods_frame(df, month_cols_present):
+    """
+    The row-wise transform process_csv used before it was vectorized, kept as the reference
+    the vectorized path must reproduce exactly.
+    """
+    month_columns = month_cols_present + ['year avg']
+    melted = pd.melt(
+        df,
+        id_vars=['year', 'good name', 'good unit', 'source', 'price unit'],
+        value_vars=month_columns,
+        var_name='month',
+        value_name='price'
+    )
+
+    def convert_price(row):
+        if pd.isnull(row['price']):
+            return None
+        unit = str(row['price unit']).strip().lower()
+        return row['price'] / 100 if unit in ['cent', 'cents'] else row['price']
+
+    melted['price'] = melted.apply(convert_price, axis=1)
+    melted.drop('price unit', axis=1, inplace=True)
+    melted.dropna(subset=['price'], inplace=True)
+
+    def convert_month(row):
+        day = 2 if row['month'] == 'year avg' else 1
+        return f"{int(row['year'])}-{MONTH_MAP[row['month']]}-{day:02d}"
+
+    melted['date'] = melted.apply(convert_month, axis=1)
+    melted.drop('month', axis=1, inplace=True)
+    return melted
+
+
+def write_synthetic_csv(csv_path, melted_rows, seed=0):
+    """
+    Writes a wide goods CSV that melts into roughly melted_rows rows: one line per good and
+    year, a mix of cent and dollar units, and about 10% missing monthly prices.
+    """
+    rng = np.random.default_rng(seed)
+    wide_rows = -(-melted_rows // (len(MONTHS) + 1))
+    years = 1890 + np.arange(wide_rows) % 136
+    goods = np.arange(wide_rows) // 136
+
+    df = pd.DataFrame({'Year': years})
+    for month in MONTHS:
+        prices = np.round(rng.uniform(0.1, 500, wide_rows), 3)
+        prices[rng.random(wide_rows) < 0.1] = np.nan
+        df[month.title()] = prices
+    df['Year Avg'] = np.round(rng.uniform(0.1, 500, wide_rows), 3)
+    df['Good Name'] = [f"good {good}" for good in goods]
+    df['Good Unit'] = '$/lb'
+    df['Source'] = 'https://example.com/synthetic'
+    df['Price Unit'] = np.where(goods % 2 == 0, 'cents', 'Dollar')
+    df.to_csv(csv_path, index=False)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(melted_rows, skip_legacy=False):
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, 'synthetic_goods.csv')
+        write_synthetic_csv(csv_path, melted_rows)
+
+        (df, month_cols_present), read_seconds = timed(read_goods_csv, csv_path)
+        print(f"Read and validated {len(df):,} wide rows in {read_seconds:.2f}s")
+
+        vectorized, vectorized_seconds = timed(transform_goods_frame, df.copy(), month_cols_present)
+        print(f"Vectorized transform: {vectorized_seconds:8.2f}s  ({len(vectorized) / vectorized_seconds:,.0f} rows/s)")
+
+        if not skip_legacy:
+            legacy, legacy_seconds = timed(legacy_transform_goods_frame, df.copy(), month_cols_present)
+            print(f"Legacy transform:     {legacy_seconds:8.2f}s  ({len(legacy) / legacy_seconds:,.0f} rows/s)")
+            print(f"Speedup: {legacy_seconds / vectorized_seconds:.1f}x")
+
+            # Same values, dtypes, index and column order, so the rows handed to SQLite are identical.
+            pd.testing.assert_frame_equal(legacy, vectorized, check_exact=True)
+            if legacy.to_csv().encode() != vectorized.to_csv().encode():
+                raise AssertionError("Vectorized transform output differs from the legacy transform")
+            print("Outputs are byte-identical.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the vectorized and row-wise goods CSV transforms.")
+    parser.add_argument('--rows', type=int, default=5_000_000, help="Rows after melting.")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the vectorized transform.")
+    args = parser.parse_args()
+
+    run(args.rows, args.skip_legacy)
@@ -0,0 +1,150 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from src.functions.db.insert import GOODS_PRICES_INSERT_QUERY, create_good_prices_table, migrate_goods_prices_date_columns
+from src.functions.db.fetch import fetch_goods_prices
+
+START_YEAR = 1890
+END_YEAR = 2025
+
+# The pre-migration filter, kept here only to compare plans and timings against.
+LEGACY_QUERY = """
+    SELECT name, price, date, good_unit, data_source
+    FROM goods_prices
+    WHERE CAST(strftime('%Y', date) AS INTEGER) BETWEEN ? AND ?
+      {goods_filter}
+      AND strftime('%m-%d', date) = '07-02'
+    ORDER BY name ASC, date DESC
+"""
+
+CURRENT_QUERY = """
+    SELECT name, price, date, good_unit, data_source, year
+    FROM goods_prices
+    WHERE is_year_avg = ?
+      AND year BETWEEN ? AND ?
+      {goods_filter}
+    ORDER BY name ASC, date DESC, data_source DESC
+"""
+
+
+def synthetic_rows(total_rows):
+    """
+    Yields (name, price, date, good_unit, data_source) tuples: 12 monthly entries plus one
+    July 2nd year average per good per year, with as many goods as needed to reach total_rows.
+    """
+    years = END_YEAR - START_YEAR + 1
+    rows_per_good = years * 13
+    good_count = -(-total_rows // rows_per_good)
+    produced = 0
+    for good_index in range(good_count):
+        name = f"good {good_index:06d}"
+        for year in range(START_YEAR, END_YEAR + 1):
+            base_price = 0.05 + (good_index % 97) * 0.01 + (year - START_YEAR) * 0.02
+            for month in range(1, 13):
+                yield name, round(base_price * (1 + month / 100), 4), f"{year}-{month:02d}-01", 'unit', 'synthetic'
+                produced += 1
+                if produced == total_rows:
+                    return
+            yield name, round(base_price, 4), f"{year}-07-02", 'unit', 'synthetic'
+            produced += 1
+            if produced == total_rows:
+                return
+
+
+def build_database(db_path, total_rows, batch_size=200_000):
+    create_good_prices_table(db_path)
+
+    connection = sqlite3.connect(db_path)
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA journal_mode=OFF;')
+    cursor.execute('PRAGMA synchronous=OFF;')
+    # Loading without indexes and building them afterwards is much faster than maintaining them per row.
+    cursor.execute('DROP INDEX IF EXISTS idx_goods_prices_avg_name_year;')
+    cursor.execute('DROP INDEX IF EXISTS idx_goods_prices_avg_year;')
+
+    batch = []
+    for row in synthetic_rows(total_rows):
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(GOODS_PRICES_INSERT_QUERY, batch)
+            batch.clear()
+    if batch:
+        cursor.executemany(GOODS_PRICES_INSERT_QUERY, batch)
+
+    migrate_goods_prices_date_columns(cursor)
+    connection.commit()
+    cursor.execute('ANALYZE;')
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def time_query(connection, query, params, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        connection.execute(query, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def query_plan(connection, query, params):
+    return [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def run(total_rows, repeats, db_path=None):
+    keep_database = db_path is not None
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(), 'goods_prices_benchmark.sqlite')
+
+    if not os.path.exists(db_path):
+        start = time.perf_counter()
+        build_database(db_path, total_rows)
+        print(f"Built {total_rows:,} synthetic rows in {time.perf_counter() - start:.1f}s at {db_path}")
+
+    connection = sqlite3.connect(db_path)
+    for goods_list in [['good 000000', 'good 000001'], None]:
+        goods_filter = ""
+        if goods_list:
+            goods_filter = f"AND name IN ({','.join('?' for _ in goods_list)})"
+        legacy_query = LEGACY_QUERY.format(goods_filter=goods_filter)
+        current_query = CURRENT_QUERY.format(goods_filter=goods_filter)
+        legacy_params = (1990, 2000, *(goods_list or []))
+        current_params = (1, 1990, 2000, *(goods_list or []))
+
+        print(f"\ngoods_list={goods_list}")
+        legacy_plan = query_plan(connection, legacy_query, legacy_params)
+        current_plan = query_plan(connection, current_query, current_params)
+        print("Legacy plan:  " + " | ".join(legacy_plan))
+        print("Current plan: " + " | ".join(current_plan))
+
+        if not any('USING COVERING INDEX' in step for step in current_plan):
+            raise AssertionError(f"fetch_goods_prices query does not use a covering index: {current_plan}")
+        if any(step.startswith('SCAN goods_prices') for step in current_plan):
+            raise AssertionError(f"fetch_goods_prices query scans goods_prices: {current_plan}")
+
+        legacy_seconds = time_query(connection, legacy_query, legacy_params, repeats)
+        current_seconds = time_query(connection, current_query, current_params, repeats)
+        print(f"Legacy query:  {legacy_seconds * 1000:10.2f} ms")
+        print(f"Current query: {current_seconds * 1000:10.2f} ms ({legacy_seconds / current_seconds:,.0f}x faster)")
+
+        start = time.perf_counter()
+        fetch_goods_prices(db_path, year_range=(1990, 2000), goods_list=goods_list)
+        print(f"fetch_goods_prices end to end: {(time.perf_counter() - start) * 1000:.2f} ms")
+    connection.close()
+
+    if not keep_database:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare goods_prices query plans and timings on a synthetic table.")
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--db-path', default=None, help="Reuse (or keep) a database at this path.")
+    args = parser.parse_args()
+
+    run(args.rows, args.repeats, args.db_path)
@@ -0,0 +1,314 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.functions.db.fetch import fetch_affordability_cube, fetch_final_goods_affordable, fetch_goods_prices, fetch_incomes, fetch_incomes_multi
+from src.functions.downsample import downsample
+from src.functions.db.insert import (
+    GOODS_PRICES_INSERT_QUERY, create_good_prices_table, create_incomes_table, rebuild_goods_affordability
+)
+from scripts.python.benchmarks.goods_csv_transform import write_synthetic_csv
+from scripts.python.data_insertion.goods_csv_to_db import process_csv
+from scripts.python.data_visualization.visualize_final_goods import plot_incomes_inf_final_goods
+
+END_YEAR = 2025
+INCOME_SOURCES = ['FRED', 'BEA', 'IRS']
+
+
+def dataset_shape(goods, years, regions, sources):
+    return {'goods': goods, 'years': years, 'regions': regions, 'sources': sources}
+
+
+def good_names(shape):
+    return [f"good {good:05d}" for good in range(shape['goods'])]
+
+
+def region_names(shape):
+    return ['united states'] + [f"region {region:04d}" for region in range(shape['regions'] - 1)]
+
+
+def income_source_names(shape):
+    extra = [f"SOURCE {source}" for source in range(len(INCOME_SOURCES), shape['sources'])]
+    return (INCOME_SOURCES + extra)[:shape['sources']]
+
+
+def build_database(db_path, shape, batch_size=200_000):
+    """
+    Builds a database with the production schema: goods x years x 12 monthly prices plus the
+    July 2nd average, from each of `sources` price sources, and incomes for every year,
+    region and income source. goods_affordability is rebuilt from them at the end.
+    Returns the number of goods_prices and incomes rows written.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    start_year = END_YEAR - shape['years'] + 1
+
+    def price_rows():
+        for good_index, name in enumerate(good_names(shape)):
+            for source in range(shape['sources']):
+                data_source = f"https://example.com/source-{source}"
+                for year in range(start_year, END_YEAR + 1):
+                    base = 0.05 + (good_index % 97) * 0.01 + (year - start_year) * 0.02 + source * 0.001
+                    for month in range(1, 13):
+                        yield name, round(base * (1 + month / 100), 4), f"{year}-{month:02d}-01", 'unit', data_source
+                    yield name, round(base, 4), f"{year}-07-02", 'unit', data_source
+
+    def income_rows():
+        for source_name in income_source_names(shape):
+            for region_index, region in enumerate(region_names(shape)):
+                for year in range(start_year, END_YEAR + 1):
+                    income = 500.0 + region_index * 13.5 + (year - start_year) * 420.0
+                    yield year, None, None, income, None, source_name, 'https://example.com/incomes', region
+
+    connection = sqlite3.connect(db_path)
+    cursor = connection.cursor()
+    counts = {}
+    for table, query, rows in [
+        ('goods_prices', GOODS_PRICES_INSERT_QUERY, price_rows()),
+        ('incomes', "INSERT OR REPLACE INTO incomes (year, inflation_cpi, tax_units, average_income_unadjusted, "
+                    "average_income_adjusted, source_name, source_link, region) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+         income_rows()),
+    ]:
+        counts[table] = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                cursor.executemany(query, batch)
+                counts[table] += len(batch)
+                batch.clear()
+        cursor.executemany(query, batch)
+        counts[table] += len(batch)
+        connection.commit()
+    cursor.execute('ANALYZE;')
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+    rebuild_goods_affordability(db_path)
+    return counts
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, int):
+        return result
+    if hasattr(result, 'to_plotly_json'):
+        # Plotly figure: count the plotted points
+        return sum(len(trace.x) for trace in result.data if trace.x is not None)
+    return len(result)
+
+
+def measure(func, repeats, setup=None):
+    """
+    Calls func repeats times (after one untimed warm-up) and returns p50/p95/min/max in
+    milliseconds, the tracemalloc peak of one extra traced call, and rows/s at the median.
+    setup, if given, runs untimed before every call.
+    """
+    if setup:
+        setup()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+
+    timings = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = np.array(timings)
+    rows = _row_count(result)
+    p50 = float(np.percentile(timings, 50))
+    return {
+        'repeats': repeats,
+        'p50_ms': p50 * 1000,
+        'p95_ms': float(np.percentile(timings, 95)) * 1000,
+        'min_ms': float(timings.min()) * 1000,
+        'max_ms': float(timings.max()) * 1000,
+        'peak_mib': peak / 2 ** 20,
+        'rows': rows,
+        'rows_per_s': rows / p50 if p50 > 0 else None,
+    }
+
+
+def benchmark_cases(db_path, shape, csv_rows, work_dir):
+    """
+    Returns {name: (func, setup)} for every hot path the suite times. The ingestion cases
+    write their CSV and database under work_dir.
+    """
+    start_year = END_YEAR - shape['years'] + 1
+    full_range = (start_year, END_YEAR)
+    decade = (max(start_year, END_YEAR - 9), END_YEAR)
+    goods = good_names(shape)
+    regions = region_names(shape)
+    sources = income_source_names(shape)
+    few_goods = goods[:2]
+
+    csv_path = os.path.join(work_dir, 'synthetic_goods.csv')
+    write_synthetic_csv(csv_path, csv_rows)
+    ingest_db = os.path.join(work_dir, 'ingest.sqlite')
+
+    def fresh_ingest_db():
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(ingest_db + suffix):
+                os.remove(ingest_db + suffix)
+
+    # The figure cache would turn every repeat into a cache hit, so time the undecorated builder.
+    build_figure = plot_incomes_inf_final_goods.__wrapped__
+
+    # A monthly trace long enough to need downsampling: 100k points down to 1k.
+    trace_x = np.arange(100_000, dtype=float)
+    trace_y = np.cumsum(np.random.default_rng(0).normal(size=trace_x.size))
+
+    return {
+        'fetch_goods_prices/all_goods_full_range': (
+            lambda: fetch_goods_prices(db_path, full_range, None, True), None),
+        'fetch_goods_prices/two_goods_decade': (
+            lambda: fetch_goods_prices(db_path, decade, few_goods, True), None),
+        'fetch_goods_prices/monthly_all_goods_decade': (
+            lambda: fetch_goods_prices(db_path, decade, None, False), None),
+        'fetch_incomes/all_regions_full_range': (
+            lambda: fetch_incomes(db_path, full_range, sources[0], regions), None),
+        'fetch_incomes/us_full_range': (
+            lambda: fetch_incomes(db_path, full_range, sources[0], ['united states']), None),
+        'fetch_incomes/each_source_us': (
+            lambda: sum(len(fetch_incomes(db_path, full_range, source, ['united states'])) for source in sources), None),
+        'fetch_incomes_multi/all_sources_us': (
+            lambda: fetch_incomes_multi(db_path, full_range, sources, ['united states'], 'df'), None),
+        'fetch_final_goods_affordable/all_goods_all_regions': (
+            lambda: fetch_final_goods_affordable(db_path, full_range, None, regions, sources[0], 'monthly'), None),
+        'fetch_final_goods_affordable/two_goods_us': (
+            lambda: fetch_final_goods_affordable(db_path, full_range, few_goods, None, sources[0], 'annually'), None),
+        'fetch_affordability_cube/all_goods_all_regions': (
+            lambda: fetch_affordability_cube(db_path, full_range, None, None, sources[0], 'monthly', 'df'), None),
+        'process_csv/fresh_database': (
+            lambda: process_csv(ingest_db, csv_path) or csv_rows, fresh_ingest_db),
+        'plot_incomes_inf_final_goods/all_goods_us': (
+            lambda: build_figure(db_path, full_range, None, ['united states'], sources[0], 'monthly', 'df'), None),
+        'downsample/lttb_100k_to_1k': (
+            lambda: downsample(trace_x, trace_y, 1000, 'lttb')[0], None),
+        'downsample/minmax_100k_to_1k': (
+            lambda: downsample(trace_x, trace_y, 1000, 'minmax')[0], None),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(shape, repeats, csv_rows, only=None, db_path=None):
+    # Everything the suite writes, the database included unless db_path is given, lives in a
+    # temporary directory that is removed however the run ends.
+    with tempfile.TemporaryDirectory() as work_dir:
+        if db_path is None:
+            db_path = os.path.join(work_dir, 'benchmark.sqlite')
+
+        build = None
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            counts = build_database(db_path, shape)
+            build = {'seconds': time.perf_counter() - start, **counts}
+            print(f"Built {counts['goods_prices']:,} goods_prices and {counts['incomes']:,} incomes rows "
+                  f"in {build['seconds']:.1f}s at {db_path}")
+
+        results = {}
+        for name, (func, setup) in benchmark_cases(db_path, shape, csv_rows, work_dir).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = measure(func, repeats, setup)
+            r = results[name]
+            print(f"{name:55s} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms  "
+                  f"peak {r['peak_mib']:8.1f} MiB  {r['rows']:>10,} rows  {r['rows_per_s'] or 0:>14,.0f} rows/s")
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'shape': shape,
+            'csv_rows': csv_rows,
+            'build': build,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints the p50 ratio of every benchmark present in both runs and returns the names that
+    got slower than threshold (e.g. 1.2 = 20% slower).
+    """
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    if baseline['meta'].get('shape') != current['meta'].get('shape'):
+        print(f"  warning: dataset shapes differ ({baseline['meta'].get('shape')} vs {current['meta'].get('shape')})")
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f"  {name:55s} {before['p50_ms']:9.2f} -> {result['p50_ms']:9.2f} ms  ({ratio:5.2f}x) {flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the fetch, ingestion and figure hot paths on a synthetic database.")
+    parser.add_argument('--goods', type=int, default=12)
+    parser.add_argument('--years', type=int, default=136)
+    parser.add_argument('--regions', type=int, default=60)
+    parser.add_argument('--sources', type=int, default=2, help="Price sources per good and income sources.")
+    parser.add_argument('--csv-rows', type=int, default=100_000, help="Rows after melting in the ingested CSV.")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help="Run only benchmarks whose name contains one of these.")
+    parser.add_argument('--db-path', default=None, help="Reuse (or keep) a database at this path.")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file.")
+    parser.add_argument('--compare', default=None, help="A previous results JSON to compare p50s against.")
+    parser.add_argument('--threshold', type=float, default=1.2, help="p50 ratio counted as a regression.")
+    args = parser.parse_args()
+
+    current = run(dataset_shape(args.goods, args.years, args.regions, args.sources),
+                  args.repeats, args.csv_rows, args.only, args.db_path)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
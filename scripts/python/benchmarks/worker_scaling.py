@@ -0,0 +1,183 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# A mix of API reads that all do real work (no conditional requests, so never a 304).
+REQUEST_PATHS = [
+    "/api/v1/affordability?start_year=1929&end_year=2024&source=FRED&interval=monthly",
+    "/api/v1/affordability?start_year=1950&end_year=2000&source=BEA&regions=united%20states,new%20york,texas,california",
+    "/api/v1/goods-prices?start_year=1890&end_year=2025",
+    "/api/v1/goods-prices?start_year=1990&end_year=2025&year_averages=false",
+    "/api/v1/incomes?start_year=1929&end_year=2023&source=BEA&regions=united%20states,new%20york,texas,california,ohio",
+    "/api/v1/affordability?start_year=1929&end_year=2024&source=BEA&regions=ohio&backend=memory",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, threads, preload, port, figure_cache_dir):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               VALUE_VOYAGE_PRELOAD='1' if preload else '0')
+    env.setdefault('VALUE_VOYAGE_FIGURE_CACHE_DIR', figure_cache_dir)
+    return subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:server'],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_serving(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/readiness_check')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server on port {port} did not come up within {timeout}s")
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return children
+
+
+def memory_mib(pid):
+    """
+    Returns the proportional (Pss) and unique (Private) memory of the master and its workers,
+    in MiB, from /proc/<pid>/smaps_rollup. Pages shared copy-on-write count once in Pss.
+    None where /proc is unavailable.
+    """
+    totals = {'pss': 0, 'private': 0}
+    for process in [pid] + _children(pid):
+        try:
+            with open(f'/proc/{process}/smaps_rollup') as f:
+                for line in f:
+                    field, value = line.split(':', 1)
+                    if field == 'Pss':
+                        totals['pss'] += int(value.split()[0])
+                    elif field in ('Private_Clean', 'Private_Dirty'):
+                        totals['private'] += int(value.split()[0])
+        except OSError:
+            return None
+    return {name: kib / 1024 for name, kib in totals.items()}
+
+
+def generate_load(port, concurrency, duration):
+    """
+    Runs `concurrency` client threads, each on a keep-alive connection cycling through
+    REQUEST_PATHS, for `duration` seconds. Returns throughput and latency percentiles.
+    """
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        request = index
+        while time.monotonic() < deadline:
+            path = REQUEST_PATHS[request % len(REQUEST_PATHS)]
+            request += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[index] += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            latencies[index].append(time.perf_counter() - started)
+        connection.close()
+
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings = np.concatenate([np.array(values) for values in latencies]) if any(latencies) else np.array([0.0])
+    return {
+        'requests': int(sum(len(values) for values in latencies)),
+        'errors': int(sum(errors)),
+        'requests_per_s': sum(len(values) for values in latencies) / elapsed,
+        'p50_ms': float(np.percentile(timings, 50)) * 1000,
+        'p95_ms': float(np.percentile(timings, 95)) * 1000,
+    }
+
+
+def run(worker_counts, threads, concurrency, duration, preload, warmup):
+    results = []
+    for workers in worker_counts:
+        port = free_port()
+        # Each run starts from an empty figure cache, removed along with the server.
+        with tempfile.TemporaryDirectory() as figure_cache_dir:
+            server = start_server(workers, threads, preload, port, figure_cache_dir)
+            try:
+                wait_until_serving(port)
+                generate_load(port, concurrency, warmup)
+                result = {'workers': workers, 'threads': threads, 'preload': preload,
+                          **generate_load(port, concurrency, duration), 'memory_mib': memory_mib(server.pid)}
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+        results.append(result)
+        memory = result['memory_mib']
+        print(f"{workers:3d} workers x {threads} threads  {result['requests_per_s']:8.1f} req/s  "
+              f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  errors {result['errors']:4d}"
+              + (f"  Pss {memory['pss']:7.1f} MiB  private {memory['private']:7.1f} MiB" if memory else ""))
+
+    base = results[0]['requests_per_s']
+    for result in results:
+        result['speedup'] = result['requests_per_s'] / base if base else None
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure API throughput of the gunicorn deployment (gunicorn.conf.py) at several worker "
+                    "counts on this machine. Run from the repository root against the local database.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent client connections.")
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds of measured load per worker count.")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Seconds of unmeasured load first.")
+    parser.add_argument('--preload', action='store_true', help="Warm up in the master and fork workers from it.")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs; {args.concurrency} client connections; {args.duration:.0f}s per run")
+    results = run(args.workers, args.threads, args.concurrency, args.duration, args.preload, args.warmup)
+    for result in results:
+        print(f"  {result['workers']} workers: {result['speedup']:.2f}x the throughput of {results[0]['workers']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cpus': os.cpu_count(), 'paths': REQUEST_PATHS, 'results': results}, f, indent=2)
@@ -0,0 +1,349 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.functions.db.insert import create_good_prices_table, create_incomes_table, migrate_goods_prices_date_columns, \
+    rebuild_cpi, rebuild_goods_affordability, rebuild_goods_coverage
+from scripts.python.data_insertion.incomes_bea_to_db import BEA_SOURCE_LINK
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+GOOD_UNITS = ['$/lb', '$/dozen', '$/gallon', '$/half gallon', '$/each', '$/oz']
+# Fixed so a given seed produces the same data whatever the output options.
+GOODS_PER_CHUNK = 256
+
+# Shapes of the holes seen in the missing-data heatmaps: series that start late, monthly
+# detail that only exists for recent decades, multi-year holes, discontinued series and
+# scattered missing months; income regions (counties) that only start being reported later.
+DEFAULT_GAPS = {
+    'full_history_share': 0.35,
+    'monthly_share': 0.7,
+    'monthly_since': 1980,
+    'hole_share': 0.25,
+    'max_hole_years': 15,
+    'discontinued_share': 0.1,
+    'missing_month_rate': 0.03,
+    'counties_since': 1969,
+    'missing_income_rate': 0.01,
+}
+
+GOODS_PRICES_COLUMNS_INSERT = """
+    INSERT INTO goods_prices (name, price, date, good_unit, data_source, year, month, day, is_year_avg)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+INCOMES_INSERT = """
+    INSERT INTO incomes (year, inflation_cpi, tax_units, average_income_unadjusted,
+                         average_income_adjusted, source_link, source_name, region)
+    VALUES (?, NULL, NULL, ?, NULL, ?, 'BEA', ?);
+"""
+
+
+def goods_chunk(seed, first_good, count, first_year, year_count, gaps):
+    """
+    Generates `count` goods starting at index first_good: wide monthly prices and yearly
+    averages in each good's price unit (cents or dollars), with NaN where data is missing.
+    Depends only on (seed, first_good), so chunks can be produced and written independently.
+    """
+    rng = np.random.default_rng([seed, first_good])
+    goods = np.arange(first_good, first_good + count)
+    years = np.arange(year_count)
+
+    # Price paths: a log random walk with a per-good drift and a little monthly noise.
+    base = np.exp(rng.uniform(np.log(0.05), np.log(20.0), count))
+    drift = rng.normal(0.03, 0.01, count)
+    shocks = rng.normal(0.0, 0.06, (count, year_count))
+    yearly = base[:, None] * np.exp(np.cumsum(drift[:, None] + shocks, axis=1) - (drift[:, None] + shocks[:, :1]))
+    monthly = yearly[:, :, None] * np.exp(rng.normal(0.0, 0.02, (count, year_count, 12)))
+
+    # Which years have data at all.
+    start = np.where(rng.random(count) < gaps['full_history_share'], 0,
+                     rng.integers(0, max(int(year_count * 0.8), 1), count))
+    end = np.where(rng.random(count) < gaps['discontinued_share'],
+                   start + 1 + (rng.random(count) * (year_count - start - 1)).astype(int), year_count)
+    present = (years[None, :] >= start[:, None]) & (years[None, :] < end[:, None])
+    hole_start = start + (rng.random(count) * (end - start)).astype(int)
+    hole_end = hole_start + rng.integers(1, gaps['max_hole_years'] + 1, count)
+    has_hole = rng.random(count) < gaps['hole_share']
+    present &= ~(has_hole[:, None] & (years[None, :] >= hole_start[:, None]) & (years[None, :] < hole_end[:, None]))
+
+    # Which months have data: only from a per-good year on, minus scattered misses.
+    monthly_since = gaps['monthly_since'] - first_year + rng.integers(-10, 11, count)
+    monthly_since = np.where(rng.random(count) < gaps['monthly_share'], monthly_since, year_count)
+    has_months = present & (years[None, :] >= monthly_since[:, None])
+    month_present = has_months[:, :, None] & (rng.random((count, year_count, 12)) >= gaps['missing_month_rate'])
+
+    cents = rng.random(count) < 0.4
+    scale = np.where(cents, 100.0, 1.0)[:, None]
+    digits = np.where(cents, 1, 3)[:, None, None]
+    monthly = np.where(month_present, np.round(monthly * scale[:, :, None] * 10.0 ** digits) / 10.0 ** digits, np.nan)
+    # The mean of the months present; goods without months fall back to the yearly level.
+    # (np.nanmean would warn on every all-missing year.)
+    month_counts = month_present.sum(axis=2)
+    month_sums = np.where(month_present, monthly, 0.0).sum(axis=2)
+    average = np.where(month_counts > 0,
+                       np.divide(month_sums, month_counts, out=np.zeros_like(month_sums), where=month_counts > 0),
+                       yearly * scale)
+    average = np.round(average * 10.0 ** digits[:, :, 0]) / 10.0 ** digits[:, :, 0]
+    average = np.where(present, average, np.nan)
+
+    return {
+        'names': np.array([f"good {good:06d}" for good in goods], dtype=object),
+        'units': np.array(GOOD_UNITS, dtype=object)[rng.integers(0, len(GOOD_UNITS), count)],
+        'sources': np.array([f"https://example.com/synthetic/goods/{good % 7}" for good in goods], dtype=object),
+        'cents': cents,
+        'present': present,
+        'monthly': monthly,
+        'average': average,
+    }
+
+
+def wide_goods_frame(chunk, rows, first_year):
+    """
+    The rows (goods x years with data) of a chunk in the wide layout goods_csv_to_db.process_csv reads.
+    """
+    g, y = np.nonzero(chunk['present'][rows])
+    g = rows[g]
+    frame = {'Year': y + first_year}
+    for month_index, month in enumerate(MONTHS):
+        frame[month] = chunk['monthly'][g, y, month_index]
+    frame['Year Avg'] = chunk['average'][g, y]
+    frame['Good Name'] = chunk['names'][g]
+    frame['Good Unit'] = chunk['units'][g]
+    frame['Source'] = chunk['sources'][g]
+    frame['Price Unit'] = np.where(chunk['cents'][g], 'cents', 'Dollar')
+    return pd.DataFrame(frame)
+
+
+def goods_price_rows(chunk, first_year, year_count):
+    """
+    Returns an iterator over the goods_prices rows that ingesting the chunk's CSV would produce,
+    date columns included: cents converted to dollars, missing prices dropped, the year average
+    on July 2nd.
+    """
+    prices = np.concatenate([chunk['monthly'], chunk['average'][:, :, None]], axis=2)
+    prices = prices / np.where(chunk['cents'], 100.0, 1.0)[:, None, None]
+    g, y, column = np.nonzero(~np.isnan(prices))
+
+    months = np.append(np.arange(1, 13), 7)
+    days = np.append(np.ones(12, dtype=int), 2)
+    date_table = np.array([[f"{first_year + year}-{months[c]:02d}-{days[c]:02d}" for c in range(13)]
+                           for year in range(year_count)], dtype=object)
+
+    return zip(
+        chunk['names'][g].tolist(),
+        prices[g, y, column].tolist(),
+        date_table[y, column].tolist(),
+        chunk['units'][g].tolist(),
+        chunk['sources'][g].tolist(),
+        (y + first_year).tolist(),
+        months[column].tolist(),
+        days[column].tolist(),
+        (column == 12).astype(int).tolist(),
+    )
+
+
+def region_names(states, counties):
+    return ['united states'] + [f"state {state:02d}" for state in range(states)] + \
+        [f"county {county:05d}" for county in range(counties)]
+
+
+def income_rows_by_year(seed, states, counties, start_year, end_year, gaps):
+    """
+    Yields (year, incomes) per year, incomes being one value (or NaN) per region in
+    region_names order. Only one year of values is held at a time.
+    """
+    rng = np.random.default_rng([seed, 1_000_000_007])
+    region_count = 1 + states + counties
+    county = np.arange(region_count) > states
+    income = rng.uniform(300.0, 800.0, region_count)
+    growth = rng.normal(0.045, 0.005, region_count)
+    for year in range(start_year, end_year + 1):
+        income = income * np.exp(growth + rng.normal(0.0, 0.03, region_count))
+        reported = ~(county & (year < gaps['counties_since']))
+        reported &= rng.random(region_count) >= gaps['missing_income_rate']
+        reported[0] = True
+        yield year, np.where(reported, np.round(income), np.nan)
+
+
+OUTPUT_ENTRIES = ['goods', 'incomes', 'database.sqlite', 'database.sqlite-wal', 'database.sqlite-shm', 'manifest.json']
+
+
+def prepare_output_dir(output_dir, overwrite=False):
+    """
+    Makes sure output_dir holds nothing from an earlier run, which the ingest scripts would
+    otherwise pick up along with the new files. A non-empty directory is refused unless
+    overwrite is set; then this generator's own outputs are removed and anything else is kept.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    existing = sorted(os.listdir(output_dir))
+    if not existing:
+        return
+    if not overwrite:
+        raise ValueError(f"{output_dir} is not empty ({', '.join(existing[:5])}); "
+                         f"pass overwrite=True (--overwrite) to replace an earlier dataset")
+    for entry in OUTPUT_ENTRIES:
+        path = os.path.join(output_dir, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def generate(output_dir, goods, start_year, end_year, states, counties, income_start_year, seed,
+             goods_per_file=500, write_csv=True, write_sqlite=True, build_affordability=False,
+             gaps=DEFAULT_GAPS, commit_rows=1_000_000, overwrite=False):
+    """
+    Writes a reproducible synthetic dataset under output_dir:
+
+      goods/goods_NNNNN.csv   wide goods CSVs for goods_csv_to_db.process_csv
+      incomes/bea_incomes.csv wide BEA-style incomes for incomes_bea_to_db.process_csv
+      database.sqlite         goods_prices and incomes holding the rows those scripts would write
+      manifest.json           parameters and row counts
+
+    Goods are generated GOODS_PER_CHUNK at a time and incomes a year at a time, and both are
+    streamed to disk, so memory stays flat however many rows are produced.
+    A non-empty output_dir is refused unless overwrite is set (see prepare_output_dir).
+    """
+    start = time.perf_counter()
+    year_count = end_year - start_year + 1
+    counts = {'goods_prices': 0, 'goods_csv_rows': 0, 'incomes': 0}
+    prepare_output_dir(output_dir, overwrite)
+
+    connection = cursor = None
+    db_path = os.path.join(output_dir, 'database.sqlite')
+    if write_sqlite:
+        create_good_prices_table(db_path)
+        create_incomes_table(db_path)
+        connection = sqlite3.connect(db_path)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=OFF;')
+        cursor.execute('PRAGMA synchronous=OFF;')
+        # Loading without the secondary indexes and building them once at the end is much faster.
+        cursor.execute('DROP INDEX IF EXISTS idx_goods_prices_avg_name_year;')
+        cursor.execute('DROP INDEX IF EXISTS idx_goods_prices_avg_year;')
+        cursor.execute('BEGIN;')
+
+    pending_rows = 0
+
+    def maybe_commit():
+        nonlocal pending_rows
+        if pending_rows >= commit_rows:
+            cursor.execute('COMMIT;')
+            cursor.execute('BEGIN;')
+            pending_rows = 0
+
+    goods_dir = os.path.join(output_dir, 'goods')
+    if write_csv:
+        os.makedirs(goods_dir, exist_ok=True)
+    started_files = set()
+
+    for first_good in range(0, goods, GOODS_PER_CHUNK):
+        count = min(GOODS_PER_CHUNK, goods - first_good)
+        chunk = goods_chunk(seed, first_good, count, start_year, year_count, gaps)
+
+        if write_csv:
+            file_index = (first_good + np.arange(count)) // goods_per_file
+            for index in np.unique(file_index):
+                csv_path = os.path.join(goods_dir, f"goods_{index:05d}.csv")
+                frame = wide_goods_frame(chunk, np.nonzero(file_index == index)[0], start_year)
+                frame.to_csv(csv_path, mode='a' if index in started_files else 'w',
+                             header=index not in started_files, index=False)
+                started_files.add(index)
+                counts['goods_csv_rows'] += len(frame)
+
+        if write_sqlite:
+            before = connection.total_changes
+            cursor.executemany(GOODS_PRICES_COLUMNS_INSERT, goods_price_rows(chunk, start_year, year_count))
+            written = connection.total_changes - before
+            counts['goods_prices'] += written
+            pending_rows += written
+            maybe_commit()
+
+        done = first_good + count
+        if done % (GOODS_PER_CHUNK * 20) == 0 or done == goods:
+            elapsed = time.perf_counter() - start
+            print(f"{done:,}/{goods:,} goods, {counts['goods_prices']:,} price rows in {elapsed:.1f}s")
+
+    regions = region_names(states, counties)
+    incomes_dir = os.path.join(output_dir, 'incomes')
+    incomes_file = None
+    writer = None
+    if write_csv:
+        os.makedirs(incomes_dir, exist_ok=True)
+        incomes_file = open(os.path.join(incomes_dir, 'bea_incomes.csv'), 'w', newline='')
+        writer = csv.writer(incomes_file)
+        writer.writerow(['Year'] + regions)
+
+    for year, incomes in income_rows_by_year(seed, states, counties, income_start_year, end_year, gaps):
+        if writer:
+            writer.writerow([year] + ['' if np.isnan(value) else int(value) for value in incomes])
+        reported = np.nonzero(~np.isnan(incomes))[0]
+        if write_sqlite:
+            cursor.executemany(INCOMES_INSERT, zip(
+                [year] * len(reported), incomes[reported].tolist(), [BEA_SOURCE_LINK] * len(reported),
+                [regions[r] for r in reported]
+            ))
+            pending_rows += len(reported)
+            maybe_commit()
+        counts['incomes'] += len(reported)
+
+    if incomes_file:
+        incomes_file.close()
+
+    if write_sqlite:
+        cursor.execute('COMMIT;')
+        print("Building goods_prices indexes...")
+        migrate_goods_prices_date_columns(cursor)
+        cursor.execute('ANALYZE;')
+        connection.commit()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+        cursor.close()
+        connection.close()
+        print("Building goods_coverage and cpi...")
+        rebuild_goods_coverage(db_path)
+        rebuild_cpi(db_path)
+        if build_affordability:
+            print("Building goods_affordability...")
+            rebuild_goods_affordability(db_path)
+
+    manifest = {
+        'seed': seed, 'goods': goods, 'start_year': start_year, 'end_year': end_year,
+        'states': states, 'counties': counties, 'income_start_year': income_start_year,
+        'goods_per_file': goods_per_file, 'gaps': gaps, 'counts': counts,
+        'seconds': time.perf_counter() - start,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Done in {manifest['seconds']:.1f}s: {counts}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic goods and incomes dataset.")
+    parser.add_argument('--output-dir', default='../../../data/synthetic')
+    parser.add_argument('--goods', type=int, default=1_000,
+                        help="With the default gaps a good averages ~430 price rows over 1890-2025; ~235,000 goods give 100M rows.")
+    parser.add_argument('--start-year', type=int, default=1890)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--states', type=int, default=50)
+    parser.add_argument('--counties', type=int, default=3_000)
+    parser.add_argument('--income-start-year', type=int, default=1929)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--goods-per-file', type=int, default=500)
+    parser.add_argument('--no-csv', action='store_true', help="Only write the SQLite database.")
+    parser.add_argument('--no-sqlite', action='store_true', help="Only write the raw CSVs.")
+    parser.add_argument('--affordability', action='store_true',
+                        help="Also build goods_affordability (goods x years x regions x 2 rows; large with counties).")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Replace the dataset an earlier run left in the output directory.")
+    args = parser.parse_args()
+
+    generate(args.output_dir, args.goods, args.start_year, args.end_year, args.states, args.counties,
+             args.income_start_year, args.seed, args.goods_per_file, not args.no_csv, not args.no_sqlite,
+             args.affordability, overwrite=args.overwrite)
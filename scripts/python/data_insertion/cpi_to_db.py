@@ -0,0 +1,8 @@
+from src.functions.db.insert import rebuild_cpi
+
+if __name__ == "__main__":
+    # Only needed once for databases created before the cpi table existed.
+    # bulk_insert_incomes keeps the table current afterwards.
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    print(f"Rebuilding cpi in {db_path}")
+    print(rebuild_cpi(db_path))
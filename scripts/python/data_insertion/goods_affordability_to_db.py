@@ -0,0 +1,8 @@
+from src.functions.db.insert import rebuild_goods_affordability
+
+if __name__ == "__main__":
+    # Only needed once for databases created before goods_affordability existed.
+    # bulk_insert_incomes and bulk_insert_good_price_entries keep the table current afterwards.
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    print(f"Rebuilding goods_affordability in {db_path}")
+    print(rebuild_goods_affordability(db_path))
@@ -0,0 +1,8 @@
+from src.functions.db.insert import rebuild_goods_coverage
+
+if __name__ == "__main__":
+    # Only needed once for databases created before goods_coverage existed.
+    # bulk_insert_good_price_entries and write_good_price_batches keep the table current afterwards.
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    print(f"Rebuilding goods_coverage in {db_path}")
+    print(rebuild_goods_coverage(db_path))
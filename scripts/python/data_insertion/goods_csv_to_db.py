@@ -1,11 +1,34 @@
+import argparse
+import contextlib
 import glob
+import io
+import multiprocessing
 import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
 import pandas as pd
-from src.functions.db.insert import bulk_insert_good_price_entries
+from src.functions.db.insert import (
+    bulk_insert_good_price_entries, fetch_ingestion_manifest, good_price_records, source_file_hash,
+    write_good_price_batches
+)
 
-def process_csv(db_path, csv_path):
-    print(f"Starting processing file: {csv_path}")
+MONTH_MAP = {
+    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
+    'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
+    'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12',
+    'year avg': '07'
+}
 
+
+def read_goods_csv(csv_path):
+    """
+    Reads a wide goods CSV and validates it. Returns the frame with normalized column names
+    and the month columns it contains.
+    """
     base_required_columns = [
         'year', 'year avg', 'good name', 'good unit', 'source', 'price unit'
     ]
@@ -64,7 +87,16 @@ def process_csv(db_path, csv_path):
         raise ValueError("The 'Price Unit' column contains invalid values.")
     print("Price unit column successfully validated.")
 
-    # Data transformation
+    return df, month_cols_present
+
+
+def transform_goods_frame(df, month_cols_present):
+    """
+    Melts a validated wide goods frame into one row per (good, date) price.
+    Cents are converted to dollars, rows without a price are dropped, and month columns are
+    mapped to ISO dates (the yearly average is stored on July 2nd). Every step is a whole-column
+    operation, so the cost no longer grows with a Python call per row.
+    """
     month_columns = month_cols_present + ['year avg']
     melted = pd.melt(
         df,
@@ -75,44 +107,181 @@ def process_csv(db_path, csv_path):
     )
     print(f"Melted dataframe created with {len(melted)} rows.")
 
-    def convert_price(row):
-        if pd.isnull(row['price']):
-            return None
-        unit = str(row['price unit']).strip().lower()
-        return row['price'] / 100 if unit in ['cent', 'cents'] else row['price']
-
-    melted['price'] = melted.apply(convert_price, axis=1)
+    unit_codes, units = pd.factorize(melted['price unit'])
+    cent_units = [str(unit).strip().lower() in ['cent', 'cents'] for unit in units]
+    # The trailing False is picked up by code -1, which factorize uses for missing units.
+    is_cents = np.array(cent_units + [False], dtype=bool)[unit_codes]
+    if is_cents.any():
+        melted['price'] = melted['price'].where(~is_cents, melted['price'] / 100)
     melted.drop('price unit', axis=1, inplace=True)
-    melted.dropna(subset=['price'], inplace=True)  # Drop rows where price is None after conversion
+    melted.dropna(subset=['price'], inplace=True)
     print("Price unit conversion complete and null prices removed.")
 
-    month_map = {
-        'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-        'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
-        'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12',
-        'year avg': '07'
-    }
-
-    def convert_month(row):
-        day = 2 if row['month'] == 'year avg' else 1
-        return f"{int(row['year'])}-{month_map[row['month']]}-{day:02d}"
-
-    melted['date'] = melted.apply(convert_month, axis=1)
+    # Each distinct (year, month) date string is formatted once and gathered back by code.
+    year_codes, years = pd.factorize(melted['year'])
+    month_codes, months = pd.factorize(melted['month'])
+    date_table = np.array([
+        [f"{int(year)}-{MONTH_MAP[month]}-{'02' if month == 'year avg' else '01'}" for month in months]
+        for year in years
+    ], dtype=object).reshape(len(years), len(months))
+    melted['date'] = date_table[year_codes, month_codes]
     melted.drop('month', axis=1, inplace=True)
     print("Date conversion completed.")
 
-    result = bulk_insert_good_price_entries(db_path, melted)
+    return melted
+
+
+def process_csv(db_path, csv_path, force=False):
+    print(f"Starting processing file: {csv_path}")
+
+    # Files whose content hash matches the manifest were loaded already and are skipped.
+    source_name = os.path.basename(csv_path)
+    content_hash = source_file_hash(csv_path)
+    if not force and fetch_ingestion_manifest(db_path, 'goods_prices').get(source_name) == content_hash:
+        print(f"Skipping unchanged file: {csv_path}\n")
+        return
+
+    df, month_cols_present = read_goods_csv(csv_path)
+    melted = transform_goods_frame(df, month_cols_present)
+
+    result = bulk_insert_good_price_entries(db_path, melted, manifest_entry=(source_name, content_hash))
     print(f"Bulk insert result: {result}")
 
     print(f"Finished processing file: {csv_path}\n")
 
+def parse_csv(csv_path, content_hash):
+    """
+    Reads, validates and transforms one goods CSV into insert-ready records.
+    Runs inside pipeline worker processes, so its progress messages are swallowed.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, month_cols_present = read_goods_csv(csv_path)
+        melted = transform_goods_frame(df, month_cols_present)
+    records, affected_years = good_price_records(melted)
+    manifest_entry = (os.path.basename(csv_path), content_hash)
+    return records, affected_years, manifest_entry, time.perf_counter() - start
+
+
+def process_csv_directory(db_path, csv_paths, workers=None, commit_rows=500_000, queue_batches=8, force=False):
+    """
+    Ingests many goods CSVs at once. Files are parsed and validated in a process pool, and
+    their records are handed through a bounded queue to a single writer thread that commits
+    in large transactions. At most queue_batches parsed files plus a small window of files in
+    flight are held in memory, however many files there are. Files whose content hash matches
+    the ingestion manifest are skipped unless force is set.
+
+    Returns per-stage throughput and the files that failed validation.
+    """
+    batch_queue = queue.Queue(maxsize=queue_batches)
+    writer_result = {}
+    done = object()
+    drained = threading.Event()
+
+    def batches():
+        while True:
+            item = batch_queue.get()
+            if item is done:
+                drained.set()
+                return
+            yield item
+
+    def write():
+        writer_result.update(write_good_price_batches(db_path, batches(), commit_rows=commit_rows))
+        # Drain anything left if the writer stopped early, so the producer never blocks.
+        while not drained.is_set():
+            if batch_queue.get() is done:
+                drained.set()
+
+    writer = threading.Thread(target=write, name='goods-writer')
+    writer.start()
+
+    start = time.perf_counter()
+    manifest = {} if force else fetch_ingestion_manifest(db_path, 'goods_prices')
+    pending_files = []
+    skipped = []
+    for csv_path in csv_paths:
+        content_hash = source_file_hash(csv_path)
+        if manifest.get(os.path.basename(csv_path)) == content_hash:
+            skipped.append(csv_path)
+        else:
+            pending_files.append((csv_path, content_hash))
+    pending_files.reverse()
+
+    parsed_rows = 0
+    parse_seconds = 0.0
+    failed = {}
+    workers = workers or os.cpu_count() or 1
+    # The writer thread is already running, so the parsers are spawned rather than forked: a
+    # forked child can inherit a lock that thread held and hang.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Only a small window of files is in flight, so parsed results never pile up in memory.
+        max_in_flight = 2 * workers
+        futures = {}
+        while pending_files or futures:
+            while pending_files and len(futures) < max_in_flight:
+                csv_path, content_hash = pending_files.pop()
+                futures[executor.submit(parse_csv, csv_path, content_hash)] = csv_path
+
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                csv_path = futures.pop(future)
+                try:
+                    records, affected_years, manifest_entry, seconds = future.result()
+                except Exception as e:
+                    failed[csv_path] = str(e)
+                    print(f"Failed to parse {csv_path}: {e}")
+                    continue
+                parsed_rows += len(records)
+                parse_seconds += seconds
+                batch_queue.put((records, affected_years, manifest_entry))
+    parse_wall_seconds = time.perf_counter() - start
+
+    batch_queue.put(done)
+    writer.join()
+    total_seconds = time.perf_counter() - start
+
+    write_seconds = writer_result.get('write_seconds', 0.0)
+    report = {
+        'files': len(csv_paths),
+        'skipped_files': skipped,
+        'failed_files': failed,
+        'rows_parsed': parsed_rows,
+        'rows_written': writer_result.get('rows', 0),
+        'rows_changed': writer_result.get('changed_rows', 0),
+        'commits': writer_result.get('commits', 0),
+        'parse_rows_per_second': parsed_rows / parse_wall_seconds if parse_wall_seconds else 0.0,
+        'parse_cpu_seconds': parse_seconds,
+        'write_rows_per_second': writer_result.get('rows', 0) / write_seconds if write_seconds else 0.0,
+        'total_seconds': total_seconds,
+    }
+    if 'error' in writer_result:
+        report['error'] = writer_result['error']
+
+    print(f"Skipped {len(skipped)} unchanged files.")
+    print(f"Parsed {parsed_rows:,} rows from {len(csv_paths) - len(skipped) - len(failed)} files "
+          f"at {report['parse_rows_per_second']:,.0f} rows/s")
+    print(f"Wrote {report['rows_written']:,} rows ({report['rows_changed']:,} changed) in {report['commits']} commits "
+          f"at {report['write_rows_per_second']:,.0f} rows/s")
+    return report
+
+
 if __name__ == "__main__":
     csv_dir_path = r"../../../data/raw/input_data_csv/goods"
     db_path = r"../../../data/db/sqlite/database.sqlite"
 
+    parser = argparse.ArgumentParser(description="Load the goods CSV directory into SQLite.")
+    parser.add_argument('--sequential', action='store_true', help="Process files one at a time.")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count).")
+    parser.add_argument('--force', action='store_true', help="Reload files even if the manifest says they are unchanged.")
+    args = parser.parse_args()
+
     csv_files = glob.glob(os.path.join(csv_dir_path, "*.csv"))
     print(f"Found CSV files: {csv_files}")
 
-    for csv_path in csv_files:
-        print(f"Processing {csv_path}")
-        process_csv(db_path, csv_path)
+    if args.sequential:
+        for csv_path in csv_files:
+            print(f"Processing {csv_path}")
+            process_csv(db_path, csv_path, force=args.force)
+    else:
+        process_csv_directory(db_path, csv_files, workers=args.workers, force=args.force)
@@ -0,0 +1,8 @@
+from src.functions.db.insert import create_good_prices_table
+
+if __name__ == "__main__":
+    # Adds and backfills the year/month/day/is_year_avg columns and their indexes on databases
+    # created before they existed. New databases get them from create_good_prices_table directly.
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    print(f"Migrating goods_prices in {db_path}")
+    print(create_good_prices_table(db_path))
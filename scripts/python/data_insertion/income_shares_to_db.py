@@ -0,0 +1,44 @@
+import pandas as pd
+from src.functions.db.insert import bulk_insert_income_shares
+
+COLUMN_MAP = {
+    'year': 'year',
+    'inflation-cpi': 'inflation_cpi',
+    'tax-units': 'tax_units',
+    'average income adjusted $ 1998': 'average_income_adjusted',
+    'income unadjusted': 'average_income_unadjusted',
+    'p90-100': 'p90_100',
+    'p90-95': 'p90_95',
+    'p95-99': 'p95_99',
+    'p99-100': 'p99_100',
+    'p99.5-100': 'p99_5_100',
+    'p99.9-100': 'p99_9_100',
+    'p99.99-100': 'p99_99_100',
+    'shares-only-p99-100': 'shares_only_p99_100',
+    'rank-and-share-p99-100': 'rank_and_share_p99_100',
+    'source': 'source_link',
+}
+
+
+def process_csv(db_path, csv_path):
+    df = pd.read_csv(csv_path)
+    df.columns = [col.strip().lower() for col in df.columns]
+
+    missing_cols = [col for col in COLUMN_MAP if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
+
+    df = df[list(COLUMN_MAP)].rename(columns=COLUMN_MAP)
+    df['year'] = pd.to_numeric(df['year'], errors='raise', downcast='integer')
+
+    for col in df.columns.drop(['year', 'source_link']):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    result = bulk_insert_income_shares(db_path, df)
+    print(result)
+
+if __name__ == "__main__":
+    csv_path = r"../../../data/ryans_data/income1913-1998.csv"
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    print(f"Processing {csv_path}")
+    process_csv(db_path, csv_path)
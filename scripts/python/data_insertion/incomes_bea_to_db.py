@@ -3,6 +3,8 @@ import os
 import pandas as pd
 from src.functions.db.insert import bulk_insert_incomes
 
+BEA_SOURCE_LINK = "https://apps.bea.gov/iTable/?reqid=70&step=30&isuri=1&major_area=0&area=xx&year=-1&tableid=21&category=421&area_type=0&year_end=-1&classification=non-industry&state=0&statistic=3&yearbegin=-1&unit_of_measure=levels#eyJhcHBpZCI6NzAsInN0ZXBzIjpbMSwyOSwyNSwzMSwyNiwzMCwzMF0sImRhdGEiOltbIm1ham9yX2FyZWEiLCIwIl0sWyJhcmVhIixbIlhYIl1dLFsieWVhciIsWyItMSJdXSxbInRhYmxlaWQiLCIyMSJdLFsieWVhcl9lbmQiLCItMSJdLFsic3RhdGUiLFsiMCJdXSxbInN0YXRpc3RpYyIsIjMiXSxbInllYXJiZWdpbiIsIi0xIl0sWyJ1bml0X29mX21lYXN1cmUiLCJMZXZlbHMiXV19"
+
 def process_csv(db_path, csv_path):
     df = pd.read_csv(csv_path)
     df.columns = [col.strip().lower() for col in df.columns]
@@ -19,7 +21,7 @@ def process_csv(db_path, csv_path):
     df_long['inflation_cpi'] = None
     df_long['tax_units'] = None
     df_long['average_income_adjusted'] = None
-    df_long['source_link'] = "https://apps.bea.gov/iTable/?reqid=70&step=30&isuri=1&major_area=0&area=xx&year=-1&tableid=21&category=421&area_type=0&year_end=-1&classification=non-industry&state=0&statistic=3&yearbegin=-1&unit_of_measure=levels#eyJhcHBpZCI6NzAsInN0ZXBzIjpbMSwyOSwyNSwzMSwyNiwzMCwzMF0sImRhdGEiOltbIm1ham9yX2FyZWEiLCIwIl0sWyJhcmVhIixbIlhYIl1dLFsieWVhciIsWyItMSJdXSxbInRhYmxlaWQiLCIyMSJdLFsieWVhcl9lbmQiLCItMSJdLFsic3RhdGUiLFsiMCJdXSxbInN0YXRpc3RpYyIsIjMiXSxbInllYXJiZWdpbiIsIi0xIl0sWyJ1bml0X29mX21lYXN1cmUiLCJMZXZlbHMiXV19"
+    df_long['source_link'] = BEA_SOURCE_LINK
     df_long['source_name'] = 'BEA'
 
     result = bulk_insert_incomes(db_path, df_long)
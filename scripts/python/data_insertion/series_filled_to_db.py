@@ -0,0 +1,11 @@
+import sys
+
+from src.functions.db.insert import rebuild_series_filled
+
+if __name__ == "__main__":
+    # Rerun after loading goods or incomes: fetches with fill_gaps=True read what this stores.
+    # Pass 'ffill' to carry the last observed value forward instead of interpolating.
+    db_path = r"../../../data/db/sqlite/database.sqlite"
+    method = sys.argv[1] if len(sys.argv) > 1 else 'linear'
+    print(f"Rebuilding series_filled in {db_path} ({method})")
+    print(rebuild_series_filled(db_path, method))
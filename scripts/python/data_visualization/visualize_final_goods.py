@@ -1,8 +1,11 @@
 from plotly.graph_objects import Figure, Scatter
 from src.functions.db.fetch import fetch_final_goods_affordable
+from src.functions.downsample import DEFAULT_MAX_POINTS, downsample
+from src.functions.figure_cache import cached_figure
 
 
-def plot_incomes_inf_final_goods(db_path, year_range, goods_list, regions, income_data_source, salary_interval, output_format):
+@cached_figure()
+def plot_incomes_inf_final_goods(db_path, year_range, goods_list, regions, income_data_source, salary_interval, output_format, max_points=DEFAULT_MAX_POINTS):
     df = fetch_final_goods_affordable(
         db_path=db_path,
         year_range=year_range,
@@ -25,9 +28,10 @@ def plot_incomes_inf_final_goods(db_path, year_range, goods_list, regions, incom
             yaxis_title="Affordable Quantity"
         )
     else:
-        # If multiple years, create a line chart
+        # If multiple years, create a line chart, each trace downsampled to at most max_points
         for (good, unit), group in df.groupby(['name', 'good_unit']):
-            fig.add_trace(Scatter(x=group['year'], y=group['final_goods_affordable'], mode='lines+markers', name=f"{good} ({unit})"))
+            x, y = downsample(group['year'].to_numpy(), group['final_goods_affordable'].to_numpy(dtype=float), max_points)
+            fig.add_trace(Scatter(x=x, y=y, mode='lines+markers', name=f"{good} ({unit})"))
         fig.update_layout(
             title=f"Affordable Quantity Over Years ({income_data_source} Incomes)",
             xaxis_title="Year",
@@ -1,18 +1,19 @@
 from matplotlib import pyplot as plt
-from src.functions.db.fetch import fetch_incomes
+from src.functions.db.fetch import fetch_incomes_multi
 
 
-def compare_income_data_sources(db_path, start_year, end_year, regions, sources, markers, output_format, output_file):
+def compare_income_data_sources(db_path, start_year, end_year, regions, sources, markers, output_file):
     plt.figure(figsize=(12, 6))
 
+    # Every source in one query, already split per source.
+    incomes_by_source = fetch_incomes_multi(
+        db_path=db_path,
+        year_range=(start_year, end_year),
+        sources=sources,
+        regions=regions,
+    )
     for source, marker in zip(sources, markers):
-        df = fetch_incomes(
-            db_path=db_path,
-            year_range=(start_year, end_year),
-            data_source_name=source,
-            regions=regions,
-            output_format=output_format
-        )
+        df = incomes_by_source[source]
         if not df.empty:
             years = df['year']
             incomes = df['average_income_unadjusted']
@@ -38,7 +39,6 @@ if __name__ == "__main__":
     regions = ['united states']
     sources = ['IRS', 'BEA', 'FRED']
     markers = ['.', '+', 'x']
-    output_format = 'df'
     output_file = f"../../../doc/figures/compare_income_data_sources_{start_year}_{end_year}.png"
 
-    compare_income_data_sources(db_path, start_year, end_year, regions, sources, markers, output_format, output_file)
+    compare_income_data_sources(db_path, start_year, end_year, regions, sources, markers, output_file)
@@ -1,8 +1,13 @@
+import argparse
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.colors as mcolors
-from src.functions.db.fetch import fetch_goods_prices
+from src.functions.db.fetch import fetch_goods_coverage
+
+# Above this many cells the grid lines would hide the cells themselves.
+GRID_LINE_MAX_CELLS = 20_000
 
 
 def get_distinct_years_from_df(df):
@@ -21,43 +26,61 @@ def get_distinct_goods_from_df(df):
     return goods
 
 
+def _fill_matrix(index, goods, row_keys, names):
+    # Marks every (row key, good) pair present in the data, ignoring pairs outside the matrix.
+    values = np.zeros((len(index), len(goods)), dtype=np.int8)
+    rows = index.get_indexer(row_keys)
+    columns = pd.Index(goods).get_indexer(names)
+    inside = (rows >= 0) & (columns >= 0)
+    values[rows[inside], columns[inside]] = 1
+    return pd.DataFrame(values, index=index, columns=goods)
+
+
 def create_binary_matrix(years, goods, df):
     """
     Create a DataFrame with years as rows and goods as columns.
     A cell is 1 if an entry exists for that good in that year, 0 otherwise.
+    df holds one row per entry (fetch_goods_prices) or per good and year (fetch_goods_coverage).
+    """
+    return _fill_matrix(pd.Index(years), goods, df['year'].to_numpy(), df['name'].to_numpy())
+
+
+def create_monthly_binary_matrix(years, goods, df):
+    """
+    Create a DataFrame with (year, month) rows and goods as columns from monthly
+    fetch_goods_coverage rows. A cell is 1 if the good has an entry that month, 0 otherwise.
     """
-    matrix = pd.DataFrame(0, index=years, columns=goods)
-    for _, row in df.iterrows():
-        year = row['year']
-        good = row['name']
-        if year in matrix.index and good in matrix.columns:
-            matrix.at[year, good] = 1
-    return matrix
+    index = pd.MultiIndex.from_product([years, range(1, 13)], names=['year', 'month'])
+    row_keys = pd.MultiIndex.from_arrays([df['year'].to_numpy(), df['month'].to_numpy()])
+    return _fill_matrix(index, goods, row_keys, df['name'].to_numpy())
 
 
-def plot_heatmap(matrix, output_file):
+def plot_heatmap(matrix, output_file, title="July 2 Data Entry Heatmap"):
     """
     Plot and save the heatmap with reversed axes (X: Years, Y: Good Names).
     """
     matrix_transposed = matrix.T
+    if isinstance(matrix_transposed.columns, pd.MultiIndex):
+        matrix_transposed.columns = [f"{year}-{month:02d}" for year, month in matrix_transposed.columns]
+    small = matrix_transposed.size <= GRID_LINE_MAX_CELLS
 
-    plt.figure(figsize=(40, 15))
+    plt.figure(figsize=(40, max(15, len(matrix_transposed) / 8)))
     cmap = mcolors.ListedColormap(['red', 'green'])
 
     sns.heatmap(
         matrix_transposed,
         cmap=cmap,
-        linewidths=0.5,
+        linewidths=0.5 if small else 0,
         linecolor="gray",
         cbar=False,
-        square=True,
+        square=small,
         annot=False,
         vmin=0,
         vmax=1
     )
     plt.xlabel("Year")
     plt.ylabel("Good Name")
-    plt.title("July 2 Data Entry Heatmap (Green: Entry exists, Red: No entry) - Reversed Axes")
+    plt.title(f"{title} (Green: Entry exists, Red: No entry) - Reversed Axes")
     plt.xticks(rotation=90, ha="center")
     plt.yticks(rotation=0)
 
@@ -67,22 +90,35 @@ def plot_heatmap(matrix, output_file):
 
 
 if __name__ == "__main__":
-    year_range = (1929, 2024)
-
-    df = fetch_goods_prices(
-        db_path='../../../data/db/sqlite/database.sqlite',
+    parser = argparse.ArgumentParser(description="Plot which goods have price entries in which years (or months).")
+    parser.add_argument('--db-path', default='../../../data/db/sqlite/database.sqlite')
+    parser.add_argument('--start-year', type=int, default=1929)
+    parser.add_argument('--end-year', type=int, default=2024)
+    parser.add_argument('--granularity', choices=('year', 'month'), default='year')
+    # If you want to restrict to a subset of goods, list them; otherwise all goods are plotted.
+    parser.add_argument('--goods', nargs='*', default=None)
+    args = parser.parse_args()
+    year_range = (args.start_year, args.end_year)
+
+    # goods_coverage already holds the counts per good and year/month, so this reads a few
+    # thousand rows at most instead of every price entry.
+    df = fetch_goods_coverage(
+        db_path=args.db_path,
         year_range=year_range,
-        # If you want to restrict to a subset of goods, specify the list; otherwise, set to None.
-        goods_list=None,
+        goods_list=args.goods,
+        granularity=args.granularity,
         use_year_averages=True,
         output_format='df'
     )
 
-    output_file = f"../../../doc/diagrams/missing_data_heatmap_{year_range[0]}_{year_range[1]}.png"
-
     years = get_distinct_years_from_df(df)
     goods = get_distinct_goods_from_df(df)
 
-    matrix = create_binary_matrix(years, goods, df)
-
-    plot_heatmap(matrix, output_file)
+    if args.granularity == 'month':
+        output_file = f"../../../doc/diagrams/missing_data_heatmap_monthly_{year_range[0]}_{year_range[1]}.png"
+        matrix = create_monthly_binary_matrix(years, goods, df)
+        plot_heatmap(matrix, output_file, title="Monthly Data Entry Heatmap")
+    else:
+        output_file = f"../../../doc/diagrams/missing_data_heatmap_{year_range[0]}_{year_range[1]}.png"
+        matrix = create_binary_matrix(years, goods, df)
+        plot_heatmap(matrix, output_file)
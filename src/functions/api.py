@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+
+from flask import Blueprint, Response, current_app, request
+
+from src.functions.db.fetch import BACKENDS, fetch_final_goods_affordable, fetch_goods_prices, fetch_incomes
+from src.functions.db.version import database_version
+
+API_VERSION = 'v1'
+# Responses smaller than this are sent uncompressed; gzip would barely shrink them.
+MIN_COMPRESS_BYTES = 1024
+DEFAULT_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+api = Blueprint('api', __name__, url_prefix=f'/api/{API_VERSION}')
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _list_arg(name, default=None):
+    # Accepts both ?goods=sugar&goods=eggs and ?goods=sugar,eggs
+    values = [item.strip() for value in request.args.getlist(name) for item in value.split(',') if item.strip()]
+    return values or default
+
+
+def _int_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+
+
+def _choice_arg(name, choices, default):
+    value = request.args.get(name, default)
+    if value not in choices:
+        raise BadRequest(f"'{name}' must be one of: {', '.join(choices)}")
+    return value
+
+
+def _year_range():
+    year_range = (_int_arg('start_year', 1990), _int_arg('end_year', 2000))
+    if year_range[0] > year_range[1]:
+        raise BadRequest("'start_year' must not be after 'end_year'")
+    return year_range
+
+
+def _etag(endpoint, arguments, db_path):
+    """
+    A strong validator for one representation: the endpoint, its normalized arguments and the
+    database version. It changes exactly when the body could change.
+    """
+    payload = json.dumps(
+        {'api': API_VERSION, 'endpoint': endpoint, 'arguments': arguments, 'db': database_version(db_path)},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _if_none_match():
+    header = request.headers.get('If-None-Match', '')
+    if header.strip() == '*':
+        return {'*'}
+    return {tag.strip().removeprefix('W/').strip('"') for tag in header.split(',') if tag.strip()}
+
+
+def _json_response(body, status=200, etag=None):
+    response = Response(body, status=status, mimetype='application/json')
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = current_app.config.get('API_CACHE_CONTROL', DEFAULT_CACHE_CONTROL)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _error(message, status=400):
+    response = _json_response(json.dumps({"error": message}), status=status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _compress(response, etag):
+    accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    if not accepts_gzip or response.content_length is None or response.content_length < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    # A strong ETag identifies the exact bytes, so the gzip representation gets its own tag.
+    response.set_etag(f"{etag}-gzip")
+    return response
+
+
+def _conditional_json(endpoint, arguments, fetch):
+    """
+    Answers a GET from the database, or with 304 Not Modified when the client already holds
+    the current representation. The ETag is computed before any query runs, so a poll that
+    revalidates costs a couple of stat calls.
+    """
+    db_path = current_app.config['API_DB_PATH']
+    etag = _etag(endpoint, arguments, db_path)
+
+    known = _if_none_match()
+    matched = next((tag for tag in (etag, f"{etag}-gzip") if tag in known), None)
+    if matched or '*' in known:
+        response = _json_response(None, status=304, etag=matched or etag)
+        response.headers.pop('Content-Type', None)
+        return response
+
+    try:
+        body = fetch(db_path)
+    except sqlite3.Error as e:
+        return _error(str(e), status=500)
+    if body.startswith('{"error"'):
+        return _error(json.loads(body)['error'], status=500)
+    return _compress(_json_response(body, etag=etag), etag)
+
+
+def _output_format():
+    return {'columns': 'columns', 'records': 'json'}[_choice_arg('format', ('columns', 'records'), 'columns')]
+
+
+@api.errorhandler(BadRequest)
+def _bad_request(error):
+    return _error(str(error))
+
+
+@api.route('/incomes')
+def incomes():
+    """
+    GET /api/v1/incomes?start_year=1990&end_year=2000&source=FRED&regions=united states&format=columns
+    """
+    arguments = {
+        'year_range': _year_range(),
+        'data_source_name': request.args.get('source', 'FRED'),
+        'regions': _list_arg('regions', ['united states']),
+        'output_format': _output_format(),
+        'backend': _choice_arg('backend', BACKENDS, 'sqlite'),
+    }
+    return _conditional_json('incomes', arguments, lambda db_path: fetch_incomes(db_path, **arguments))
+
+
+@api.route('/goods-prices')
+def goods_prices():
+    """
+    GET /api/v1/goods-prices?start_year=1990&end_year=2000&goods=sugar,eggs&year_averages=true&format=columns
+    """
+    arguments = {
+        'year_range': _year_range(),
+        'goods_list': _list_arg('goods'),
+        'use_year_averages': _choice_arg('year_averages', ('true', 'false'), 'true') == 'true',
+        'output_format': _output_format(),
+        'backend': _choice_arg('backend', BACKENDS, 'sqlite'),
+    }
+    return _conditional_json('goods-prices', arguments, lambda db_path: fetch_goods_prices(db_path, **arguments))
+
+
+@api.route('/affordability')
+def affordability():
+    """
+    GET /api/v1/affordability?start_year=1990&end_year=2000&goods=sugar&regions=united states
+        &source=FRED&interval=monthly&format=columns
+    """
+    arguments = {
+        'year_range': _year_range(),
+        'goods_list': _list_arg('goods'),
+        'regions': _list_arg('regions', ['united states']),
+        'income_data_source': request.args.get('source', 'FRED'),
+        'salary_interval': _choice_arg('interval', ('monthly', 'annually'), 'monthly'),
+        'output_format': _output_format(),
+        'backend': _choice_arg('backend', BACKENDS, 'sqlite'),
+    }
+    return _conditional_json('affordability', arguments, lambda db_path: fetch_final_goods_affordable(db_path, **arguments))
+
+
+def register_api(server, db_path, cache_control=DEFAULT_CACHE_CONTROL):
+    """
+    Mounts the read-only /api/v1 endpoints on a Flask server (app.server for the Dash app).
+    """
+    server.config['API_DB_PATH'] = db_path
+    server.config['API_CACHE_CONTROL'] = cache_control
+    server.register_blueprint(api)
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+
+# Values per json.dumps call when streaming a column, so a long column is never one huge string.
+STREAM_CHUNK_VALUES = 65_536
+
+
+def column_values(values):
+    """
+    Returns a NumPy array or pandas Series as a plain list of JSON-serializable values:
+    NumPy scalars become Python scalars and NaN becomes None, since NaN is not valid JSON.
+    """
+    if hasattr(values, 'to_numpy'):
+        values = values.to_numpy()
+    if values.dtype.kind == 'f':
+        nan = np.isnan(values)
+        if nan.any():
+            values = np.where(nan, None, values.astype(object))
+    return values.tolist()
+
+
+def cursor_columns(cursor):
+    """
+    Reads an executed cursor into {field: list}, transposing the row tuples with zip rather
+    than building one dict per row. SQLite hands back NULL rather than NaN, so values are
+    used as they are. Empty results still carry every field name.
+    """
+    names = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def frame_columns(df, columns=None):
+    """
+    Returns {field: list} for a DataFrame, one array per column.
+    """
+    return {name: column_values(df[name]) if name in df else [] for name in (columns or df.columns)}
+
+
+def columns_json(columns):
+    """
+    Serializes {field: list} as column-oriented JSON, e.g. {"year": [1990, 1991], "region": [...]}.
+    """
+    return json.dumps(columns)
+
+
+def write_columns_json(stream, columns, chunk_values=STREAM_CHUNK_VALUES):
+    """
+    Writes the same JSON as columns_json to a file-like object, one chunk of each column at a
+    time, so the full document is never held in memory as a single string.
+    """
+    stream.write('{')
+    for index, (name, values) in enumerate(columns.items()):
+        if index:
+            stream.write(', ')
+        stream.write(f'{json.dumps(name)}: [')
+        for start in range(0, len(values), chunk_values):
+            if start:
+                stream.write(', ')
+            stream.write(json.dumps(values[start:start + chunk_values])[1:-1])
+        stream.write(']')
+    stream.write('}')
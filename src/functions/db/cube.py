@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from src.functions.db.snapshot import SALARY_PERIODS
+
+CUBE_FRAME_COLUMNS = ['name', 'final_goods_affordable', 'good_unit', 'date', 'year', 'region']
+
+
+def broadcast_affordability(price, income, periods):
+    """
+    Broadcasts a goods x years price array against a regions x years income array into a
+    regions x goods x years array of affordable units, truncated like the SQL CAST. Missing
+    or zero prices and missing incomes give NaN. The cube is the only full-size allocation:
+    the division and truncation write into it in place.
+    """
+    price = np.where(price == 0, np.nan, price)
+    income = income / periods
+    cube = np.empty((income.shape[0], price.shape[0], price.shape[1]))
+    np.divide(income[:, None, :], price[None, :, :], out=cube)
+    np.trunc(cube, out=cube)
+    return cube
+
+
+class AffordabilityCube:
+    """
+    How many units of each good the average income of each region could buy per year.
+
+    values is a regions x goods x years float array, NaN where the price or the income is
+    missing; regions, goods and years label its axes. good_unit and date are the goods x
+    years attributes of the July 2nd price each value was computed from.
+    """
+
+    def __init__(self, regions, goods, years, values, good_unit, date, income_source, salary_interval):
+        self.regions = list(regions)
+        self.goods = list(goods)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = values
+        self.good_unit = good_unit
+        self.date = date
+        self.income_source = income_source
+        self.salary_interval = salary_interval
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def sel(self, region=None, good=None, year=None):
+        """
+        Returns the cube values for one region, good and/or year, dropping each selected axis.
+        """
+        index = (
+            slice(None) if region is None else self.regions.index(region),
+            slice(None) if good is None else self.goods.index(good),
+            slice(None) if year is None else int(year - self.years[0]),
+        )
+        return self.values[index]
+
+    def to_frame(self):
+        """
+        Returns the defined cells as long rows shaped like fetch_final_goods_affordable,
+        ordered by name, year and region.
+        """
+        # Walk goods x years x regions so np.nonzero yields that order directly.
+        g, y, r = np.nonzero(~np.isnan(self.values.transpose(1, 2, 0)))
+        if not len(g):
+            return pd.DataFrame(columns=CUBE_FRAME_COLUMNS)
+        return pd.DataFrame({
+            'name': np.array(self.goods, dtype=object)[g],
+            'final_goods_affordable': self.values[r, g, y].astype(np.int64),
+            'good_unit': self.good_unit[g, y],
+            'date': self.date[g, y],
+            'year': self.years[y],
+            'region': np.array(self.regions, dtype=object)[r],
+        }, columns=CUBE_FRAME_COLUMNS)
@@ -1,21 +1,57 @@
 import sqlite3
 import json
+import numpy as np
 import pandas as pd
+from src.functions.db.cube import SALARY_PERIODS, AffordabilityCube, broadcast_affordability
+from src.functions.db.columnar import columns_json, cursor_columns, frame_columns, write_columns_json
+from src.functions.db.instrumentation import query_scope
+from src.functions.db.pool import read_connection
+from src.functions.db.real_dollars import rebase_columns, rebase_frame
+from src.functions.db.snapshot import get_snapshot
 
+BACKENDS = ('sqlite', 'memory')
 
-def fetch_incomes(db_path, year_range=(1990, 2000), data_source_name='FRED', regions=None, output_format='df'):
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backends supported: {', '.join(repr(name) for name in BACKENDS)}")
+
+
+def _check_fill_gaps(fill_gaps, backend):
+    if fill_gaps and backend != 'sqlite':
+        raise ValueError("fill_gaps reads the series_filled table, which only the 'sqlite' backend serves")
+
+
+def _columns_output(columns, stream):
+    # output_format='columns': a JSON string, or written to stream when one is given.
+    if stream is None:
+        return columns_json(columns)
+    write_columns_json(stream, columns)
+    return None
+
+
+@query_scope
+def fetch_incomes(db_path, year_range=(1990, 2000), data_source_name='FRED', regions=None, output_format='df', backend='sqlite', stream=None, fill_gaps=False, real_dollars_base_year=None):
     import sqlite3
     import pandas as pd
     import json
 
+    _check_backend(backend)
+    _check_fill_gaps(fill_gaps, backend)
     start_year, end_year = year_range
 
     if regions is None:
         regions = ['united states']
 
-    connection = sqlite3.connect(db_path)
-    connection.row_factory = sqlite3.Row
-    cursor = connection.cursor()
+    if backend == 'memory':
+        df = get_snapshot(db_path).incomes(year_range, data_source_name, regions)
+        if real_dollars_base_year is not None:
+            df = rebase_frame(db_path, df.copy(), 'average_income_unadjusted', real_dollars_base_year)
+        if output_format == 'df':
+            return df if len(df) else pd.DataFrame([])
+        elif output_format == 'columns':
+            return _columns_output(frame_columns(df), stream)
+        return json.dumps(df.to_dict(orient='records'))
 
     placeholders = ','.join('?' for _ in regions)
     region_filter = f"AND region IN ({placeholders})"
@@ -26,15 +62,45 @@ def fetch_incomes(db_path, year_range=(1990, 2000), data_source_name='FRED', reg
         WHERE year BETWEEN ? AND ?
           AND source_name = ?
           {region_filter}
-        ORDER BY year;
+        ORDER BY year, region;
     """
+    if fill_gaps:
+        # Same columns plus the imputed flag, from the precomputed gap-filled series.
+        income_query = f"""
+            SELECT year, value AS average_income_unadjusted, series AS region, imputed
+            FROM series_filled
+            WHERE kind = 'income'
+              AND year BETWEEN ? AND ?
+              AND source = ?
+              AND series IN ({placeholders})
+            ORDER BY year, region;
+        """
     params = (start_year, end_year, data_source_name, *regions)
-    cursor.execute(income_query, params)
-
-    rows = cursor.fetchall()
 
-    cursor.close()
-    connection.close()
+    if real_dollars_base_year is not None:
+        # Read as columns so the whole income column is rebased with one array multiply.
+        with read_connection(db_path) as connection:
+            cursor = connection.execute(income_query, params)
+            columns = cursor_columns(cursor)
+            cursor.close()
+        columns = rebase_columns(db_path, columns, 'average_income_unadjusted', real_dollars_base_year)
+        if output_format == 'columns':
+            return _columns_output(columns, stream)
+        elif output_format == 'df':
+            return pd.DataFrame(columns) if columns['year'] else pd.DataFrame([])
+        return json.dumps([dict(zip(columns, row)) for row in zip(*columns.values())])
+
+    with read_connection(db_path) as connection:
+        cursor = connection.cursor()
+        if output_format == 'columns':
+            cursor.execute(income_query, params)
+            columns = cursor_columns(cursor)
+            cursor.close()
+            return _columns_output(columns, stream)
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(income_query, params)
+        rows = cursor.fetchall()
+        cursor.close()
 
     if output_format == 'df':
         df = pd.DataFrame([dict(row) for row in rows])
@@ -45,7 +111,109 @@ def fetch_incomes(db_path, year_range=(1990, 2000), data_source_name='FRED', reg
         return json_output
 
 
-def fetch_goods_prices(db_path, year_range=(1990, 2000), goods_list=None, use_year_averages=True, output_format='df'):
+INCOME_MULTI_FORMATS = ('dict', 'df', 'json', 'columns')
+
+
+@query_scope
+def fetch_incomes_multi(db_path, year_range=(1990, 2000), sources=None, regions=None, output_format='dict', backend='sqlite', stream=None, fill_gaps=False, real_dollars_base_year=None):
+    """
+    Fetches the incomes of several sources and regions in one query, for comparing sources.
+
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        sources (list or None): Income sources, e.g. ['IRS', 'BEA', 'FRED']; None fetches every source.
+        regions (list or None): Regions to fetch; None fetches 'united states'.
+        output_format (str): 'dict' returns {source: DataFrame} with fetch_incomes' columns and
+            one entry per requested source, even if empty; 'df' returns one DataFrame with a
+            categorical source column; 'json' and 'columns' serialize that DataFrame.
+        backend (str): 'sqlite' queries the database; 'memory' slices the in-memory snapshot.
+        stream (file-like or None): With output_format='columns', write the JSON here and return None.
+        fill_gaps (bool): Read the gap-filled series from series_filled, with an imputed column.
+        real_dollars_base_year (int or None): Convert incomes to constant dollars of this year.
+
+    Returns:
+        Rows ordered by source (in the requested order), year and region.
+    """
+    _check_backend(backend)
+    _check_fill_gaps(fill_gaps, backend)
+    if output_format not in INCOME_MULTI_FORMATS:
+        raise ValueError(f"Output formats supported: {', '.join(repr(name) for name in INCOME_MULTI_FORMATS)}")
+    start_year, end_year = year_range
+    sources = list(dict.fromkeys(sources)) if sources else None
+
+    if regions is None:
+        regions = ['united states']
+
+    if backend == 'memory':
+        snapshot = get_snapshot(db_path)
+        sources = sources or sorted(snapshot.sources)
+        frames = [snapshot.incomes(year_range, source, regions).assign(source=source) for source in sources]
+        columns = frame_columns(pd.concat(frames, ignore_index=True))
+    else:
+        placeholders = ','.join('?' for _ in regions)
+        params = [start_year, end_year, *regions]
+        # series_filled names the column source rather than source_name.
+        source_column = 'source' if fill_gaps else 'source_name'
+        source_filter, source_order = '', source_column
+        if sources:
+            # Rows come back grouped by source in the requested order, so nothing is re-sorted here.
+            source_filter = f"AND {source_column} IN ({','.join('?' for _ in sources)})"
+            source_order = f"CASE {source_column} {' '.join(f'WHEN ? THEN {i}' for i in range(len(sources)))} END"
+            params.extend(sources)
+            params.extend(sources)
+
+        # Seeks idx_incomes_source_region_year once per (source, region) pair.
+        query = f"""
+            SELECT year, average_income_unadjusted, region, source_name AS source
+            FROM incomes
+            WHERE year BETWEEN ? AND ?
+              AND region IN ({placeholders})
+              {source_filter}
+            ORDER BY {source_order}, year, region;
+        """
+        if fill_gaps:
+            # Same columns plus the imputed flag, from the precomputed gap-filled series.
+            query = f"""
+                SELECT year, value AS average_income_unadjusted, series AS region, imputed, source
+                FROM series_filled
+                WHERE kind = 'income'
+                  AND year BETWEEN ? AND ?
+                  AND series IN ({placeholders})
+                  {source_filter}
+                ORDER BY {source_order}, year, region;
+            """
+
+        with read_connection(db_path) as connection:
+            cursor = connection.execute(query, params)
+            columns = cursor_columns(cursor)
+            cursor.close()
+        sources = sources or list(dict.fromkeys(columns['source']))
+
+    if real_dollars_base_year is not None:
+        columns = rebase_columns(db_path, columns, 'average_income_unadjusted', real_dollars_base_year)
+
+    if output_format == 'columns':
+        return _columns_output(columns, stream)
+    elif output_format == 'json':
+        return json.dumps([dict(zip(columns, row)) for row in zip(*columns.values())])
+    elif output_format == 'df':
+        df = pd.DataFrame(columns)
+        df['source'] = pd.Categorical(df['source'], categories=sources)
+        return df
+
+    # Each source's rows are contiguous, so every frame is a slice of the columns.
+    fields = [name for name in columns if name != 'source']
+    frames = {}
+    for source in sources:
+        start = columns['source'].index(source) if source in columns['source'] else 0
+        stop = start + columns['source'].count(source)
+        frames[source] = pd.DataFrame({name: columns[name][start:stop] for name in fields})
+    return frames
+
+
+@query_scope
+def fetch_goods_prices(db_path, year_range=(1990, 2000), goods_list=None, use_year_averages=True, output_format='df', backend='sqlite', stream=None, fill_gaps=False, real_dollars_base_year=None):
     """
     Fetches goods prices from an SQLite database for a given year range and optional goods filter.
     For years with multiple entries per good, only the latest date entry per year is retained.
@@ -55,20 +223,29 @@ def fetch_goods_prices(db_path, year_range=(1990, 2000), goods_list=None, use_ye
         year_range (tuple): (start_year, end_year) for filtering.
         goods_list (list or None): List of good names; None fetches all goods.
         use_year_averages (bool): If True, fetch only July 2nd entries; else exclude July 2nd entries.
-        output_format (str): 'df' returns DataFrame, 'json' returns JSON.
+        output_format (str): 'df' returns DataFrame, 'json' returns JSON records,
+            'columns' returns column-oriented JSON (one array per field).
+        backend (str): 'sqlite' queries the database; 'memory' slices the in-memory snapshot.
+        stream (file-like or None): With output_format='columns', write the JSON here and return None.
+        fill_gaps (bool): Read the gap-filled year averages from series_filled instead, with an
+            imputed column (1 for filled-in years). Requires use_year_averages=True.
+        real_dollars_base_year (int or None): Convert prices to constant dollars of this year
+            using the cpi table. Prices from years without a CPI become null.
 
     Returns:
-        DataFrame or JSON string.
+        DataFrame or JSON string, ordered by date descending, then name. year is int32.
     """
+    _check_backend(backend)
+    _check_fill_gaps(fill_gaps, backend)
+    if fill_gaps and not use_year_averages:
+        raise ValueError("fill_gaps covers the July 2nd year averages only")
     try:
-        connection = sqlite3.connect(db_path)
-        connection.row_factory = sqlite3.Row
-
         start_year, end_year = year_range
-        params = [start_year, end_year]
+        params = [1 if use_year_averages else 0, start_year, end_year]
 
         where_conditions = [
-            "CAST(strftime('%Y', date) AS INTEGER) BETWEEN ? AND ?"
+            "is_year_avg = ?",
+            "year BETWEEN ? AND ?"
         ]
 
         if goods_list:
@@ -76,84 +253,471 @@ def fetch_goods_prices(db_path, year_range=(1990, 2000), goods_list=None, use_ye
             where_conditions.append(f"name IN ({placeholders})")
             params.extend(goods_list)
 
-        if use_year_averages:
-            where_conditions.append("strftime('%m-%d', date) = '07-02'")
-        else:
-            where_conditions.append("strftime('%m-%d', date) != '07-02'")
-
         where_clause = ' AND '.join(where_conditions)
 
         query = f"""
-            SELECT name, price, date, good_unit, data_source
+            SELECT name, price, date, good_unit, data_source, year
             FROM goods_prices
             WHERE {where_clause}
-            ORDER BY name ASC, date DESC
+            ORDER BY date DESC, name ASC, data_source DESC
         """
 
-        df = pd.read_sql_query(query, connection, params=params)
-        df['year'] = pd.to_datetime(df['date']).dt.year
-
-        # Keep only the latest entry per good per year
-        df_unique = df.sort_values('date', ascending=False).drop_duplicates(subset=['name', 'year'], keep='first')
-        connection.close()
+        if fill_gaps:
+            # One row per good and year already; order as the deduplicated frame below would be.
+            filled_params = [start_year, end_year]
+            series_filter = ""
+            if goods_list:
+                series_filter = f"AND series IN ({','.join('?' for _ in goods_list)})"
+                filled_params.extend(goods_list)
+            filled_query = f"""
+                SELECT series AS name, value AS price, date, unit AS good_unit, data_source, year, imputed
+                FROM series_filled
+                WHERE kind = 'good' AND source = ''
+                  AND year BETWEEN ? AND ?
+                  {series_filter}
+                ORDER BY date DESC, name ASC
+            """
+            with read_connection(db_path) as connection:
+                if output_format == 'columns':
+                    cursor = connection.execute(filled_query, filled_params)
+                    columns = cursor_columns(cursor)
+                    cursor.close()
+                else:
+                    df_filled = pd.read_sql_query(filled_query, connection, params=filled_params)
+                    df_filled['year'] = df_filled['year'].astype('int32')
+            if output_format == 'columns':
+                if real_dollars_base_year is not None:
+                    columns = rebase_columns(db_path, columns, 'price', real_dollars_base_year)
+                return _columns_output(columns, stream)
+            if real_dollars_base_year is not None:
+                rebase_frame(db_path, df_filled, 'price', real_dollars_base_year)
+            if output_format == 'df':
+                return df_filled
+            elif output_format == 'json':
+                return df_filled.to_json(orient='records', date_format='iso')
+            raise ValueError("Output formats supported: 'df', 'json' or 'columns'")
+
+        if backend == 'memory':
+            df = get_snapshot(db_path).goods_prices(year_range, goods_list, use_year_averages)
+        else:
+            with read_connection(db_path) as connection:
+                df = pd.read_sql_query(query, connection, params=params)
+
+        # Keep only the latest entry per good per year, ties between sources going to the last
+        # data_source. Sorting on the full key gives both backends the same row order.
+        df_unique = df.sort_values(['date', 'name', 'data_source'], ascending=[False, True, False], kind='stable') \
+            .drop_duplicates(subset=['name', 'year'], keep='first')
+        # year is int32, as it was when it was derived with pd.to_datetime.
+        df_unique['year'] = df_unique['year'].astype('int32')
+        if real_dollars_base_year is not None:
+            df_unique = rebase_frame(db_path, df_unique.copy(), 'price', real_dollars_base_year)
 
         if output_format == 'df':
             df_unique.reset_index(drop=True, inplace=True)
             return df_unique
         elif output_format == 'json':
             return df_unique.to_json(orient='records', date_format='iso')
+        elif output_format == 'columns':
+            return _columns_output(frame_columns(df_unique), stream)
         else:
-            raise ValueError("Output formats supported: 'df' or 'json'")
+            raise ValueError("Output formats supported: 'df', 'json' or 'columns'")
     except sqlite3.Error as e:
         return json.dumps({"error": str(e)})
 
 
-def fetch_final_goods_affordable(db_path, year_range=(1990, 2000), goods_list=None, regions=None, income_data_source='FRED', salary_interval='monthly', output_format='df'):
-        incomes_df = fetch_incomes(
-            db_path,
-            year_range=year_range,
-            data_source_name=income_data_source,
-            regions=regions,
-            output_format='df'
-        )
+@query_scope
+def fetch_final_goods_affordable(db_path, year_range=(1990, 2000), goods_list=None, regions=None, income_data_source='FRED', salary_interval='monthly', output_format='df', backend='sqlite', stream=None, fill_gaps=False):
+    """
+    Fetches how many units of each good the average income could buy per year.
+    Reads the goods_affordability table, which ingestion keeps up to date, so this is a
+    single indexed range scan rather than a join in Python.
+
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        goods_list (list or None): List of good names; None fetches all goods.
+        regions (list or None): List of regions; defaults to ['united states'].
+        income_data_source (str): Income source name, e.g. 'FRED', 'BEA' or 'IRS'.
+        salary_interval (str): 'monthly' or 'annually'.
+        output_format (str): 'df' returns DataFrame, 'columns' returns column-oriented JSON
+            (one array per field), anything else returns JSON records.
+        backend (str): 'sqlite' queries the database; 'memory' computes from the in-memory snapshot.
+        stream (file-like or None): With output_format='columns', write the JSON here and return None.
+        fill_gaps (bool): Join the gap-filled goods and income series from series_filled instead,
+            so years missing from either side still get a value; adds an imputed column.
+
+    Returns:
+        DataFrame or JSON string.
+    """
+    _check_backend(backend)
+    _check_fill_gaps(fill_gaps, backend)
+    start_year, end_year = year_range
+
+    if regions is None:
+        regions = ['united states']
 
-        goods_df = fetch_goods_prices(
-            db_path,
-            year_range=year_range,
-            goods_list=goods_list,
-            use_year_averages=True,
-            output_format='df'
+    params = [income_data_source, salary_interval, *regions, start_year, end_year]
+    region_placeholders = ','.join('?' for _ in regions)
+
+    goods_filter = ""
+    if goods_list:
+        goods_filter = f"AND name IN ({','.join('?' for _ in goods_list)})"
+        params.extend(goods_list)
+
+    query = f"""
+        SELECT name, final_goods_affordable, good_unit, date, year, region
+        FROM goods_affordability
+        WHERE income_source = ?
+          AND salary_interval = ?
+          AND region IN ({region_placeholders})
+          AND year BETWEEN ? AND ?
+          {goods_filter}
+        ORDER BY name, year, region;
+    """
+    if fill_gaps:
+        # Same arithmetic as refresh_goods_affordability, on series whose gaps are already filled.
+        query = f"""
+            SELECT g.series AS name,
+                   CAST((i.value / s.periods) / g.value AS INTEGER) AS final_goods_affordable,
+                   g.unit AS good_unit, g.date, g.year, i.series AS region,
+                   MAX(g.imputed, i.imputed) AS imputed
+            FROM series_filled AS i
+            CROSS JOIN (
+                SELECT 'monthly' AS salary_interval, 12.0 AS periods
+                UNION ALL
+                SELECT 'annually', 1.0
+            ) AS s
+            JOIN series_filled AS g
+              ON g.kind = 'good' AND g.source = '' AND g.year = i.year
+            WHERE i.kind = 'income'
+              AND i.source = ?
+              AND s.salary_interval = ?
+              AND i.series IN ({region_placeholders})
+              AND i.year BETWEEN ? AND ?
+              {f"AND g.series IN ({','.join('?' for _ in goods_list)})" if goods_list else ""}
+            ORDER BY g.series, g.year, i.series;
+        """
+
+    if backend == 'memory':
+        merged_df = get_snapshot(db_path).goods_affordable(
+            year_range, goods_list, regions, income_data_source, salary_interval
         )
+    elif output_format == 'columns':
+        # Straight from the cursor: no DataFrame and no per-row dicts.
+        with read_connection(db_path) as connection:
+            cursor = connection.execute(query, params)
+            columns = cursor_columns(cursor)
+            cursor.close()
+        return _columns_output(columns, stream)
+    else:
+        with read_connection(db_path) as connection:
+            merged_df = pd.read_sql_query(query, connection, params=params)
 
-        merged_df = pd.merge(goods_df, incomes_df, on='year', how='inner')
+    if output_format == 'df':
+        return merged_df
+    elif output_format == 'columns':
+        return _columns_output(frame_columns(merged_df), stream)
+    else:
+        return json.dumps(merged_df.to_dict(orient='records'))
+
+def _cube_arrays(rows, row_labels, label_column, value_column, first_year, year_count, extra_columns=()):
+    # Scatters long (label, year, value...) rows into dense len(row_labels) x len(years) arrays.
+    shape = (len(row_labels), year_count)
+    i = pd.Index(row_labels).get_indexer(rows[label_column])
+    y = rows['year'].to_numpy(dtype=np.int64) - first_year
+    values = np.full(shape, np.nan)
+    values[i, y] = rows[value_column].to_numpy(dtype=float, na_value=np.nan)
+    extras = []
+    for column in extra_columns:
+        extra = np.empty(shape, dtype=object)
+        extra[i, y] = rows[column].to_numpy()
+        extras.append(extra)
+    return values, extras
+
+
+@query_scope
+def fetch_affordability_cube(db_path, year_range=(1990, 2000), goods_list=None, regions=None, income_data_source='FRED', salary_interval='monthly', output_format='cube', backend='sqlite', stream=None):
+    """
+    Computes affordability for many regions and goods at once: July 2nd prices are read as a
+    goods x years array and incomes as a regions x years array, in one query each, and the
+    regions x goods x years cube is built by broadcasting them against each other.
+    The values equal what fetch_final_goods_affordable reads from goods_affordability.
 
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        goods_list (list or None): List of good names; None takes every good.
+        regions (list or None): List of regions; None takes every region of the income source.
+        income_data_source (str): Income source name, e.g. 'FRED', 'BEA' or 'IRS'.
+        salary_interval (str): 'monthly' or 'annually'.
+        output_format (str): 'cube' returns an AffordabilityCube, 'df' the long DataFrame,
+            'columns' column-oriented JSON and 'json' JSON records of the defined cells.
+        backend (str): 'sqlite' queries the database; 'memory' slices the in-memory snapshot.
+        stream (file-like or None): With output_format='columns', write the JSON here and return None.
 
-        if salary_interval == 'monthly':
-            merged_df['final_goods_affordable'] = (merged_df['average_income_unadjusted'] / 12) / merged_df['price']
-        elif salary_interval == 'annually':
-            merged_df['final_goods_affordable'] = merged_df['average_income_unadjusted'] / merged_df['price']
+    Returns:
+        AffordabilityCube, DataFrame or JSON string. The year axis spans the years both
+        prices and incomes have data for.
+    """
+    _check_backend(backend)
+    if salary_interval not in SALARY_PERIODS:
+        raise ValueError("Salary intervals supported: 'monthly' or 'annually'")
+    start_year, end_year = year_range
 
-        merged_df['final_goods_affordable'] = merged_df['final_goods_affordable'].astype(int)
+    if backend == 'memory':
+        snapshot = get_snapshot(db_path)
+        goods_rows = snapshot.goods_prices(year_range, goods_list, True, priced=True)
+        income_rows = snapshot.incomes(year_range, income_data_source, snapshot.regions if regions is None else regions)
+    else:
+        goods_params = [start_year, end_year]
+        goods_filter = ""
+        if goods_list:
+            goods_filter = f"AND name IN ({','.join('?' for _ in goods_list)})"
+            goods_params.extend(goods_list)
+        income_params = [income_data_source, start_year, end_year]
+        region_filter = ""
+        if regions is not None:
+            region_filter = f"AND region IN ({','.join('?' for _ in regions)})"
+            income_params.extend(regions)
+
+        goods_query = f"""
+            SELECT name, year, price, good_unit, date
+            FROM (
+                SELECT name, year, price, good_unit, date,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY name, year
+                           ORDER BY date DESC, data_source DESC
+                       ) AS rank_in_year
+                FROM goods_prices
+                WHERE is_year_avg = 1
+                  AND price IS NOT NULL AND price != 0
+                  AND year BETWEEN ? AND ?
+                  {goods_filter}
+            )
+            WHERE rank_in_year = 1;
+        """
+        income_query = f"""
+            SELECT region, year, average_income_unadjusted
+            FROM incomes
+            WHERE source_name = ?
+              AND year BETWEEN ? AND ?
+              {region_filter}
+              AND region IS NOT NULL;
+        """
+        with read_connection(db_path) as connection:
+            goods_rows = pd.read_sql_query(goods_query, connection, params=goods_params)
+            income_rows = pd.read_sql_query(income_query, connection, params=income_params)
+
+    goods = sorted(goods_rows['name'].unique())
+    region_names = sorted(income_rows['region'].unique())
+    if len(goods_rows) and len(income_rows):
+        first_year = max(goods_rows['year'].min(), income_rows['year'].min())
+        last_year = min(goods_rows['year'].max(), income_rows['year'].max())
+    else:
+        first_year, last_year = start_year, start_year - 1
+    years = np.arange(first_year, max(last_year + 1, first_year), dtype=np.int64)
+    goods_rows = goods_rows[goods_rows['year'].between(first_year, last_year)]
+    income_rows = income_rows[income_rows['year'].between(first_year, last_year)]
+
+    price, (good_unit, date) = _cube_arrays(goods_rows, goods, 'name', 'price', first_year, len(years),
+                                             ('good_unit', 'date'))
+    income, _ = _cube_arrays(income_rows, region_names, 'region', 'average_income_unadjusted', first_year, len(years))
+
+    cube = AffordabilityCube(
+        region_names, goods, years, broadcast_affordability(price, income, SALARY_PERIODS[salary_interval]),
+        good_unit, date, income_data_source, salary_interval
+    )
+
+    if output_format == 'cube':
+        return cube
+    df = cube.to_frame()
+    if output_format == 'df':
+        return df
+    elif output_format == 'columns':
+        return _columns_output(frame_columns(df), stream)
+    elif output_format == 'json':
+        return json.dumps(df.to_dict(orient='records'))
+    else:
+        raise ValueError("Output formats supported: 'cube', 'df', 'json' or 'columns'")
 
-        merged_df = merged_df[['name', 'final_goods_affordable', 'good_unit', 'date', 'year', 'region']]
 
-        if output_format == 'df':
-            return merged_df
-        else:
-            return json.dumps(merged_df.to_dict(orient='records'))
+@query_scope
+def fetch_goods_price_series(db_path, year_range=(1890, 2025), goods_list=None, use_year_averages=False, date_range=None, output_format='df'):
+    """
+    Fetches every price point of each good in date order, for plotting full-resolution traces.
+    Unlike fetch_goods_prices, monthly entries are not reduced to one per year; only dates with
+    several sources are, the latest data_source winning.
+
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        goods_list (list or None): List of good names; None fetches all goods.
+        use_year_averages (bool): If True, fetch only July 2nd entries; else exclude them.
+        date_range (tuple or None): Optional ('YYYY-MM-DD', 'YYYY-MM-DD') bounds within year_range.
+        output_format (str): 'df' returns DataFrame, 'json' returns JSON records,
+            'columns' returns column-oriented JSON.
+
+    Returns:
+        DataFrame or JSON string with name, date, price and year, ordered by name and date.
+    """
+    start_year, end_year = year_range
+    params = [1 if use_year_averages else 0, start_year, end_year]
+    filters = ""
+    if date_range is not None:
+        filters += "AND date BETWEEN ? AND ?"
+        params.extend(date_range)
+    if goods_list:
+        filters += f" AND name IN ({','.join('?' for _ in goods_list)})"
+        params.extend(goods_list)
+
+    query = f"""
+        SELECT name, date, price, year
+        FROM (
+            SELECT name, date, price, year,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY name, date
+                       ORDER BY data_source DESC
+                   ) AS rank_in_date
+            FROM goods_prices
+            WHERE is_year_avg = ?
+              AND year BETWEEN ? AND ?
+              {filters}
+              AND price IS NOT NULL
+        )
+        WHERE rank_in_date = 1
+        ORDER BY name, date;
+    """
+    with read_connection(db_path) as connection:
+        if output_format == 'columns':
+            return columns_json(cursor_columns(connection.execute(query, params)))
+        df = pd.read_sql_query(query, connection, params=params)
+
+    if output_format == 'df':
+        return df
+    elif output_format == 'json':
+        return df.to_json(orient='records')
+    else:
+        raise ValueError("Output formats supported: 'df', 'json' or 'columns'")
+
 
+@query_scope
+def fetch_goods_names(db_path):
+    """
+    Returns the sorted names of every good in goods_prices.
+    """
+    with read_connection(db_path) as connection:
+        rows = connection.execute("SELECT DISTINCT name FROM goods_prices ORDER BY name;").fetchall()
+    return [row[0] for row in rows]
+
+
+@query_scope
+def fetch_income_regions(db_path, data_source_name='FRED'):
+    """
+    Returns the sorted regions an income source has data for.
+    """
+    with read_connection(db_path) as connection:
+        rows = connection.execute(
+            "SELECT DISTINCT region FROM incomes WHERE source_name = ? ORDER BY region;", (data_source_name,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+@query_scope
 def fetch_bea_incomes(db_path):
-    connection = sqlite3.connect(db_path)
     query = """
         SELECT year, average_income_unadjusted, region, source_name
         FROM incomes
         WHERE source_name = 'BEA'
         ORDER BY year;
     """
-    df = pd.read_sql_query(query, connection)
-    connection.close()
+    with read_connection(db_path) as connection:
+        df = pd.read_sql_query(query, connection)
     return df
 
+@query_scope
+def fetch_income_shares(db_path, year_range=(1913, 1998), output_format='df'):
+    """
+    Fetches the Piketty-Saez income share series (tax units, average incomes and the
+    P90-100 through P99.99-100 top income shares) from the income_shares table.
+
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        output_format (str): 'df' returns DataFrame, 'json' returns JSON.
+
+    Returns:
+        DataFrame or JSON string, ordered by year.
+    """
+    start_year, end_year = year_range
+
+    query = """
+        SELECT *
+        FROM income_shares
+        WHERE year BETWEEN ? AND ?
+        ORDER BY year;
+    """
+    with read_connection(db_path) as connection:
+        df = pd.read_sql_query(query, connection, params=(start_year, end_year))
+
+    if output_format == 'df':
+        return df
+    elif output_format == 'json':
+        return df.to_json(orient='records')
+    else:
+        raise ValueError("Output formats supported: 'df' or 'json'")
+
+@query_scope
+def fetch_goods_coverage(db_path, year_range=(1890, 2025), goods_list=None, granularity='year', use_year_averages=True, output_format='df'):
+    """
+    Fetches how many goods_prices entries each good has per year (or per year and month) from
+    the goods_coverage table, for missing data reports.
+
+    Args:
+        db_path (str): Path to SQLite database.
+        year_range (tuple): (start_year, end_year) for filtering.
+        goods_list (list or None): Goods to include; None means all goods.
+        granularity (str): 'year' for name, year, entries rows; 'month' for name, year, month,
+            entries rows of the monthly entries.
+        use_year_averages (bool): With granularity='year', count July 2nd year averages (True)
+            or monthly entries (False).
+        output_format (str): 'df' returns DataFrame, 'json' returns JSON records, 'columns'
+            returns columnar JSON.
+
+    Returns:
+        DataFrame or JSON string, ordered by name, year (and month).
+    """
+    if granularity not in ('year', 'month'):
+        raise ValueError("Granularities supported: 'year' or 'month'")
+    start_year, end_year = year_range
+
+    is_year_avg = 1 if use_year_averages and granularity == 'year' else 0
+    group_columns = "name, year" if granularity == 'year' else "name, year, month"
+    params = [is_year_avg, start_year, end_year]
+    goods_filter = ""
+    if goods_list:
+        goods_filter = f"AND name IN ({', '.join('?' * len(goods_list))})"
+        params.extend(goods_list)
+
+    query = f"""
+        SELECT {group_columns}, SUM(entries) AS entries
+        FROM goods_coverage
+        WHERE is_year_avg = ?
+          AND year BETWEEN ? AND ?
+          {goods_filter}
+        GROUP BY {group_columns}
+        ORDER BY {group_columns};
+    """
+    with read_connection(db_path) as connection:
+        if output_format == 'columns':
+            return columns_json(cursor_columns(connection.execute(query, params)))
+        df = pd.read_sql_query(query, connection, params=params)
+
+    if output_format == 'df':
+        return df
+    elif output_format == 'json':
+        return df.to_json(orient='records')
+    else:
+        raise ValueError("Output formats supported: 'df', 'json' or 'columns'")
+
 if __name__ == '__main__':
 
     db_path = '../../../data/db/sqlite/database.sqlite'
@@ -1,19 +1,50 @@
 import sqlite3
+import hashlib
 import json
+import time
+import numpy as np
 import pandas as pd
+from src.functions.db.instrumentation import connect, query_scope
 
+# The year/month/day/is_year_avg columns are derived from the ISO date (?3) inside SQLite,
+# so callers keep passing the same five values and no per-row Python work is added.
+# Re-inserting an existing (name, date, data_source) only rewrites the row if it changed.
+GOODS_PRICES_INSERT_QUERY = """
+    INSERT INTO goods_prices (name, price, date, good_unit, data_source, year, month, day, is_year_avg)
+    VALUES (?1, ?2, ?3, ?4, ?5,
+            CAST(substr(?3, 1, 4) AS INTEGER),
+            CAST(substr(?3, 6, 2) AS INTEGER),
+            CAST(substr(?3, 9, 2) AS INTEGER),
+            substr(?3, 6, 5) = '07-02')
+    ON CONFLICT(name, date, data_source) DO UPDATE SET
+        price = excluded.price,
+        good_unit = excluded.good_unit
+    WHERE goods_prices.price IS NOT excluded.price
+       OR goods_prices.good_unit IS NOT excluded.good_unit;
+"""
+
+@query_scope
 def insert_good_price_entry(db_path, name, price, date, good_unit, data_source):
+    """
+    Upserts one goods price and refreshes goods_affordability and goods_coverage for its year
+    in the same transaction.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    create_goods_affordability_table(db_path)
+    create_goods_coverage_table(db_path)
+
     connection = cursor = None
     try:
-        connection = sqlite3.connect(db_path, timeout=30)
+        connection = connect(db_path, timeout=30)
         cursor = connection.cursor()
         cursor.execute('PRAGMA journal_mode=WAL;')
 
-        insert_query = """
-            INSERT INTO goods_prices (name, price, date, good_unit, data_source)
-            VALUES (?, ?, ?, ?, ?);
-        """
-        cursor.execute(insert_query, (name, price, date, good_unit, data_source))
+        cursor.execute(GOODS_PRICES_INSERT_QUERY, (name, price, date, good_unit, data_source))
+        if cursor.rowcount:
+            year = int(str(date)[:4])
+            refresh_goods_affordability(cursor, [year])
+            refresh_goods_coverage(cursor, [year])
         connection.commit()
 
         return json.dumps({"result": "Good price entry inserted successfully."})
@@ -26,23 +57,51 @@ def insert_good_price_entry(db_path, name, price, date, good_unit, data_source):
             connection.close()
 
 
-def bulk_insert_good_price_entries(db_path, df):
+def good_price_records(df):
+    """
+    Converts a transformed goods frame into the (name, price, date, good_unit, data_source)
+    parameter rows GOODS_PRICES_INSERT_QUERY expects, plus the sorted years they touch.
+    """
     records = df[['good name', 'price', 'date', 'good unit', 'source']].where(pd.notnull(df), None).values.tolist()
+    affected_years = sorted({int(str(record[2])[:4]) for record in records})
+    return records, affected_years
+
+
+@query_scope
+def bulk_insert_good_price_entries(db_path, df, manifest_entry=None):
+    """
+    Upserts transformed goods rows and refreshes goods_affordability and goods_coverage for the
+    years they touch.
+    If manifest_entry (source_name, content_hash) is given, the source file is recorded in the
+    ingestion manifest in the same transaction, so a failed load is never marked as done.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    create_goods_affordability_table(db_path)
+    create_goods_coverage_table(db_path)
+    create_ingestion_manifest_table(db_path)
+
+    records, affected_years = good_price_records(df)
+
     connection = cursor = None
     try:
-        connection = sqlite3.connect(db_path, timeout=30)
+        connection = connect(db_path, timeout=30)
         cursor = connection.cursor()
         cursor.execute('PRAGMA journal_mode=WAL;')
 
-        insert_query = """
-            INSERT INTO goods_prices (name, price, date, good_unit, data_source)
-            VALUES (?, ?, ?, ?, ?);
-        """
-        cursor.executemany(insert_query, records)
+        cursor.executemany(GOODS_PRICES_INSERT_QUERY, records)
+        changed_rows = cursor.rowcount
+
+        if changed_rows:
+            refresh_goods_affordability(cursor, affected_years)
+            refresh_goods_coverage(cursor, affected_years)
+        if manifest_entry is not None:
+            record_ingestion_manifest(cursor, 'goods_prices', *manifest_entry, len(records))
         connection.commit()
-        inserted_rows = cursor.rowcount
 
-        return json.dumps({"result": f"{inserted_rows} records inserted successfully."})
+        return json.dumps({
+            "result": f"{changed_rows} records inserted/updated successfully out of {len(records)}."
+        })
     except sqlite3.Error as e:
         return json.dumps({"error": str(e)})
     finally:
@@ -52,10 +111,80 @@ def bulk_insert_good_price_entries(db_path, df):
             connection.close()
 
 
+@query_scope
+def write_good_price_batches(db_path, batches, commit_rows=500_000):
+    """
+    Writes an iterable of (records, affected_years, manifest_entry) batches through a single
+    connection, committing once at least commit_rows rows are pending. Each batch's manifest
+    entry, if any, is recorded in the same transaction as its rows. goods_affordability and
+    goods_coverage are refreshed once per commit, for the years whose rows changed since the
+    last one, instead of once per batch. Every commit therefore leaves the derived tables in
+    step with the rows and manifest entries it makes durable, even if a later batch fails.
+
+    Returns a dict with the rows written, rows changed, commits made and seconds spent writing.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    create_goods_affordability_table(db_path)
+    create_goods_coverage_table(db_path)
+    create_ingestion_manifest_table(db_path)
+
+    stats = {'rows': 0, 'changed_rows': 0, 'batches': 0, 'commits': 0, 'write_seconds': 0.0}
+    affected_years = set()
+    pending_rows = 0
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+        cursor.execute('PRAGMA synchronous=NORMAL;')
+
+        for records, years, manifest_entry in batches:
+            start = time.perf_counter()
+            cursor.executemany(GOODS_PRICES_INSERT_QUERY, records)
+            changed_rows = cursor.rowcount
+            if manifest_entry is not None:
+                record_ingestion_manifest(cursor, 'goods_prices', *manifest_entry, len(records))
+            if changed_rows:
+                affected_years.update(years)
+            pending_rows += len(records)
+            if pending_rows >= commit_rows:
+                refresh_goods_affordability(cursor, sorted(affected_years))
+                refresh_goods_coverage(cursor, sorted(affected_years))
+                connection.commit()
+                stats['commits'] += 1
+                pending_rows = 0
+                affected_years.clear()
+            stats['write_seconds'] += time.perf_counter() - start
+            stats['rows'] += len(records)
+            stats['changed_rows'] += changed_rows
+            stats['batches'] += 1
+
+        start = time.perf_counter()
+        refresh_goods_affordability(cursor, sorted(affected_years))
+        refresh_goods_coverage(cursor, sorted(affected_years))
+        connection.commit()
+        stats['commits'] += 1
+        stats['write_seconds'] += time.perf_counter() - start
+
+        return stats
+    except sqlite3.Error as e:
+        if connection:
+            connection.rollback()
+        return {**stats, 'error': str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+@query_scope
 def create_good_prices_table(db_path):
     connection = cursor = None
     try:
-        connection = sqlite3.connect(db_path, timeout=30)
+        connection = connect(db_path, timeout=30)
         cursor = connection.cursor()
         cursor.execute('PRAGMA journal_mode=WAL;')
 
@@ -66,10 +195,15 @@ def create_good_prices_table(db_path):
                 date TEXT NOT NULL,
                 good_unit TEXT,
                 data_source TEXT,
+                year INTEGER,
+                month INTEGER,
+                day INTEGER,
+                is_year_avg INTEGER,
                 PRIMARY KEY(name, date, data_source)
             );
         """
         cursor.execute(create_table_query)
+        migrate_goods_prices_date_columns(cursor)
         connection.commit()
 
         return {"result": "Table 'goods_prices' created successfully."}
@@ -82,10 +216,42 @@ def create_good_prices_table(db_path):
             connection.close()
 
 
+def migrate_goods_prices_date_columns(cursor):
+    """
+    Adds the stored year/month/day/is_year_avg columns to goods_prices databases created before
+    they existed, backfills them from the ISO date, and creates the indexes fetch_goods_prices uses.
+    Safe to run repeatedly; only rows with a missing year are backfilled.
+    """
+    existing_columns = {row[1] for row in cursor.execute('PRAGMA table_info(goods_prices);')}
+    for column in ['year', 'month', 'day', 'is_year_avg']:
+        if column not in existing_columns:
+            cursor.execute(f'ALTER TABLE goods_prices ADD COLUMN {column} INTEGER;')
+
+    cursor.execute("""
+        UPDATE goods_prices
+        SET year = CAST(substr(date, 1, 4) AS INTEGER),
+            month = CAST(substr(date, 6, 2) AS INTEGER),
+            day = CAST(substr(date, 9, 2) AS INTEGER),
+            is_year_avg = substr(date, 6, 5) = '07-02'
+        WHERE year IS NULL;
+    """)
+
+    # Both indexes cover every column fetch_goods_prices selects, so queries never touch the table.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_goods_prices_avg_name_year
+        ON goods_prices (is_year_avg, name, year, date, price, good_unit, data_source);
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_goods_prices_avg_year
+        ON goods_prices (is_year_avg, year, name, date, price, good_unit, data_source);
+    """)
+
+
+@query_scope
 def create_incomes_table(db_path):
     connection = cursor = None
     try:
-        connection = sqlite3.connect(db_path, timeout=30)
+        connection = connect(db_path, timeout=30)
         cursor = connection.cursor()
         cursor.execute('PRAGMA journal_mode=WAL;')
 
@@ -103,6 +269,11 @@ def create_incomes_table(db_path):
             );
         """
         cursor.execute(create_table_query)
+        # Covering index for lookups by source and region, e.g. fetch_incomes_multi.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_incomes_source_region_year
+            ON incomes (source_name, region, year, average_income_unadjusted);
+        """)
         connection.commit()
 
         return {"result": "Table 'incomes' created successfully."}
@@ -115,16 +286,21 @@ def create_incomes_table(db_path):
             connection.close()
 
 
+@query_scope
 def bulk_insert_incomes(db_path, df):
     create_incomes_table(db_path)
+    create_good_prices_table(db_path)
+    create_goods_affordability_table(db_path)
+    create_cpi_table(db_path)
 
     records = df[['year', 'inflation_cpi', 'tax_units',
                   'average_income_unadjusted', 'average_income_adjusted',
                   'source_link', 'source_name', 'region']].where(pd.notnull(df), None).values.tolist()
+    affected_years = sorted({int(record[0]) for record in records})
 
     connection = cursor = None
     try:
-        connection = sqlite3.connect(db_path, timeout=30)
+        connection = connect(db_path, timeout=30)
         cursor = connection.cursor()
         cursor.execute('PRAGMA journal_mode=WAL;')
 
@@ -140,6 +316,570 @@ def bulk_insert_incomes(db_path, df):
                 average_income_adjusted = excluded.average_income_adjusted;
         """
         cursor.executemany(insert_query, records)
+        updated_rows = cursor.rowcount
+
+        refresh_goods_affordability(cursor, affected_years)
+        refresh_cpi(cursor, affected_years)
+        connection.commit()
+
+        return json.dumps({
+            "result": f"{updated_rows} records inserted/updated successfully out of {len(records)}."
+        })
+    except sqlite3.Error as e:
+        return json.dumps({"error": str(e)})
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+@query_scope
+def create_goods_affordability_table(db_path):
+    """
+    Creates the derived goods_affordability table. Each row holds how many units of a good
+    the average income of a region could buy in a given year, for both salary intervals.
+    The table is maintained by the bulk insert functions and should never be written by hand.
+    """
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS goods_affordability (
+                year INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                region TEXT NOT NULL,
+                income_source TEXT NOT NULL,
+                salary_interval TEXT NOT NULL,
+                final_goods_affordable INTEGER,
+                good_unit TEXT,
+                date TEXT,
+                PRIMARY KEY (year, name, region, income_source, salary_interval)
+            ) WITHOUT ROWID;
+        """
+        cursor.execute(create_table_query)
+
+        # Covers fetch_final_goods_affordable: equality on source/interval/region, range on year.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_goods_affordability_lookup
+            ON goods_affordability (income_source, salary_interval, region, year, name,
+                                    final_goods_affordable, good_unit, date);
+        """)
+        connection.commit()
+
+        return {"result": "Table 'goods_affordability' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def refresh_goods_affordability(cursor, years=None):
+    """
+    Recomputes goods_affordability rows for the given years (all years if None) on an open cursor.
+    The caller owns the transaction, so the refresh commits together with the rows that caused it.
+
+    Mirrors the previous pandas implementation: the July 2nd year-average price of each good is
+    joined on year with every income row, and the affordable quantity is truncated to an integer.
+    When a good has several sources for the same year, the latest data_source wins.
+    """
+    year_filter = ""
+    params = []
+    if years is not None:
+        years = list(years)
+        if not years:
+            return 0
+        year_filter = "AND year IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(years))
+        cursor.execute(
+            "DELETE FROM goods_affordability WHERE year IN (SELECT value FROM json_each(?));",
+            params
+        )
+    else:
+        cursor.execute("DELETE FROM goods_affordability;")
+
+    refresh_query = f"""
+        INSERT OR REPLACE INTO goods_affordability
+            (year, name, region, income_source, salary_interval, final_goods_affordable, good_unit, date)
+        SELECT g.year, g.name, i.region, i.source_name, s.salary_interval,
+               CAST((i.average_income_unadjusted / s.periods) / g.price AS INTEGER),
+               g.good_unit, g.date
+        FROM (
+            SELECT name, price, date, good_unit, year,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY name, year
+                       ORDER BY date DESC, data_source DESC
+                   ) AS rank_in_year
+            FROM goods_prices
+            WHERE is_year_avg = 1
+              AND price IS NOT NULL AND price != 0
+              {year_filter}
+        ) AS g
+        JOIN incomes AS i ON i.year = g.year
+        CROSS JOIN (
+            SELECT 'monthly' AS salary_interval, 12.0 AS periods
+            UNION ALL
+            SELECT 'annually', 1.0
+        ) AS s
+        WHERE g.rank_in_year = 1
+          AND i.average_income_unadjusted IS NOT NULL
+          AND i.source_name IS NOT NULL
+          AND i.region IS NOT NULL;
+    """
+    cursor.execute(refresh_query, params)
+    return cursor.rowcount
+
+
+@query_scope
+def rebuild_goods_affordability(db_path):
+    """
+    Rebuilds goods_affordability from scratch. Only needed for databases created before the
+    table existed; regular ingestion keeps it up to date incrementally.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    create_goods_affordability_table(db_path)
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        rebuilt_rows = refresh_goods_affordability(cursor)
+        connection.commit()
+
+        return json.dumps({"result": f"{rebuilt_rows} goods_affordability rows rebuilt successfully."})
+    except sqlite3.Error as e:
+        return json.dumps({"error": str(e)})
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+@query_scope
+def create_goods_coverage_table(db_path):
+    """
+    Creates the derived goods_coverage table: how many goods_prices entries each good has per
+    year and month, kept separately for July 2nd year averages and monthly entries. Coverage
+    reports read it instead of rescanning goods_prices. Maintained by the goods bulk inserts.
+    """
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS goods_coverage (
+                is_year_avg INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                month INTEGER NOT NULL,
+                entries INTEGER NOT NULL,
+                PRIMARY KEY (is_year_avg, year, name, month)
+            ) WITHOUT ROWID;
+        """
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        return {"result": "Table 'goods_coverage' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def refresh_goods_coverage(cursor, years=None):
+    """
+    Recomputes goods_coverage rows for the given years (all years if None) on an open cursor,
+    with one GROUP BY over goods_prices. Month is read from the date so the scan stays on the
+    covering idx_goods_prices_avg_year index. The caller owns the transaction.
+    """
+    year_filter = ""
+    params = []
+    if years is not None:
+        years = list(years)
+        if not years:
+            return 0
+        year_filter = "AND year IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(years))
+        cursor.execute("DELETE FROM goods_coverage WHERE year IN (SELECT value FROM json_each(?));", params)
+    else:
+        cursor.execute("DELETE FROM goods_coverage;")
+
+    cursor.execute(f"""
+        INSERT INTO goods_coverage (is_year_avg, year, name, month, entries)
+        SELECT is_year_avg, year, name, CAST(substr(date, 6, 2) AS INTEGER) AS month, COUNT(*)
+        FROM goods_prices
+        WHERE is_year_avg IN (0, 1)
+          {year_filter}
+        GROUP BY is_year_avg, year, name, month;
+    """, params)
+    return cursor.rowcount
+
+
+@query_scope
+def rebuild_goods_coverage(db_path):
+    """
+    Rebuilds goods_coverage from scratch, for databases loaded before the table existed or
+    written outside the bulk inserts (such as a MySQL migration).
+    """
+    create_good_prices_table(db_path)
+    create_goods_coverage_table(db_path)
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        rebuilt_rows = refresh_goods_coverage(cursor)
+        connection.commit()
+
+        return json.dumps({"result": f"{rebuilt_rows} goods_coverage rows rebuilt successfully."})
+    except sqlite3.Error as e:
+        return json.dumps({"error": str(e)})
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+@query_scope
+def create_cpi_table(db_path):
+    """
+    Creates the derived cpi table: one consumer price level per year, 1.0 in 1998 (the base of
+    the IRS inflation_cpi factors it is derived from). Maintained by bulk_insert_incomes and
+    read by the real-dollar rebasing in fetch.py.
+    """
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS cpi (
+                year INTEGER PRIMARY KEY,
+                cpi REAL NOT NULL,
+                source_name TEXT NOT NULL
+            );
+        """
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        return {"result": "Table 'cpi' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def refresh_cpi(cursor, years=None):
+    """
+    Recomputes cpi rows for the given years (all years if None) on an open cursor. The price
+    level is the inverse of incomes.inflation_cpi, which converts a year's dollars to 1998
+    dollars. If several income sources carry a factor for a year, the first by name wins.
+    """
+    year_filter = ""
+    params = []
+    if years is not None:
+        years = list(years)
+        if not years:
+            return 0
+        year_filter = "AND year IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(years))
+        cursor.execute("DELETE FROM cpi WHERE year IN (SELECT value FROM json_each(?));", params)
+    else:
+        cursor.execute("DELETE FROM cpi;")
+
+    cursor.execute(f"""
+        INSERT INTO cpi (year, cpi, source_name)
+        SELECT year, 1.0 / inflation_cpi, source_name
+        FROM (
+            SELECT year, inflation_cpi, source_name,
+                   ROW_NUMBER() OVER (PARTITION BY year ORDER BY source_name) AS rank_in_year
+            FROM incomes
+            WHERE inflation_cpi > 0
+              AND source_name IS NOT NULL
+              {year_filter}
+        )
+        WHERE rank_in_year = 1;
+    """, params)
+    return cursor.rowcount
+
+
+@query_scope
+def rebuild_cpi(db_path):
+    """
+    Rebuilds the cpi table from incomes, for databases loaded before the table existed.
+    """
+    create_incomes_table(db_path)
+    create_cpi_table(db_path)
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        rebuilt_rows = refresh_cpi(cursor)
+        connection.commit()
+
+        return json.dumps({"result": f"{rebuilt_rows} cpi rows rebuilt successfully."})
+    except sqlite3.Error as e:
+        return json.dumps({"error": str(e)})
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+SERIES_FILL_METHODS = ('linear', 'ffill')
+
+
+@query_scope
+def create_series_filled_table(db_path):
+    """
+    Creates the derived series_filled table: every goods price and income series on a yearly
+    grid over its full span, with gaps filled in and flagged by imputed = 1. Goods series are
+    keyed by name (source ''), income series by source and region. Built by
+    rebuild_series_filled and read by the fetch functions when fill_gaps=True.
+    """
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS series_filled (
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                series TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                value REAL NOT NULL,
+                unit TEXT,
+                date TEXT,
+                data_source TEXT,
+                imputed INTEGER NOT NULL,
+                PRIMARY KEY (kind, source, series, year)
+            ) WITHOUT ROWID;
+        """
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        return {"result": "Table 'series_filled' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def fill_series(wide, method='linear'):
+    """
+    Fills the gaps of every column of a (year x series) frame in one operation, only between a
+    column's first and last observed year. 'linear' interpolates, 'ffill' carries the last
+    observed value forward. Returns the filled frame, reindexed to every year in its range,
+    and a boolean array marking the imputed cells.
+    """
+    if method not in SERIES_FILL_METHODS:
+        raise ValueError(f"Fill methods supported: {', '.join(repr(name) for name in SERIES_FILL_METHODS)}")
+    wide = wide.reindex(range(wide.index.min(), wide.index.max() + 1))
+    if method == 'linear':
+        filled = wide.interpolate(method='linear', axis=0, limit_area='inside')
+    else:
+        filled = wide.ffill().where(wide.bfill().notna())
+    return filled, (wide.isna() & filled.notna()).to_numpy()
+
+
+def series_filled_rows(cursor, method='linear'):
+    """
+    Reads every observed series, fills them together with fill_series and returns the
+    series_filled rows as a DataFrame. Goods use the July 2nd year average, the latest source
+    winning as in goods_affordability; zero prices count as missing for the same reason.
+    """
+    goods = pd.read_sql_query("""
+        SELECT 'good' AS kind, '' AS source, name AS series, year, price AS value,
+               good_unit AS unit, date, data_source
+        FROM (
+            SELECT name, year, price, good_unit, date, data_source,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY name, year
+                       ORDER BY date DESC, data_source DESC
+                   ) AS rank_in_year
+            FROM goods_prices
+            WHERE is_year_avg = 1
+              AND price IS NOT NULL AND price != 0
+        )
+        WHERE rank_in_year = 1;
+    """, cursor.connection)
+    incomes = pd.read_sql_query("""
+        SELECT 'income' AS kind, source_name AS source, region AS series, year,
+               average_income_unadjusted AS value, NULL AS unit, NULL AS date, NULL AS data_source
+        FROM incomes
+        WHERE average_income_unadjusted IS NOT NULL
+          AND source_name IS NOT NULL
+          AND region IS NOT NULL;
+    """, cursor.connection)
+    observed = pd.concat([goods, incomes], ignore_index=True)
+    key = ['kind', 'source', 'series']
+    if observed.empty:
+        return observed.assign(imputed=pd.Series(dtype='int64'))
+
+    # One column per series, so all goods and income series are filled by a single call.
+    wide = observed.pivot(index='year', columns=key, values='value')
+    filled, imputed = fill_series(wide, method)
+
+    values = filled.to_numpy()
+    year_positions, series_positions = np.nonzero(~np.isnan(values))
+    columns = filled.columns[series_positions]
+    rows = pd.DataFrame({
+        'kind': columns.get_level_values('kind'),
+        'source': columns.get_level_values('source'),
+        'series': columns.get_level_values('series'),
+        'year': filled.index.to_numpy()[year_positions],
+        'value': values[year_positions, series_positions],
+        'imputed': imputed[year_positions, series_positions].astype('int64'),
+    })
+    rows = rows.merge(observed.drop(columns='value'), on=key + ['year'], how='left')
+    rows.sort_values(key + ['year'], inplace=True, kind='stable')
+
+    # Imputed goods points keep the unit of the last observation and sit on July 2nd like the
+    # year averages they stand in for; they have no data_source.
+    is_good = rows['kind'] == 'good'
+    rows['unit'] = rows.groupby(key, sort=False)['unit'].ffill()
+    imputed_goods = is_good & (rows['imputed'] == 1)
+    rows.loc[imputed_goods, 'date'] = rows.loc[imputed_goods, 'year'].astype(str) + '-07-02'
+    return rows[key + ['year', 'value', 'unit', 'date', 'data_source', 'imputed']]
+
+
+@query_scope
+def rebuild_series_filled(db_path, method='linear'):
+    """
+    Recomputes series_filled from goods_prices and incomes. This is an offline pass: run it
+    after loading new data, since fill_gaps reads whatever it last stored.
+    """
+    create_good_prices_table(db_path)
+    create_incomes_table(db_path)
+    create_series_filled_table(db_path)
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        rows = series_filled_rows(cursor, method)
+        records = rows.astype(object).where(pd.notnull(rows), None).values.tolist()
+        cursor.execute("DELETE FROM series_filled;")
+        cursor.executemany("""
+            INSERT INTO series_filled (kind, source, series, year, value, unit, date, data_source, imputed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """, records)
+        connection.commit()
+
+        imputed = int(rows['imputed'].sum())
+        return json.dumps({"result": f"{len(records)} series_filled rows rebuilt successfully ({imputed} imputed)."})
+    except sqlite3.Error as e:
+        return json.dumps({"error": str(e)})
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+INCOME_SHARES_COLUMNS = [
+    'year', 'inflation_cpi', 'tax_units', 'average_income_adjusted', 'average_income_unadjusted',
+    'p90_100', 'p90_95', 'p95_99', 'p99_100', 'p99_5_100', 'p99_9_100', 'p99_99_100',
+    'shares_only_p99_100', 'rank_and_share_p99_100', 'source_link'
+]
+
+
+@query_scope
+def create_income_shares_table(db_path):
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        # year is the INTEGER PRIMARY KEY, so year range queries are rowid range scans.
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS income_shares (
+                year INTEGER PRIMARY KEY,
+                inflation_cpi REAL,
+                tax_units INTEGER,
+                average_income_adjusted REAL,
+                average_income_unadjusted REAL,
+                p90_100 REAL,
+                p90_95 REAL,
+                p95_99 REAL,
+                p99_100 REAL,
+                p99_5_100 REAL,
+                p99_9_100 REAL,
+                p99_99_100 REAL,
+                shares_only_p99_100 REAL,
+                rank_and_share_p99_100 REAL,
+                source_link TEXT
+            );
+        """
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        return {"result": "Table 'income_shares' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+@query_scope
+def bulk_insert_income_shares(db_path, df):
+    create_income_shares_table(db_path)
+
+    records = df[INCOME_SHARES_COLUMNS].astype(object).where(pd.notnull(df[INCOME_SHARES_COLUMNS]), None).values.tolist()
+
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        columns = ', '.join(INCOME_SHARES_COLUMNS)
+        placeholders = ', '.join('?' for _ in INCOME_SHARES_COLUMNS)
+        updates = ',\n                '.join(f"{column} = excluded.{column}" for column in INCOME_SHARES_COLUMNS[1:])
+        insert_query = f"""
+            INSERT INTO income_shares ({columns})
+            VALUES ({placeholders})
+            ON CONFLICT(year) DO UPDATE SET
+                {updates};
+        """
+        cursor.executemany(insert_query, records)
         connection.commit()
         updated_rows = cursor.rowcount
 
@@ -153,3 +893,72 @@ def bulk_insert_incomes(db_path, df):
             cursor.close()
         if connection:
             connection.close()
+
+
+@query_scope
+def create_ingestion_manifest_table(db_path):
+    connection = cursor = None
+    try:
+        connection = connect(db_path, timeout=30)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL;')
+
+        create_table_query = """
+            CREATE TABLE IF NOT EXISTS ingestion_manifest (
+                target_table TEXT NOT NULL,
+                source_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                row_count INTEGER,
+                ingested_at TEXT NOT NULL,
+                PRIMARY KEY (target_table, source_name)
+            );
+        """
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        return {"result": "Table 'ingestion_manifest' created successfully."}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+def source_file_hash(path, chunk_size=1024 * 1024):
+    """
+    Returns the SHA-256 hex digest of a source file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@query_scope
+def fetch_ingestion_manifest(db_path, target_table):
+    """
+    Returns {source_name: content_hash} for every source file already loaded into target_table.
+    """
+    create_ingestion_manifest_table(db_path)
+
+    connection = connect(db_path, timeout=30)
+    rows = connection.execute(
+        "SELECT source_name, content_hash FROM ingestion_manifest WHERE target_table = ?;",
+        (target_table,)
+    ).fetchall()
+    connection.close()
+    return dict(rows)
+
+
+def record_ingestion_manifest(cursor, target_table, source_name, content_hash, row_count):
+    cursor.execute("""
+        INSERT INTO ingestion_manifest (target_table, source_name, content_hash, row_count, ingested_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(target_table, source_name) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            row_count = excluded.row_count,
+            ingested_at = excluded.ingested_at;
+    """, (target_table, source_name, content_hash, row_count))
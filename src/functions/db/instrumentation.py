@@ -0,0 +1,225 @@
+import collections
+import contextvars
+import functools
+import logging
+import os
+import sqlite3
+import time
+
+from src.functions import metrics
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this get their EXPLAIN QUERY PLAN captured; unset or 0 turns it off.
+SLOW_QUERY_SECONDS = float(os.environ.get('VALUE_VOYAGE_SLOW_QUERY_MS', '0')) / 1000
+SLOW_QUERY_HISTORY = 50
+# Statements whose rows are counted as they are fetched rather than from rowcount.
+READ_STATEMENTS = {'SELECT', 'WITH', 'PRAGMA', 'EXPLAIN'}
+
+slow_queries = collections.deque(maxlen=SLOW_QUERY_HISTORY)
+_operation = contextvars.ContextVar('sqlite_operation', default='other')
+
+query_seconds = metrics.histogram(
+    'value_voyage_sqlite_query_seconds',
+    'Time spent executing and fetching one SQLite statement.',
+    ('operation', 'statement')
+)
+query_rows = metrics.counter(
+    'value_voyage_sqlite_rows_total',
+    'Rows returned by reads or changed by writes.',
+    ('operation', 'statement')
+)
+slow_query_count = metrics.counter(
+    'value_voyage_sqlite_slow_queries_total',
+    'Statements slower than VALUE_VOYAGE_SLOW_QUERY_MS.',
+    ('operation',)
+)
+connections_opened = metrics.counter('value_voyage_sqlite_connections_opened_total', 'SQLite connections opened.')
+connections_closed = metrics.counter('value_voyage_sqlite_connections_closed_total', 'SQLite connections closed.')
+function_seconds = metrics.histogram(
+    'value_voyage_db_function_seconds',
+    'Wall time of the fetch and insert functions, SQLite and pandas work included.',
+    ('function',)
+)
+
+
+def _statement_kind(sql):
+    words = sql.lstrip().split(None, 1)
+    return words[0].upper() if words else ''
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    A cursor that times each statement from execute until its rows are exhausted (or the
+    cursor is closed or reused), since SQLite does most of a query's work while fetching.
+    """
+
+    _pending = None
+
+    def _start(self, sql, parameters, started):
+        self._pending = [sql, parameters, _operation.get(), time.perf_counter() - started, 0]
+
+    def _add(self, started, rows):
+        if self._pending is not None:
+            self._pending[3] += time.perf_counter() - started
+            self._pending[4] += rows
+
+    def _record(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, parameters, operation, elapsed, rows = pending
+        statement = _statement_kind(sql)
+        if statement not in READ_STATEMENTS:
+            rows = max(self.rowcount, 0)
+        query_seconds.observe(elapsed, operation=operation, statement=statement)
+        query_rows.inc(rows, operation=operation, statement=statement)
+        if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+            self._capture_slow_query(sql, parameters, operation, elapsed, rows, statement)
+
+    def _capture_slow_query(self, sql, parameters, operation, elapsed, rows, statement):
+        slow_query_count.inc(operation=operation)
+        plan = None
+        if statement in ('SELECT', 'WITH') and parameters is not None:
+            try:
+                plan = [row[-1] for row in sqlite3.Cursor(self.connection).execute(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+            except sqlite3.Error:
+                pass
+        entry = {
+            'operation': operation,
+            'seconds': elapsed,
+            'rows': rows,
+            'sql': ' '.join(sql.split()),
+            'plan': plan,
+            'at': time.time(),
+        }
+        slow_queries.append(entry)
+        logger.warning("Slow query in %s (%.1f ms, %d rows): %s | plan: %s",
+                       operation, elapsed * 1000, rows, entry['sql'][:200], plan)
+
+    def execute(self, sql, parameters=()):
+        self._record()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._record()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._start(sql, None, started)
+            self._record()
+
+    def executescript(self, sql_script):
+        self._record()
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._start('SCRIPT', None, started)
+            self._record()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._add(started, row is not None)
+        if row is None:
+            self._record()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._add(started, len(rows))
+        if len(rows) < size:
+            self._record()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._add(started, len(rows))
+        self._record()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(started, 0)
+            self._record()
+            raise
+        self._add(started, 1)
+        return row
+
+    def close(self):
+        self._record()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    A connection that counts opens and closes and hands out InstrumentedCursors, including
+    for the Connection.execute shortcuts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counted_close = False
+        connections_opened.inc()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        if not self._counted_close:
+            self._counted_close = True
+            connections_closed.inc()
+        super().close()
+
+
+def connect(database, **kwargs):
+    """
+    sqlite3.connect, returning an InstrumentedConnection while metrics are enabled.
+    """
+    if metrics.ENABLED:
+        kwargs.setdefault('factory', InstrumentedConnection)
+    return sqlite3.connect(database, **kwargs)
+
+
+def query_scope(func):
+    """
+    Decorator that labels the SQLite statements run inside func with its name and records
+    its wall time. Returns func unchanged when metrics are disabled.
+    """
+    if not metrics.ENABLED:
+        return func
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _operation.set(name)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            function_seconds.observe(time.perf_counter() - started, function=name)
+            _operation.reset(token)
+
+    return wrapper
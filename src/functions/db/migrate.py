@@ -1,35 +1,38 @@
+import argparse
+import json
 import os
 import re
 import subprocess
 import sqlite3
+import time
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-DB_NAME = os.getenv('DB_NAME')
-
-dump_file = '../../../data/db/mysql/mysql_dump.sql'
-
-# Step 1: Dump the MySQL database to a file using mysqldump.
-cmd = [
-    'mysqldump',
-    f'--host={DB_HOST}',
-    f'--port={DB_PORT}',
-    f'--user={DB_USER}',
-    f'--password={DB_PASSWORD}',
-    '--skip-extended-insert',  # Produces one INSERT per statement for easier processing.
-    DB_NAME
-]
-
-print("Dumping MySQL database...")
-with open(dump_file, 'w') as f:
-    subprocess.run(cmd, stdout=f, check=True)
-print("Dump completed.")
+from src.functions.db.insert import create_good_prices_table, create_incomes_table, rebuild_cpi, \
+    rebuild_goods_affordability, rebuild_goods_coverage, rebuild_series_filled
+
+
+def dump_mysql_database(dump_file):
+    """
+    Dumps the MySQL database configured in .env to dump_file using mysqldump.
+    Extended INSERTs are kept: migrate_dump batches them, and they make the dump much smaller.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    cmd = [
+        'mysqldump',
+        f"--host={os.getenv('DB_HOST')}",
+        f"--port={os.getenv('DB_PORT')}",
+        f"--user={os.getenv('DB_USER')}",
+        f"--password={os.getenv('DB_PASSWORD')}",
+        os.getenv('DB_NAME')
+    ]
+
+    print("Dumping MySQL database...")
+    with open(dump_file, 'w') as f:
+        subprocess.run(cmd, stdout=f, check=True)
+    print("Dump completed.")
+
 
 def convert_mysql_to_sqlite(sql):
     """
@@ -38,6 +41,7 @@ def convert_mysql_to_sqlite(sql):
       - Removing MySQL-specific options (AUTO_INCREMENT, ENGINE, etc.)
       - Replacing backticks with double quotes
       - Converting common MySQL data types to SQLite types
+      - Dropping secondary KEY definitions and naming from UNIQUE KEY constraints
     Adjust this function further as needed for your schema.
     """
     # Remove MySQL-specific options
@@ -45,6 +49,10 @@ def convert_mysql_to_sqlite(sql):
     sql = re.sub(r'\s+ENGINE=\w+', '', sql, flags=re.IGNORECASE)
     sql = re.sub(r'\s+DEFAULT CHARSET=\w+', '', sql, flags=re.IGNORECASE)
     sql = re.sub(r'\s+COLLATE=\w+', '', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\s+(CHARACTER SET|COLLATE)\s+\w+', '', sql, flags=re.IGNORECASE)
+    # SQLite has no inline secondary indexes; UNIQUE KEY name (...) becomes UNIQUE (...)
+    sql = re.sub(r',\s*(?:FULLTEXT\s+|SPATIAL\s+)?KEY\s+`[^`]*`\s*\([^)]*\)', '', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'UNIQUE\s+KEY\s+`[^`]*`\s*\(', 'UNIQUE (', sql, flags=re.IGNORECASE)
     # Replace backticks with double quotes
     sql = sql.replace('`', '"')
     # Adjust data types
@@ -60,43 +68,293 @@ def convert_mysql_to_sqlite(sql):
     sql = sql.replace("timestamp", "TEXT")
     return sql
 
-# Step 2: Load and process the dump file.
-with open(dump_file, 'r') as f:
-    dump_sql = f.read()
-
-# Split the dump into individual SQL statements using ';' as the delimiter.
-# Note: This simplistic splitting may need refinement if your dump contains semicolons within statements.
-statements = dump_sql.split(';')
-sqlite_statements = []
-
-for stmt in statements:
-    stmt = stmt.strip()
-    if not stmt:
-        continue
-    # Convert CREATE TABLE statements
-    if stmt.upper().startswith("CREATE TABLE"):
-        converted = convert_mysql_to_sqlite(stmt)
-        sqlite_statements.append(converted)
-    # Process INSERT statements (assuming values are compatible)
-    elif stmt.upper().startswith("INSERT INTO"):
-        sqlite_statements.append(stmt)
-    # Other statements (like SET, DROP, etc.) can be skipped or handled as needed.
-
-# Connect to (or create) the SQLite database.
-sqlite_conn = sqlite3.connect('../../../data/db/sqlite/database.sqlite')
-cursor = sqlite_conn.cursor()
-
-print("Processing SQL statements and creating SQLite database...")
-for stmt in sqlite_statements:
-    try:
-        cursor.execute(stmt)
-    except sqlite3.OperationalError as e:
-        print("Error executing statement:")
-        print(stmt)
-        print(e)
-
-sqlite_conn.commit()
-cursor.close()
-sqlite_conn.close()
-
-print("Dump loaded and processed successfully into 'database.sqlite'.")
+
+OUTSIDE_QUOTES = re.compile(r"['\"`;#]|--(?=\s)|/\*")
+INSIDE_QUOTES = {quote: re.compile(r"[\\" + quote + r"]") for quote in "'\"`"}
+
+
+def iter_sql_statements(lines):
+    """
+    Yields complete SQL statements from an iterable of dump lines without reading the whole
+    dump into memory. Semicolons inside quoted strings or identifiers do not end a statement,
+    backslash and doubled-quote escapes are honoured, and --, # and /* */ comments are dropped
+    (which also drops mysqldump's /*!...*/ version-conditional SET statements).
+    """
+    parts = []
+    quote = None
+    in_block_comment = False
+
+    for line in lines:
+        i = 0
+        n = len(line)
+        while i < n:
+            if in_block_comment:
+                end = line.find('*/', i)
+                if end == -1:
+                    break
+                in_block_comment = False
+                i = end + 2
+                continue
+
+            if quote:
+                j = i
+                while True:
+                    match = INSIDE_QUOTES[quote].search(line, j)
+                    if match is None:
+                        parts.append(line[i:])
+                        i = n
+                        break
+                    if match.group() == '\\':
+                        j = match.end() + 1
+                        continue
+                    if line.startswith(quote, match.end()):
+                        # A doubled quote is an escaped quote, not the end of the string.
+                        j = match.end() + 1
+                        continue
+                    parts.append(line[i:match.end()])
+                    i = match.end()
+                    quote = None
+                    break
+                continue
+
+            match = OUTSIDE_QUOTES.search(line, i)
+            if match is None:
+                parts.append(line[i:])
+                break
+
+            token = match.group()
+            if token in ("'", '"', '`'):
+                parts.append(line[i:match.end()])
+                quote = token
+                i = match.end()
+            elif token == ';':
+                parts.append(line[i:match.start()])
+                statement = ''.join(parts).strip()
+                if statement:
+                    yield statement
+                parts = []
+                i = match.end()
+            elif token == '/*':
+                parts.append(line[i:match.start()])
+                in_block_comment = True
+                i = match.end()
+            else:
+                # -- or # comment: skip the rest of the line but keep the line break.
+                parts.append(line[i:match.start()])
+                parts.append('\n')
+                break
+
+    statement = ''.join(parts).strip()
+    if statement:
+        yield statement
+
+
+INSERT_HEADER = re.compile(
+    r'INSERT\s+(?:IGNORE\s+)?INTO\s+[`"]?(?P<table>[^`"\s(]+)[`"]?\s*(?P<columns>\([^)]*\))?\s*VALUES\s*',
+    re.IGNORECASE
+)
+VALUE_TOKEN = re.compile(r"""
+    \s*(?:
+        '(?P<string>(?:[^'\\]+|\\.|'')*)'
+      | (?P<null>NULL)\b
+      | (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<open>\()
+      | (?P<close>\))
+      | (?P<comma>,)
+    )
+""", re.VERBOSE | re.DOTALL | re.IGNORECASE)
+STRING_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+STRING_ESCAPE = re.compile(r"\\(.)|''", re.DOTALL)
+
+
+def _unescape_mysql_string(value):
+    return STRING_ESCAPE.sub(
+        lambda match: "'" if match.group(1) is None else STRING_ESCAPES.get(match.group(1), match.group(1)),
+        value
+    )
+
+
+def parse_insert_statement(statement):
+    """
+    Parses a (possibly extended) MySQL INSERT into (table, columns, rows), where rows is a list
+    of value tuples ready for executemany. Returns None for anything it does not understand,
+    such as hex or _binary literals, so the caller can fall back to executing the statement.
+    """
+    header = INSERT_HEADER.match(statement)
+    if header is None:
+        return None
+
+    rows = []
+    row = None
+    position = header.end()
+    end = len(statement)
+    while position < end:
+        match = VALUE_TOKEN.match(statement, position)
+        if match is None:
+            if statement[position:].strip() == '':
+                break
+            return None
+        position = match.end()
+        kind = match.lastgroup
+
+        if kind == 'open' and row is None:
+            row = []
+        elif kind == 'close' and row is not None:
+            rows.append(tuple(row))
+            row = None
+        elif kind == 'comma':
+            continue
+        elif row is None:
+            return None
+        elif kind == 'string':
+            row.append(_unescape_mysql_string(match.group('string')))
+        elif kind == 'null':
+            row.append(None)
+        elif kind == 'number':
+            number = match.group('number')
+            row.append(float(number) if any(c in number for c in '.eE') else int(number))
+        else:
+            return None
+
+    if row is not None or not rows:
+        return None
+    return header.group('table'), header.group('columns'), rows
+
+
+def migrate_dump(dump_file, sqlite_path, commit_rows=200_000, progress_seconds=5.0):
+    """
+    Streams a mysqldump file into an SQLite database.
+
+    CREATE TABLE statements are converted with convert_mysql_to_sqlite, and extended INSERTs
+    are parsed into rows and written with executemany. The load runs in large transactions with
+    journal_mode=MEMORY and synchronous=OFF, and the database is switched back to WAL afterwards.
+    Each statement runs in its own savepoint, so a statement that fails is undone completely
+    (none of its rows are kept) and the load goes on with the next one.
+    Memory use is bounded by the longest statement and commit_rows, not by the dump size.
+
+    The loaded database is then brought up to the schema the app reads with
+    finish_migrated_database.
+
+    Returns a dict with statement, row and error counts, and the result of each derived table.
+    """
+    stats = {'statements': 0, 'tables': 0, 'rows': 0, 'fallback_statements': 0, 'errors': 0}
+    total_bytes = os.path.getsize(dump_file)
+    read_bytes = 0
+
+    connection = sqlite3.connect(sqlite_path, isolation_level=None)
+    cursor = connection.cursor()
+    # A rollback journal (kept in memory) so a failed statement can be rolled back.
+    cursor.execute('PRAGMA journal_mode=MEMORY;')
+    cursor.execute('PRAGMA synchronous=OFF;')
+    cursor.execute('PRAGMA cache_size=-262144;')
+    cursor.execute('BEGIN;')
+
+    start = last_report = time.perf_counter()
+    pending_rows = 0
+
+    def counted_lines(f):
+        nonlocal read_bytes
+        for line in f:
+            read_bytes += len(line)
+            yield line
+
+    with open(dump_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        for statement in iter_sql_statements(counted_lines(f)):
+            stats['statements'] += 1
+            keyword = statement[:12].upper()
+            cursor.execute('SAVEPOINT dump_statement;')
+            try:
+                if keyword.startswith('CREATE TABLE'):
+                    cursor.execute(convert_mysql_to_sqlite(statement))
+                    stats['tables'] += 1
+                elif keyword.startswith('INSERT'):
+                    parsed = parse_insert_statement(statement)
+                    if parsed is None:
+                        cursor.execute(statement.replace('`', '"'))
+                        stats['fallback_statements'] += 1
+                        pending_rows += 1
+                    else:
+                        table, columns, rows = parsed
+                        placeholders = ','.join('?' for _ in rows[0])
+                        cursor.executemany(
+                            f'INSERT INTO "{table}" {(columns or "").replace("`", chr(34))} VALUES ({placeholders})',
+                            rows
+                        )
+                        stats['rows'] += len(rows)
+                        pending_rows += len(rows)
+                # Other statements (like SET, DROP, LOCK TABLES, etc.) are skipped.
+                cursor.execute('RELEASE dump_statement;')
+            except sqlite3.Error as e:
+                cursor.execute('ROLLBACK TO dump_statement;')
+                cursor.execute('RELEASE dump_statement;')
+                stats['errors'] += 1
+                print("Error executing statement:")
+                print(statement[:500])
+                print(e)
+
+            if pending_rows >= commit_rows:
+                cursor.execute('COMMIT;')
+                cursor.execute('BEGIN;')
+                pending_rows = 0
+
+            now = time.perf_counter()
+            if now - last_report >= progress_seconds:
+                last_report = now
+                print(f"{read_bytes / max(total_bytes, 1):6.1%} of dump read, "
+                      f"{stats['rows']:,} rows loaded ({stats['rows'] / (now - start):,.0f} rows/s)")
+
+    cursor.execute('COMMIT;')
+    cursor.execute('PRAGMA journal_mode=WAL;')
+    cursor.execute('PRAGMA synchronous=NORMAL;')
+    cursor.close()
+    connection.close()
+
+    stats['seconds'] = time.perf_counter() - start
+    print(f"Loaded {stats['rows']:,} rows into {stats['tables']} tables in {stats['seconds']:.1f}s "
+          f"({stats['errors']} errors).")
+
+    stats['derived'] = finish_migrated_database(sqlite_path)
+    return stats
+
+
+def finish_migrated_database(sqlite_path):
+    """
+    Brings a database loaded from a MySQL dump up to the schema the app reads: the stored
+    year/month/day/is_year_avg columns and covering indexes of goods_prices, the incomes
+    index, and the derived goods_affordability, goods_coverage, cpi and series_filled tables,
+    rebuilt from the loaded rows.
+
+    Returns each step's result message; failures are printed as well.
+    """
+    steps = {
+        'goods_prices': create_good_prices_table,
+        'incomes': create_incomes_table,
+        'goods_affordability': rebuild_goods_affordability,
+        'goods_coverage': rebuild_goods_coverage,
+        'cpi': rebuild_cpi,
+        'series_filled': rebuild_series_filled,
+    }
+    results = {}
+    for name, step in steps.items():
+        result = step(sqlite_path)
+        results[name] = json.loads(result) if isinstance(result, str) else result
+        if 'error' in results[name]:
+            print(f"Could not build {name}: {results[name]['error']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the MySQL database into SQLite.")
+    parser.add_argument('--dump-file', default='../../../data/db/mysql/mysql_dump.sql')
+    parser.add_argument('--sqlite-path', default='../../../data/db/sqlite/database.sqlite')
+    parser.add_argument('--skip-dump', action='store_true', help="Load an existing dump file; no MySQL server needed.")
+    args = parser.parse_args()
+
+    # Step 1: Dump the MySQL database to a file using mysqldump.
+    if not args.skip_dump:
+        dump_mysql_database(args.dump_file)
+
+    # Step 2: Stream the dump into SQLite.
+    print("Processing SQL statements and creating SQLite database...")
+    migrate_dump(args.dump_file, args.sqlite_path)
+    print("Dump loaded and processed successfully into 'database.sqlite'.")
@@ -0,0 +1,194 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src.functions.db.instrumentation import connect
+
+# Pragmas applied to every pooled read connection.
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CHECKOUT_TIMEOUT = 30
+
+
+class ReadConnectionPool:
+    """
+    A thread-safe pool of read-only SQLite connections to a single database file.
+
+    Connections are opened lazily with a mode=ro URI, up to max_size at once. A thread that
+    finds the pool exhausted waits for a connection to be checked back in. The pool remembers
+    the pid it was created in so a forked worker never reuses its parent's connections.
+    """
+
+    def __init__(self, db_path, max_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        self.db_path = os.path.abspath(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._open_count = 0
+        self._metrics = {'checkouts': 0, 'waits': 0, 'opened': 0, 'closed': 0}
+
+    def _open(self):
+        uri = f"file:{self.db_path}?mode=ro"
+        connection = connect(uri, uri=True, check_same_thread=False, timeout=self.timeout)
+        connection.execute(f'PRAGMA mmap_size={MMAP_SIZE};')
+        connection.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KIB};')
+        connection.execute('PRAGMA query_only=ON;')
+        return connection
+
+    def _reset_after_fork(self):
+        # Connections inherited from the parent process must not be used or closed here.
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._open_count = 0
+
+    def checkout(self):
+        if os.getpid() != self._pid:
+            self._reset_after_fork()
+
+        with self._lock:
+            self._metrics['checkouts'] += 1
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._open_count < self.max_size:
+                self._open_count += 1
+                self._metrics['opened'] += 1
+                open_new = True
+            else:
+                self._metrics['waits'] += 1
+                open_new = False
+
+        if open_new:
+            try:
+                return self._open()
+            except sqlite3.Error:
+                with self._lock:
+                    self._open_count -= 1
+                    self._metrics['opened'] -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a read connection to {self.db_path}"
+            )
+
+    def checkin(self, connection):
+        if os.getpid() != self._pid:
+            return
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            self._discard(connection)
+            return
+        self._idle.put(connection)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._open_count -= 1
+            self._metrics['closed'] += 1
+
+    @contextmanager
+    def connection(self):
+        connection = self.checkout()
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    def close(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                **self._metrics,
+                'open': self._open_count,
+                'idle': self._idle.qsize(),
+                'max_size': self.max_size,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path):
+    """
+    Returns the process-wide pool for db_path, creating it on first use.
+    """
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ReadConnectionPool(key)
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def read_connection(db_path):
+    """
+    Checks a read-only connection out of the shared pool and returns it when the block exits.
+
+    Usage:
+        with read_connection(db_path) as connection:
+            df = pd.read_sql_query(query, connection)
+    """
+    with get_pool(db_path).connection() as connection:
+        yield connection
+
+
+def warm_pool(db_path, count=DEFAULT_POOL_SIZE):
+    """
+    Opens up to count connections of db_path's pool and parks them idle, so the first
+    concurrent requests don't each pay for opening a connection and reading the schema.
+    """
+    pool = get_pool(db_path)
+    connections = []
+    try:
+        for _ in range(min(count, pool.max_size)):
+            connection = pool.checkout()
+            connections.append(connection)
+            connection.execute("SELECT count(*) FROM sqlite_master;").fetchone()
+    finally:
+        for connection in connections:
+            pool.checkin(connection)
+    return len(connections)
+
+
+def pool_metrics(db_path=None):
+    """
+    Returns checkout/wait/open counters for one pool, or for every pool keyed by path.
+    """
+    if db_path is not None:
+        return get_pool(db_path).metrics()
+    with _pools_lock:
+        pools = dict(_pools)
+    return {path: pool.metrics() for path, pool in pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
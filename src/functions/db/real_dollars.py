@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+
+from src.functions.db.columnar import column_values
+from src.functions.db.pool import read_connection
+from src.functions.db.version import database_version
+
+
+class Deflators:
+    """
+    The cpi table on a dense year grid, with the deflator vector of every base year
+    precomputed as the rows of one base years x years matrix: row b holds cpi[b] / cpi[y],
+    the factor that turns year-y dollars into base-year dollars. Years without a CPI are NaN.
+    """
+
+    def __init__(self, db_path):
+        self.version = database_version(db_path)
+
+        with read_connection(db_path) as connection:
+            rows = connection.execute("SELECT year, cpi FROM cpi ORDER BY year;").fetchall()
+
+        years = np.array([row[0] for row in rows], dtype=np.int64)
+        self.first_year = int(years[0]) if len(years) else 0
+        year_count = int(years[-1]) - self.first_year + 1 if len(years) else 0
+        levels = np.full(year_count, np.nan)
+        levels[years - self.first_year] = [row[1] for row in rows]
+
+        self.levels = levels
+        self.matrix = levels[:, None] / levels[None, :]
+        self.matrix.flags.writeable = False
+
+    def vector(self, base_year):
+        """
+        Returns the deflator vector for base_year, indexed by year - first_year.
+        """
+        index = base_year - self.first_year
+        if not 0 <= index < len(self.levels) or np.isnan(self.levels[index]):
+            raise ValueError(f"No CPI for base year {base_year}")
+        return self.matrix[index]
+
+    def rebase(self, years, values, base_year):
+        """
+        Converts nominal values to base_year dollars with one gather and one multiply.
+        Values from years without a CPI become NaN.
+        """
+        vector = self.vector(base_year)
+        index = np.asarray(years, dtype=np.int64) - self.first_year
+        inside = (index >= 0) & (index < len(vector))
+        factors = np.full(index.shape, np.nan)
+        factors[inside] = vector[index[inside]]
+        return np.asarray(values, dtype=float) * factors
+
+
+_deflators = {}
+_deflators_lock = threading.Lock()
+
+
+def get_deflators(db_path):
+    """
+    Returns the process-wide deflators of db_path, reloading them if the database has changed.
+    """
+    version = database_version(db_path)
+    deflators = _deflators.get(db_path)
+    if deflators is not None and deflators.version == version:
+        return deflators
+
+    with _deflators_lock:
+        deflators = _deflators.get(db_path)
+        if deflators is None or deflators.version != database_version(db_path):
+            deflators = Deflators(db_path)
+            _deflators[db_path] = deflators
+        return deflators
+
+
+def rebase_frame(db_path, df, value_column, base_year):
+    """
+    Replaces df[value_column] with its value in base_year dollars, using df['year'].
+    """
+    deflators = get_deflators(db_path)
+    deflators.vector(base_year)
+    if len(df):
+        df[value_column] = deflators.rebase(df['year'], df[value_column], base_year)
+    return df
+
+
+def rebase_columns(db_path, columns, value_column, base_year):
+    """
+    rebase_frame for {field: list} columns, as cursor_columns returns them.
+    """
+    rebased = get_deflators(db_path).rebase(columns['year'], columns[value_column], base_year)
+    columns[value_column] = column_values(rebased)
+    return columns
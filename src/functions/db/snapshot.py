@@ -0,0 +1,232 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.functions.db.pool import read_connection
+from src.functions.db.version import database_version
+
+# One row per (is_year_avg, name, year): the latest date, ties broken by data_source,
+# which is exactly the row fetch_goods_prices keeps after de-duplicating (rank_in_year = 1).
+# Affordability only ranks rows with a usable price, as refresh_goods_affordability does, so
+# the latest priced row of each year is kept as well (priced and priced_rank = 1).
+GOODS_SNAPSHOT_QUERY = """
+    SELECT name, price, date, good_unit, data_source, year, is_year_avg, rank_in_year, priced, priced_rank
+    FROM (
+        SELECT name, price, date, good_unit, data_source, year, is_year_avg,
+               ROW_NUMBER() OVER (
+                   PARTITION BY is_year_avg, name, year
+                   ORDER BY date DESC, data_source DESC
+               ) AS rank_in_year,
+               (price IS NOT NULL AND price != 0) AS priced,
+               ROW_NUMBER() OVER (
+                   PARTITION BY is_year_avg, name, year, (price IS NOT NULL AND price != 0)
+                   ORDER BY date DESC, data_source DESC
+               ) AS priced_rank
+        FROM goods_prices
+    )
+    WHERE rank_in_year = 1 OR (priced AND priced_rank = 1);
+"""
+
+INCOMES_SNAPSHOT_QUERY = """
+    SELECT year, average_income_unadjusted, region, source_name
+    FROM incomes
+    WHERE source_name IS NOT NULL AND region IS NOT NULL;
+"""
+
+SALARY_PERIODS = {'monthly': 12.0, 'annually': 1.0}
+
+
+class GoodsMatrix:
+    """
+    Dense goods x years arrays for either the July 2nd year averages or the monthly entries.
+    """
+
+    def __init__(self, rows, goods, good_index, first_year, year_count):
+        shape = (len(goods), year_count)
+        self.present = np.zeros(shape, dtype=bool)
+        self.price = np.full(shape, np.nan)
+        self.date = np.empty(shape, dtype=object)
+        self.good_unit = np.empty(shape, dtype=object)
+        self.data_source = np.empty(shape, dtype=object)
+
+        g = rows['name'].map(good_index).to_numpy()
+        y = rows['year'].to_numpy() - first_year
+        self.present[g, y] = True
+        self.price[g, y] = rows['price'].to_numpy(dtype=float, na_value=np.nan)
+        self.date[g, y] = rows['date'].to_numpy()
+        self.good_unit[g, y] = rows['good_unit'].to_numpy()
+        self.data_source[g, y] = rows['data_source'].to_numpy()
+
+
+class Snapshot:
+    """
+    An in-memory, year-indexed copy of goods_prices and incomes.
+
+    Goods are held as goods x years arrays and incomes as sources x regions x years arrays,
+    so range and filter queries are array slices instead of SQL scans. Results are shaped
+    like the rows the SQLite queries in fetch.py return, in the same order.
+    """
+
+    def __init__(self, db_path):
+        self.version = database_version(db_path)
+
+        with read_connection(db_path) as connection:
+            goods_rows = pd.read_sql_query(GOODS_SNAPSHOT_QUERY, connection)
+            income_rows = pd.read_sql_query(INCOMES_SNAPSHOT_QUERY, connection)
+
+        years = pd.concat([goods_rows['year'], income_rows['year']]).dropna()
+        self.first_year = int(years.min()) if len(years) else 0
+        year_count = int(years.max()) - self.first_year + 1 if len(years) else 0
+
+        self.goods = sorted(goods_rows['name'].unique())
+        self.good_index = {name: i for i, name in enumerate(self.goods)}
+        latest = goods_rows[goods_rows['rank_in_year'] == 1]
+        self.averages = GoodsMatrix(latest[latest['is_year_avg'] == 1], self.goods,
+                                    self.good_index, self.first_year, year_count)
+        self.monthly = GoodsMatrix(latest[latest['is_year_avg'] != 1], self.goods,
+                                   self.good_index, self.first_year, year_count)
+        # The year averages affordability is computed from: the latest row with a usable price.
+        priced = goods_rows[(goods_rows['is_year_avg'] == 1) & (goods_rows['priced'] == 1)
+                            & (goods_rows['priced_rank'] == 1)]
+        self.priced_averages = GoodsMatrix(priced, self.goods, self.good_index, self.first_year, year_count)
+
+        self.sources = sorted(income_rows['source_name'].unique())
+        self.source_index = {source: i for i, source in enumerate(self.sources)}
+        self.regions = sorted(income_rows['region'].unique())
+        self.region_index = {region: i for i, region in enumerate(self.regions)}
+
+        shape = (len(self.sources), len(self.regions), year_count)
+        self.income_present = np.zeros(shape, dtype=bool)
+        self.income = np.full(shape, np.nan)
+        s = income_rows['source_name'].map(self.source_index).to_numpy()
+        r = income_rows['region'].map(self.region_index).to_numpy()
+        y = income_rows['year'].to_numpy() - self.first_year
+        self.income_present[s, r, y] = True
+        self.income[s, r, y] = income_rows['average_income_unadjusted'].to_numpy(dtype=float, na_value=np.nan)
+
+        self.year_count = year_count
+
+    def _year_slice(self, year_range):
+        start_year, end_year = year_range
+        start = min(max(start_year - self.first_year, 0), self.year_count)
+        stop = min(max(end_year - self.first_year + 1, start), self.year_count)
+        return start, stop
+
+    def _good_rows(self, goods_list):
+        if not goods_list:
+            return np.arange(len(self.goods))
+        # IN (...) semantics: unknown names match nothing and duplicates match once.
+        return np.array(sorted({self.good_index[name] for name in goods_list if name in self.good_index}), dtype=int)
+
+    def _region_rows(self, regions):
+        return np.array(sorted({self.region_index[region] for region in regions if region in self.region_index}), dtype=int)
+
+    def goods_prices(self, year_range, goods_list, use_year_averages, priced=False):
+        """
+        Returns the rows fetch_goods_prices would read, ordered by name, then year descending.
+        With priced, the year averages affordability is computed from instead: per good and
+        year the latest row with a non-null, non-zero price.
+        """
+        if priced and not use_year_averages:
+            raise ValueError("priced covers the July 2nd year averages only")
+        matrix = self.priced_averages if priced else self.averages if use_year_averages else self.monthly
+        start, stop = self._year_slice(year_range)
+        goods = self._good_rows(goods_list)
+
+        # Reverse the year axis so np.nonzero walks each good from the latest year back.
+        present = matrix.present[goods, start:stop][:, ::-1]
+        g, y = np.nonzero(present)
+        if not len(g):
+            # Same shape and dtypes as pd.read_sql_query returns for an empty result.
+            return pd.DataFrame(columns=['name', 'price', 'date', 'good_unit', 'data_source', 'year'])
+        rows = goods[g]
+        cols = stop - 1 - y
+
+        return pd.DataFrame({
+            'name': np.array(self.goods, dtype=object)[rows],
+            'price': matrix.price[rows, cols],
+            'date': matrix.date[rows, cols],
+            'good_unit': matrix.good_unit[rows, cols],
+            'data_source': matrix.data_source[rows, cols],
+            'year': (cols + self.first_year).astype(np.int64),
+        })
+
+    def incomes(self, year_range, data_source_name, regions):
+        """
+        Returns the rows fetch_incomes would read, ordered by year, then region.
+        """
+        columns = ['year', 'average_income_unadjusted', 'region']
+        source = self.source_index.get(data_source_name)
+        region_rows = self._region_rows(regions)
+        if source is None or not len(region_rows):
+            return pd.DataFrame(columns=columns)
+
+        start, stop = self._year_slice(year_range)
+        present = self.income_present[source][region_rows, start:stop].T
+        y, r = np.nonzero(present)
+        region_ids = region_rows[r]
+        cols = start + y
+
+        return pd.DataFrame({
+            'year': (cols + self.first_year).astype(np.int64),
+            'average_income_unadjusted': self.income[source, region_ids, cols],
+            'region': np.array(self.regions, dtype=object)[region_ids],
+        }, columns=columns)
+
+    def goods_affordable(self, year_range, goods_list, regions, income_data_source, salary_interval):
+        """
+        Computes the rows fetch_final_goods_affordable reads from goods_affordability,
+        ordered by name, year and region, with the same arithmetic SQLite uses to build it.
+        """
+        columns = ['name', 'final_goods_affordable', 'good_unit', 'date', 'year', 'region']
+        source = self.source_index.get(income_data_source)
+        periods = SALARY_PERIODS.get(salary_interval)
+        region_rows = self._region_rows(regions)
+        goods = self._good_rows(goods_list)
+        if source is None or periods is None or not len(region_rows) or not len(goods):
+            return pd.DataFrame(columns=columns)
+
+        start, stop = self._year_slice(year_range)
+        price = self.priced_averages.price[goods, start:stop]
+        income = self.income[source][region_rows, start:stop]
+
+        # goods x years x regions, matching ORDER BY name, year, region
+        valid = (self.priced_averages.present[goods, start:stop] & ~np.isnan(price) & (price != 0))[:, :, None] \
+            & (self.income_present[source][region_rows, start:stop] & ~np.isnan(income)).T[None, :, :]
+        g, y, r = np.nonzero(valid)
+        if not len(g):
+            return pd.DataFrame(columns=columns)
+        rows = goods[g]
+        cols = start + y
+        affordable = np.trunc((income[r, y] / periods) / price[g, y]).astype(np.int64)
+
+        return pd.DataFrame({
+            'name': np.array(self.goods, dtype=object)[rows],
+            'final_goods_affordable': affordable,
+            'good_unit': self.priced_averages.good_unit[rows, cols],
+            'date': self.priced_averages.date[rows, cols],
+            'year': (cols + self.first_year).astype(np.int64),
+            'region': np.array(self.regions, dtype=object)[region_rows[r]],
+        }, columns=columns)
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(db_path):
+    """
+    Returns the process-wide snapshot of db_path, reloading it if the database has changed.
+    """
+    version = database_version(db_path)
+    snapshot = _snapshots.get(db_path)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_path)
+        if snapshot is None or snapshot.version != database_version(db_path):
+            snapshot = Snapshot(db_path)
+            _snapshots[db_path] = snapshot
+        return snapshot
@@ -0,0 +1,19 @@
+import os
+
+
+def database_version(db_path):
+    """
+    Returns a cheap token that changes whenever committed data in the database changes:
+    the size and mtime of the main file and its WAL. A checkpoint can change it without
+    changing the contents, which only costs callers a needless reload.
+    """
+    if db_path is None:
+        return None
+    version = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
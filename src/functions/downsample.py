@@ -0,0 +1,95 @@
+import numpy as np
+
+ALGORITHMS = ('lttb', 'minmax')
+DEFAULT_MAX_POINTS = 1000
+# Viewport-tied targets are rounded up to this step so nearby widths share cache entries.
+POINTS_STEP = 100
+MIN_POINTS = 200
+MAX_POINTS = 4000
+
+
+def points_for_width(width, points_per_pixel=1.0):
+    """
+    Returns the number of points worth sending for a plot width pixels wide: about one per pixel,
+    rounded up to POINTS_STEP and kept within [MIN_POINTS, MAX_POINTS]. Unknown widths get
+    DEFAULT_MAX_POINTS.
+    """
+    if not width:
+        return DEFAULT_MAX_POINTS
+    points = int(np.ceil(width * points_per_pixel / POINTS_STEP)) * POINTS_STEP
+    return min(max(points, MIN_POINTS), MAX_POINTS)
+
+
+def _numeric(x):
+    # Dates (datetime64 or ISO strings) become seconds so distances along x are comparable.
+    x = np.asarray(x)
+    if x.dtype.kind in 'MOU':
+        return x.astype('datetime64[s]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points and, from each of
+    threshold - 2 equal-count buckets in between, the point forming the largest triangle with
+    the previously kept point and the average of the next bucket. x must be sorted.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Average of every bucket at once; bucket i looks ahead to the average of bucket i + 1,
+    # and the last bucket to the final point.
+    next_x = np.append((np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts)[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        area = np.abs((x[a] - next_x[bucket]) * (y[start:stop] - y[a])
+                      - (x[a] - x[start:stop]) * (next_y[bucket] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def min_max_indices(x, y, threshold):
+    """
+    Keeps the lowest and highest point of each of threshold // 2 equal-count buckets, plus the
+    first and last points, so every spike survives. x must be sorted.
+    """
+    n = len(x)
+    buckets = threshold // 2
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorted by bucket, then y: each bucket's first entry is its minimum and its last its maximum.
+    order = np.lexsort((y, bucket_of))
+    return np.unique(np.concatenate(([0, n - 1], order[edges[:-1]], order[edges[1:] - 1])))
+
+
+def downsample(x, y, threshold=DEFAULT_MAX_POINTS, algorithm='lttb'):
+    """
+    Reduces one trace to about threshold points with 'lttb' or 'minmax'. x may be numbers,
+    datetime64 or ISO date strings and must be sorted; points with a missing y are dropped.
+    Returns the kept x and y as arrays, with x in its original type.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Downsampling algorithms supported: {', '.join(repr(name) for name in ALGORITHMS)}")
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    present = ~np.isnan(y)
+    if not present.all():
+        x, y = x[present], y[present]
+    if len(x) <= threshold:
+        return x, y
+
+    select = lttb_indices if algorithm == 'lttb' else min_max_indices
+    kept = select(_numeric(x), y, threshold)
+    return x[kept], y[kept]
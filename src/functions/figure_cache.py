@@ -0,0 +1,233 @@
+import fcntl
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from src.functions.db.version import database_version
+
+# The temp directory is the one writable place on App Engine standard (and shared by its workers).
+DEFAULT_CACHE_DIR = os.environ.get('VALUE_VOYAGE_FIGURE_CACHE_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'value_voyage', 'figures'))
+DEFAULT_MAX_BYTES = int(os.environ.get('VALUE_VOYAGE_FIGURE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Temp files older than this were left by a writer that died before renaming them into place.
+ORPHAN_TEMP_SECONDS = 600
+
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(counter, amount=1):
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def figure_cache_stats():
+    """
+    Returns this process's hit/miss/write/eviction counters for the on-disk figure cache.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in sorted(value.items())}
+    return value
+
+
+def cache_key(name, arguments, db_path):
+    payload = json.dumps(
+        {'name': name, 'arguments': _normalize(arguments), 'db': database_version(db_path)},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FigureCache:
+    """
+    A size-bounded on-disk cache of Plotly figure JSON, shared by every worker pointed at the
+    same directory. Entries are written to a temp file and renamed into place, so readers never
+    see partial files. Reads bump the file mtime, and eviction removes the least recently used
+    entries under an exclusive lock file once the directory grows past max_bytes, along with
+    orphaned temp files.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                figure_json = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            _count('misses')
+            return None
+        except OSError:
+            _count('errors')
+            return None
+        _count('hits')
+        return pio.from_json(figure_json)
+
+    def put(self, key, figure):
+        temp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(figure.to_json())
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            _count('errors')
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+        _count('writes')
+        self.evict()
+
+    def evict(self):
+        lock_path = os.path.join(self.cache_dir, '.lock')
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                entries = []
+                total_bytes = 0
+                orphaned_before = time.time() - ORPHAN_TEMP_SECONDS
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith('.tmp'):
+                        try:
+                            if entry.stat().st_mtime < orphaned_before:
+                                os.remove(entry.path)
+                        except FileNotFoundError:
+                            pass
+                        continue
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total_bytes += stat.st_size
+
+                entries.sort()
+                for _, size, path in entries:
+                    if total_bytes <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                        _count('evictions')
+                    except FileNotFoundError:
+                        pass
+                    total_bytes -= size
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+default_figure_cache = FigureCache()
+
+
+class FigureMemo:
+    """
+    A bounded in-process LRU of figures for interactive callbacks, in front of the on-disk cache.
+    Callers pass an already-normalized, hashable key; the database version is added to it, so
+    entries built before an ingestion are never served and simply age out.
+    """
+
+    def __init__(self, db_path=None, maxsize=64):
+        self.db_path = db_path
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        key = (database_version(self.db_path), key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        figure = build()
+        with self._lock:
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'maxsize': self.maxsize}
+
+
+def cached_figure(db_path=None, cache=None):
+    """
+    Decorator that stores the figures a function returns in the on-disk figure cache.
+
+    The key combines the function name, its normalized call arguments and a fingerprint of the
+    database, so figures are rebuilt automatically after ingestion. The database path comes
+    from the db_path argument of the call, or from the decorator when the function takes none.
+
+    Usage:
+        @cached_figure()
+        def plot_something(db_path, year_range): ...
+
+        @cached_figure(db_path='data/db/sqlite/database.sqlite')
+        def get_some_graph(): ...
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            figure_cache = cache or default_figure_cache
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            path = arguments.get('db_path', db_path)
+
+            key = cache_key(name, arguments, path)
+            figure = figure_cache.get(key)
+            if figure is None:
+                figure = func(*args, **kwargs)
+                figure_cache.put(key, figure)
+            return figure
+
+        return wrapper
+    return decorator
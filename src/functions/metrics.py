@@ -0,0 +1,219 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Instrumentation is off unless VALUE_VOYAGE_METRICS=1: connections are then plain sqlite3
+# connections, instrumented functions are left undecorated, and neither routes nor request hooks
+# are installed.
+ENABLED = os.environ.get('VALUE_VOYAGE_METRICS', '0') == '1'
+# The slow query log holds raw SQL and query plans, so it is served only if
+# VALUE_VOYAGE_SLOW_QUERY_ENDPOINT=1 is set as well.
+SLOW_QUERY_ENDPOINT = os.environ.get('VALUE_VOYAGE_SLOW_QUERY_ENDPOINT', '0') == '1'
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing count per label combination.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labels, key)), value
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram per label combination, in seconds.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: ([*counts], total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = tuple(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (('le', _number(bound)),), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+def _register(metric):
+    with _registry_lock:
+        for existing in _metrics:
+            if existing.name == metric.name:
+                return existing
+        _metrics.append(metric)
+        return metric
+
+
+def counter(name, documentation, labels=()):
+    return _register(Counter(name, documentation, labels))
+
+
+def histogram(name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, labels, buckets))
+
+
+def register_collector(collect):
+    """
+    Registers a function called at scrape time that returns (name, kind, documentation, samples)
+    tuples, samples being (labels, value) pairs. Used for values other modules already track.
+    """
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    with _registry_lock:
+        metrics = list(_metrics)
+        collectors = list(_collectors)
+
+    lines.append('# HELP value_voyage_metrics_enabled Whether query and callback instrumentation is on.')
+    lines.append('# TYPE value_voyage_metrics_enabled gauge')
+    lines.append(f'value_voyage_metrics_enabled {int(ENABLED)}')
+
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{_label_text(labels)} {_number(value)}')
+
+    for collect in collectors:
+        for name, kind, documentation, samples in collect():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_label_text(labels)} {_number(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _pool_and_cache_metrics():
+    from src.functions.db.pool import pool_metrics
+    from src.functions.figure_cache import figure_cache_stats
+
+    pools = pool_metrics()
+    pool_fields = [
+        ('checkouts', 'counter', 'Read connections checked out of the pool.'),
+        ('waits', 'counter', 'Checkouts that had to wait for a connection.'),
+        ('opened', 'counter', 'Read connections the pool has opened.'),
+        ('closed', 'counter', 'Read connections the pool has closed.'),
+        ('open', 'gauge', 'Read connections currently open.'),
+        ('idle', 'gauge', 'Read connections currently idle in the pool.'),
+    ]
+    for field, kind, documentation in pool_fields:
+        suffix = '_total' if kind == 'counter' else ''
+        yield (f'value_voyage_read_pool_{field}{suffix}', kind, documentation,
+               [((('db', path),), values[field]) for path, values in sorted(pools.items())])
+
+    cache = figure_cache_stats()
+    yield ('value_voyage_figure_cache_events_total', 'counter', 'On-disk figure cache hits, misses, writes, evictions and errors.',
+           [((('event', event),), value) for event, value in sorted(cache.items())])
+
+
+register_collector(_pool_and_cache_metrics)
+
+callback_seconds = histogram(
+    'value_voyage_dash_callback_seconds', 'Server time spent in Dash callbacks, by output.', ('output',)
+)
+
+
+def register_metrics(server, path='/metrics'):
+    """
+    Exposes the metrics at path on a Flask server (app.server for the Dash app) and times Dash
+    callbacks, if metrics are enabled. The captured slow query plans are served as JSON at
+    {path}/slow-queries only if SLOW_QUERY_ENDPOINT is set too.
+    """
+    if not ENABLED:
+        return
+
+    from flask import Response, g, request
+
+    from src.functions.db.instrumentation import slow_queries
+
+    @server.route(path)
+    def metrics_endpoint():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+    if SLOW_QUERY_ENDPOINT:
+        @server.route(f'{path}/slow-queries')
+        def slow_queries_endpoint():
+            return Response(json.dumps(list(slow_queries)), mimetype='application/json')
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith('/_dash-update-component'):
+            g.callback_started = time.perf_counter()
+
+    @server.after_request
+    def stop_callback_timer(response):
+        started = g.pop('callback_started', None)
+        if started is not None:
+            output = (request.get_json(silent=True) or {}).get('output', 'unknown')
+            callback_seconds.observe(time.perf_counter() - started, output=output)
+        return response
@@ -0,0 +1,154 @@
+import gc
+import logging
+import os
+import threading
+import time
+
+from src.functions.db.pool import close_pools, warm_pool
+from src.functions.db.real_dollars import get_deflators
+from src.functions.db.snapshot import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """
+    Runs named warm-up steps once, in order, and records the state, duration and error of
+    each. Steps are (name, function) or (name, function, required) tuples; the process is ready
+    once every required step has succeeded. A failed optional step is reported but doesn't
+    hold readiness back.
+
+    start() runs the steps in a background thread and returns at once; run() runs them in the
+    calling thread, or waits for the background run if start() got there first. Either way
+    they run at most once per WarmUp, and run() only returns once they have all finished, so a
+    process forked after run() (the preloading gunicorn master) starts out ready.
+    """
+
+    def __init__(self, steps):
+        self.steps = [(step[0], step[1], step[2] if len(step) > 2 else True) for step in steps]
+        self._lock = threading.Lock()
+        self._started = None
+        self._finished = None
+        self._done = threading.Event()
+        self._results = {name: {'state': 'pending', 'seconds': None, 'error': None} for name, _, _ in self.steps}
+
+    def start(self):
+        """
+        Starts the steps in a daemon thread unless they have already been started.
+        """
+        with self._lock:
+            if self._started is not None:
+                return False
+            self._started = time.time()
+        threading.Thread(target=self._run_steps, name='warm-up', daemon=True).start()
+        return True
+
+    def run(self):
+        """
+        Runs the steps in this thread, or waits for them to finish if start() has already
+        started them. Returns the seconds each step took.
+        """
+        with self._lock:
+            running_elsewhere = self._started is not None
+            if not running_elsewhere:
+                self._started = time.time()
+        if running_elsewhere:
+            self._done.wait()
+        else:
+            self._run_steps()
+        return self.timings()
+
+    def _run_steps(self):
+        try:
+            for name, step, required in self.steps:
+                result = self._results[name]
+                result['state'] = 'running'
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    result['error'] = f"{type(e).__name__}: {e}"
+                    result['state'] = 'failed'
+                    (logger.error if required else logger.warning)("Warm-up step %s failed: %s", name, result['error'])
+                else:
+                    result['state'] = 'done'
+                result['seconds'] = time.perf_counter() - started
+        finally:
+            self._finished = time.time()
+            self._done.set()
+
+    @property
+    def started(self):
+        return self._started is not None
+
+    @property
+    def ready(self):
+        return all(self._results[name]['state'] == 'done' for name, _, required in self.steps if required)
+
+    def timings(self):
+        return {name: result['seconds'] for name, result in self._results.items() if result['seconds'] is not None}
+
+    def status(self):
+        """
+        Returns the readiness report: overall state, seconds since the start and every step's
+        state, seconds and error.
+        """
+        if self._started is None:
+            state = 'pending'
+        elif self.ready:
+            state = 'ready'
+        elif self._finished is not None:
+            state = 'failed'
+        else:
+            state = 'warming'
+        end = self._finished or time.time()
+        return {
+            'ready': self.ready,
+            'state': state,
+            'pid': os.getpid(),
+            'seconds': end - self._started if self._started is not None else None,
+            'steps': [{'name': name, 'required': required, **self._results[name]} for name, _, required in self.steps],
+        }
+
+
+def database_steps(db_path, connections=None):
+    """
+    The warm-up steps for db_path itself: open the read pool's connections, build the
+    in-memory snapshot and load the CPI deflators. Databases without a cpi table still serve
+    everything but real_dollars_base_year, so that step is optional.
+    """
+    count = connections or int(os.environ.get('GUNICORN_THREADS', '4'))
+    return [
+        ('connections', lambda: warm_pool(db_path, count)),
+        ('snapshot', lambda: get_snapshot(db_path)),
+        ('deflators', lambda: get_deflators(db_path), False),
+    ]
+
+
+def prepare_fork():
+    """
+    Readies a warmed-up process to be forked: the read pools are closed so no SQLite connection
+    crosses the fork, and the garbage collector is frozen so collections in the children don't
+    write to (and so copy) the pages holding the warmed-up objects.
+    """
+    close_pools()
+    gc.collect()
+    gc.freeze()
+
+
+def register_readiness(server, warm_up, path='/readiness_check'):
+    """
+    Serves warm_up.status() as JSON at path: 200 once the process is ready, 503 until then.
+    The first request to any path also starts the warm-up if nothing has started it yet.
+    """
+    from flask import jsonify
+
+    @server.route(path)
+    def readiness_check():
+        status = warm_up.status()
+        return jsonify(status), 200 if status['ready'] else 503
+
+    @server.before_request
+    def start_warm_up():
+        if not warm_up.started:
+            warm_up.start()
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from src.functions.db.insert import bulk_insert_incomes, write_good_price_batches
+
+
+@pytest.fixture
+def make_database(tmp_path):
+    """
+    Returns a function that builds an SQLite database from goods price records
+    (name, price, date, good_unit, data_source) and {year: average income} for FRED's
+    united states series, with the derived tables refreshed as ingestion leaves them.
+    """
+    def make(goods_records, incomes):
+        db_path = str(tmp_path / 'database.sqlite')
+        bulk_insert_incomes(db_path, pd.DataFrame([
+            dict(year=year, inflation_cpi=1.0, tax_units=1, average_income_unadjusted=income,
+                 average_income_adjusted=income, source_link='', source_name='FRED', region='united states')
+            for year, income in incomes.items()
+        ]))
+        years = sorted({int(record[2][:4]) for record in goods_records})
+        write_good_price_batches(db_path, [(goods_records, years, None)])
+        return db_path
+
+    return make
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from src.functions.db.fetch import fetch_affordability_cube, fetch_final_goods_affordable
+from src.functions.db.insert import insert_good_price_entry
+
+COLUMNS = ['name', 'year', 'region', 'final_goods_affordable', 'good_unit', 'date']
+
+
+@pytest.fixture
+def db_path(make_database):
+    # Source B sorts after A, so it is the latest row for bread in 1990 and 1991, but its
+    # prices are NULL and 0: affordability has to fall back to source A.
+    return make_database(
+        [('bread', 1.0, '1990-07-02', 'lb', 'A'), ('bread', None, '1990-07-02', 'lb', 'B'),
+         ('bread', 2.0, '1991-07-02', 'lb', 'A'), ('bread', 0.0, '1991-07-02', 'lb', 'B'),
+         ('milk', 3.0, '1990-07-02', 'gal', 'A')],
+        {1990: 31_990.0, 1991: 31_991.0},
+    )
+
+
+def affordability_frames(db_path):
+    frames = {
+        'sqlite': fetch_final_goods_affordable(db_path, (1990, 1991)),
+        'memory': fetch_final_goods_affordable(db_path, (1990, 1991), backend='memory'),
+        'cube_sqlite': fetch_affordability_cube(db_path, (1990, 1991), output_format='df'),
+        'cube_memory': fetch_affordability_cube(db_path, (1990, 1991), output_format='df', backend='memory'),
+    }
+    return {
+        name: frame[COLUMNS].astype({'year': 'int64', 'final_goods_affordable': 'int64'})
+                            .sort_values(['name', 'year', 'region']).reset_index(drop=True)
+        for name, frame in frames.items()
+    }
+
+
+def assert_backends_agree(db_path, expected):
+    frames = affordability_frames(db_path)
+    for name, frame in frames.items():
+        pd.testing.assert_frame_equal(frame, frames['sqlite'], obj=name)
+    assert frames['sqlite'][['name', 'year', 'final_goods_affordable']].values.tolist() == expected
+
+
+def test_backends_skip_unpriced_latest_rows(db_path):
+    assert_backends_agree(db_path, [['bread', 1990, 2665], ['bread', 1991, 1332], ['milk', 1990, 888]])
+
+
+def test_backends_agree_after_a_single_row_insert(db_path):
+    insert_good_price_entry(db_path, 'bread', 4.0, '1990-07-02', 'lb', 'C')
+    assert_backends_agree(db_path, [['bread', 1990, 666], ['bread', 1991, 1332], ['milk', 1990, 888]])
@@ -0,0 +1,64 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from src.functions.api import MIN_COMPRESS_BYTES, register_api
+
+GOODS_PRICES = '/api/v1/goods-prices?start_year=1990&end_year=2000'
+
+
+@pytest.fixture
+def client(make_database):
+    db_path = make_database(
+        [(good, 1.0 + year % 7, f'{year}-07-02', 'lb', source)
+         for good in ('bread', 'milk', 'eggs', 'sugar') for source in ('A', 'B') for year in range(1990, 2001)],
+        {year: 30_000.0 + year for year in range(1990, 2001)},
+    )
+    server = Flask(__name__)
+    register_api(server, db_path)
+    client = server.test_client()
+    # The first read recreates the WAL file that ingestion checkpointed away, which moves the
+    # database version (and so the ETags) once.
+    client.get(GOODS_PRICES)
+    return client
+
+
+def test_same_etag_gets_304_with_empty_body(client):
+    first = client.get(GOODS_PRICES)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.get(GOODS_PRICES, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+    other = client.get(GOODS_PRICES + '&goods=bread', headers={'If-None-Match': etag})
+    assert other.status_code == 200
+
+
+def test_gzip_response_has_its_own_etag(client):
+    plain = client.get(GOODS_PRICES)
+    assert len(plain.data) >= MIN_COMPRESS_BYTES
+
+    compressed = client.get(GOODS_PRICES, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+
+    revalidated = client.get(GOODS_PRICES, headers={'Accept-Encoding': 'gzip',
+                                                    'If-None-Match': compressed.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == compressed.headers['ETag']
+
+
+@pytest.mark.parametrize('query', ['start_year=abc', 'end_year=1.5', 'start_year=2001&end_year=2000', 'format=csv'])
+def test_bad_parameters_get_400(client, query):
+    response = client.get(f'/api/v1/affordability?{query}')
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.data)
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in response.headers
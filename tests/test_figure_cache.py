@@ -0,0 +1,22 @@
+import os
+import time
+
+import plotly.graph_objects as go
+
+from src.functions.figure_cache import ORPHAN_TEMP_SECONDS, FigureCache
+
+
+def test_eviction_sweeps_orphaned_temp_files(tmp_path):
+    cache = FigureCache(cache_dir=str(tmp_path), max_bytes=1024 * 1024)
+    orphan = tmp_path / 'orphan.tmp'
+    in_flight = tmp_path / 'in_flight.tmp'
+    orphan.write_text('{')
+    in_flight.write_text('{')
+    old = time.time() - ORPHAN_TEMP_SECONDS - 1
+    os.utime(orphan, (old, old))
+
+    cache.put('key', go.Figure())
+
+    assert not orphan.exists()
+    assert in_flight.exists()
+    assert cache.get('key') is not None
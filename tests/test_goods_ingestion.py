@@ -0,0 +1,74 @@
+import sqlite3
+
+import pandas as pd
+
+from scripts.python.data_insertion.goods_csv_to_db import process_csv, process_csv_directory
+from src.functions.db.insert import fetch_ingestion_manifest, source_file_hash
+
+
+def write_goods_csv(path, price=250.0, name='bread'):
+    pd.DataFrame({
+        'Year': [1990, 1991],
+        'Jan': [price, None],
+        'Year Avg': [price, 300.0],
+        'Good Name': [name, name],
+        'Good Unit': ['lb', 'lb'],
+        'Source': ['a', 'a'],
+        'Price Unit': ['cents', 'cents'],
+    }).to_csv(path, index=False)
+
+
+def table_rows(db_path, table):
+    with sqlite3.connect(db_path) as connection:
+        return sorted(connection.execute(f"SELECT * FROM {table};").fetchall(), key=repr)
+
+
+def test_reingesting_a_file_is_idempotent(tmp_path):
+    db_path = str(tmp_path / 'database.sqlite')
+    csv_path = tmp_path / 'bread.csv'
+    write_goods_csv(csv_path)
+
+    process_csv(db_path, str(csv_path))
+    prices = table_rows(db_path, 'goods_prices')
+    assert len(prices) == 3
+
+    process_csv(db_path, str(csv_path), force=True)
+    assert table_rows(db_path, 'goods_prices') == prices
+    assert fetch_ingestion_manifest(db_path, 'goods_prices') == {'bread.csv': source_file_hash(csv_path)}
+
+
+def test_changed_file_replaces_its_rows(tmp_path):
+    db_path = str(tmp_path / 'database.sqlite')
+    csv_path = tmp_path / 'bread.csv'
+    write_goods_csv(csv_path)
+    process_csv(db_path, str(csv_path))
+
+    write_goods_csv(csv_path, price=275.0)
+    process_csv(db_path, str(csv_path))
+    with sqlite3.connect(db_path) as connection:
+        prices = connection.execute("SELECT date, price FROM goods_prices ORDER BY date;").fetchall()
+    assert prices == [('1990-01-01', 2.75), ('1990-07-02', 2.75), ('1991-07-02', 3.0)]
+    assert fetch_ingestion_manifest(db_path, 'goods_prices') == {'bread.csv': source_file_hash(csv_path)}
+
+
+def test_files_in_the_manifest_are_skipped(tmp_path):
+    db_path = str(tmp_path / 'database.sqlite')
+    csv_paths = [str(tmp_path / 'bread.csv'), str(tmp_path / 'milk.csv')]
+    write_goods_csv(csv_paths[0])
+    write_goods_csv(csv_paths[1], price=120.0, name='milk')
+
+    first = process_csv_directory(db_path, csv_paths, workers=1)
+    assert first['skipped_files'] == []
+    assert first['rows_written'] == 6
+    affordability = table_rows(db_path, 'goods_affordability')
+
+    second = process_csv_directory(db_path, csv_paths, workers=1)
+    assert second['skipped_files'] == csv_paths
+    assert second['rows_parsed'] == 0
+    assert second['rows_written'] == 0
+    assert table_rows(db_path, 'goods_affordability') == affordability
+
+    forced = process_csv_directory(db_path, csv_paths, workers=1, force=True)
+    assert forced['skipped_files'] == []
+    assert forced['rows_written'] == 6
+    assert forced['rows_changed'] == 0
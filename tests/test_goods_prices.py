@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from src.functions.db.fetch import fetch_goods_prices
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'memory'])
+def test_ties_come_back_in_key_order(make_database, backend):
+    # Rows are inserted out of order; bread has two sources on the same date.
+    db_path = make_database(
+        [('milk', 3.0, '1990-07-02', 'gal', 'A'), ('bread', 1.0, '1990-07-02', 'lb', 'A'),
+         ('bread', 1.5, '1990-07-02', 'lb', 'B'), ('eggs', 2.0, '1991-07-02', 'doz', 'A'),
+         ('bread', 1.2, '1991-07-02', 'lb', 'A')],
+        {1990: 30_000.0},
+    )
+
+    df = fetch_goods_prices(db_path, (1990, 1991), backend=backend)
+
+    assert df[['name', 'year', 'data_source']].values.tolist() == [
+        ['bread', 1991, 'A'], ['eggs', 1991, 'A'], ['bread', 1990, 'B'], ['milk', 1990, 'A']
+    ]
+    assert df['year'].dtype == 'int32'
+    pd.testing.assert_index_equal(df.index, pd.RangeIndex(4))
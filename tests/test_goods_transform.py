@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.python.benchmarks.goods_csv_transform import legacy_transform_goods_frame, write_synthetic_csv
+from scripts.python.data_insertion.goods_csv_to_db import read_goods_csv, transform_goods_frame
+
+
+def assert_same_output(df, month_cols_present):
+    legacy = legacy_transform_goods_frame(df.copy(), month_cols_present)
+    vectorized = transform_goods_frame(df.copy(), month_cols_present)
+    pd.testing.assert_frame_equal(legacy, vectorized, check_exact=True)
+    assert legacy.to_csv().encode() == vectorized.to_csv().encode()
+
+
+def test_synthetic_csv_matches_legacy_transform(tmp_path):
+    csv_path = tmp_path / 'goods.csv'
+    write_synthetic_csv(csv_path, 5_000, seed=1)
+    df, month_cols_present = read_goods_csv(csv_path)
+    assert_same_output(df, month_cols_present)
+
+
+@pytest.mark.parametrize('months', [[], ['jan'], ['mar', 'dec'], ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                                                                   'jul', 'aug', 'sep', 'oct', 'nov', 'dec']])
+def test_month_subsets_match_legacy_transform(tmp_path, months):
+    df = pd.DataFrame({
+        'Year': [1913, 1913, 1950, 2024],
+        'Year Avg': [12.5, 0.3, 1.0, 4.25],
+        'Good Name': ['bread', 'milk', 'bread', 'eggs'],
+        'Good Unit': ['lb', 'gal', 'lb', 'doz'],
+        'Source': ['a', 'a', 'b', 'c'],
+        'Price Unit': ['Cents', 'dollar', 'CENT', 'Dollars'],
+    })
+    for month in months:
+        df[month.title()] = [np.nan, 1.5, 30.0, np.nan]
+    csv_path = tmp_path / 'goods.csv'
+    df.to_csv(csv_path, index=False)
+
+    df, month_cols_present = read_goods_csv(csv_path)
+    assert_same_output(df, month_cols_present)
+
+
+def test_transform_converts_cents_and_dates():
+    df = pd.DataFrame({
+        'year': [1990], 'jan': [250.0], 'feb': [np.nan], 'year avg': [300.0],
+        'good name': ['bread'], 'good unit': ['lb'], 'source': ['a'], 'price unit': ['cents'],
+    })
+    melted = transform_goods_frame(df, ['jan', 'feb'])
+    assert melted[['price', 'date']].values.tolist() == [[2.5, '1990-01-01'], [3.0, '1990-07-02']]
@@ -0,0 +1,31 @@
+import pytest
+from flask import Flask
+
+from src.functions import metrics
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(enabled, slow_query_endpoint):
+        monkeypatch.setattr(metrics, 'ENABLED', enabled)
+        monkeypatch.setattr(metrics, 'SLOW_QUERY_ENDPOINT', slow_query_endpoint)
+        server = Flask(__name__)
+        metrics.register_metrics(server)
+        return server.test_client()
+
+    return make
+
+
+def test_nothing_is_served_while_disabled(make_client):
+    client = make_client(enabled=False, slow_query_endpoint=True)
+    assert client.get('/metrics').status_code == 404
+    assert client.get('/metrics/slow-queries').status_code == 404
+
+
+def test_slow_queries_need_their_own_opt_in(make_client):
+    client = make_client(enabled=True, slow_query_endpoint=False)
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics/slow-queries').status_code == 404
+
+    client = make_client(enabled=True, slow_query_endpoint=True)
+    assert client.get('/metrics/slow-queries').status_code == 200
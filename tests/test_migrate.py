@@ -0,0 +1,56 @@
+import sqlite3
+
+from src.functions.db.migrate import iter_sql_statements, migrate_dump, parse_insert_statement
+
+
+def test_semicolons_inside_strings_do_not_split_statements():
+    lines = [
+        "INSERT INTO `notes` VALUES (1,'a; b'),(2,'it\\'s; fine');\n",
+        "INSERT INTO `notes` VALUES (3,'say ''hi''; then');",
+        " -- trailing; comment\n",
+        "/*!40101 SET NAMES utf8 */;\n",
+        "INSERT INTO `notes` VALUES (4,'multi\n",
+        "line; value');\n",
+    ]
+    assert list(iter_sql_statements(lines)) == [
+        "INSERT INTO `notes` VALUES (1,'a; b'),(2,'it\\'s; fine')",
+        "INSERT INTO `notes` VALUES (3,'say ''hi''; then')",
+        "INSERT INTO `notes` VALUES (4,'multi\nline; value')",
+    ]
+
+
+def test_parse_insert_statement_unescapes_values():
+    statement = "INSERT INTO `notes` (`id`,`body`,`score`) VALUES (1,'it\\'s; \\\\ ok',1.5),(2,'say ''hi''',NULL)"
+    assert parse_insert_statement(statement) == (
+        'notes', '(`id`,`body`,`score`)', [(1, "it's; \\ ok", 1.5), (2, "say 'hi'", None)]
+    )
+
+
+def test_parse_insert_statement_leaves_unknown_literals_to_sqlite():
+    assert parse_insert_statement("INSERT INTO `blobs` VALUES (1,0xDEADBEEF)") is None
+    assert parse_insert_statement("UPDATE `notes` SET body = 'x'") is None
+
+
+def test_failing_insert_rolls_back_to_its_savepoint(tmp_path):
+    dump_file = tmp_path / 'dump.sql'
+    dump_file.write_text(
+        "CREATE TABLE `notes` (\n"
+        "  `id` int(11) NOT NULL,\n"
+        "  `body` varchar(255),\n"
+        "  PRIMARY KEY (`id`)\n"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n"
+        "INSERT INTO `notes` VALUES (1,'kept; one');\n"
+        "INSERT INTO `notes` VALUES (2,'dropped'),(1,'duplicate key'),(3,'dropped');\n"
+        "INSERT INTO `notes` VALUES (4,'kept; four');\n"
+    )
+    sqlite_path = str(tmp_path / 'database.sqlite')
+
+    stats = migrate_dump(str(dump_file), sqlite_path, progress_seconds=60)
+
+    assert stats['errors'] == 1
+    assert stats['tables'] == 1
+    with sqlite3.connect(sqlite_path) as connection:
+        assert connection.execute("SELECT id, body FROM notes ORDER BY id;").fetchall() == [
+            (1, 'kept; one'), (4, 'kept; four')
+        ]
+        assert connection.execute("PRAGMA journal_mode;").fetchone() == ('wal',)